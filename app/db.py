@@ -1,15 +1,46 @@
 import os
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, create_engine
-from sqlalchemy.orm import declarative_base, relationship, sessionmaker
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, LargeBinary, String, event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base, relationship
 
 # Database settings
-SQLITE_FILE_NAME = "data/resume.db"
-SQLITE_URL = f"sqlite:///{SQLITE_FILE_NAME}"
-
-# let's keep session sync for while
-engine = create_engine(SQLITE_URL)
+SQLITE_FILE_NAME = os.getenv("RESUME_DB_FILE", "data/resume.db")
+SQLITE_URL = f"sqlite+aiosqlite:///{SQLITE_FILE_NAME}"
+
+# SQLite connection profile, applied to every new connection. SQLITE_TUNING=0 keeps SQLite's defaults
+# (rollback journal, synchronous=FULL, no mmap, no busy timeout).
+SQLITE_TUNING = os.getenv("SQLITE_TUNING", "1") != "0"
+SQLITE_PRAGMAS = {
+    # WAL lets readers run while a writer commits; NORMAL only fsyncs at checkpoints, which is safe in WAL mode
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    # Negative cache_size is in KiB rather than pages
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-20000")),
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+    # Milliseconds a writer waits for the lock before failing with "database is locked"
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000")),
+}
+
+
+def apply_sqlite_profile(async_engine, pragmas=None):
+    """Run the PRAGMA profile on every new DBAPI connection opened by async_engine"""
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+# aiosqlite runs each connection on its own thread, so queries never block the event loop
+engine = create_async_engine(SQLITE_URL)
+if SQLITE_TUNING:
+    apply_sqlite_profile(engine)
 
 # Create base model
 Base = declarative_base()
@@ -20,7 +51,7 @@ class PersonalInfo(Base):
     __tablename__ = "personal_info"
 
     id = Column(Integer, primary_key=True)
-    resume_id = Column(Integer, ForeignKey("resume.id"))
+    resume_id = Column(Integer, ForeignKey("resume.id"), index=True)
     name = Column(String, nullable=False)
     location = Column(String, nullable=False)
     email = Column(String, nullable=False)
@@ -35,7 +66,7 @@ class SkillSet(Base):
     __tablename__ = "skillset"
 
     id = Column(Integer, primary_key=True)
-    resume_id = Column(Integer, ForeignKey("resume.id"))
+    resume_id = Column(Integer, ForeignKey("resume.id"), index=True)
     technical_skills = Column(String, nullable=False, default="")
     soft_skills = Column(String, nullable=False, default="")
     tools = Column(String, nullable=False, default="")
@@ -48,7 +79,7 @@ class Education(Base):
     __tablename__ = "education"
 
     id = Column(Integer, primary_key=True)
-    resume_id = Column(Integer, ForeignKey("resume.id"))
+    resume_id = Column(Integer, ForeignKey("resume.id"), index=True)
     institution = Column(String, nullable=False)
     degree = Column(String, nullable=False)
     graduation_date = Column(String, nullable=False)
@@ -61,7 +92,7 @@ class Experience(Base):
     __tablename__ = "experience"
 
     id = Column(Integer, primary_key=True)
-    resume_id = Column(Integer, ForeignKey("resume.id"))
+    resume_id = Column(Integer, ForeignKey("resume.id"), index=True)
     title = Column(String, nullable=False)
     company = Column(String, nullable=False)
     location = Column(String, nullable=True)
@@ -77,7 +108,7 @@ class Project(Base):
     __tablename__ = "project"
 
     id = Column(Integer, primary_key=True)
-    resume_id = Column(Integer, ForeignKey("resume.id"))
+    resume_id = Column(Integer, ForeignKey("resume.id"), index=True)
     name = Column(String, nullable=False)
     url = Column(String, nullable=False)
     technologies = Column(String, nullable=False)
@@ -89,11 +120,23 @@ class Project(Base):
 
 class Resume(Base):
     __tablename__ = "resume"
+    # Composite indexes serve the keyset-paginated resume listing, one per sort order (see list_resumes).
+    # AUTOINCREMENT keeps a deleted resume's id from being handed out again: caches and ETags identify a
+    # resume's content by (id, revision), which a new resume reusing the id would otherwise collide with
+    __table_args__ = (
+        Index("ix_resume_updated_at_id", "updated_at", "id"),
+        Index("ix_resume_created_at_id", "created_at", "id"),
+        Index("ix_resume_name_id", "name", "id"),
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False, default="Default Resume")
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    # Content revision, bumped by triggers on every write to the resume's sections (see RESUME_REVISION_TABLES);
+    # updated_at cannot serve this purpose because its onupdate only fires for changes to this row
+    revision = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relationships
     personal_info = relationship(
@@ -118,21 +161,132 @@ class Config(Base):
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
 
+class OptimizedResume(Base):
+    """An ATS optimization result of a resume: zlib-compressed HTML stored under the resume and the SHA-256 hex
+    digest of the HTML"""
+
+    __tablename__ = "optimized_resume"
+
+    resume_id = Column(Integer, ForeignKey("resume.id"), primary_key=True)
+    id = Column(String(64), primary_key=True)
+    html = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.now)
+
+
+class LLMResponseCache(Base):
+    """LLM completions keyed by the SHA-256 of everything that determines them (see app.services.llm_cache)"""
+
+    __tablename__ = "llm_response_cache"
+
+    key = Column(String(64), primary_key=True)
+    model = Column(String, nullable=False)
+    response = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+    last_used_at = Column(DateTime, nullable=False, default=datetime.now, index=True)
+    hits = Column(Integer, nullable=False, default=0)
+
+
+class LLMLease(Base):
+    """Claims on in-flight LLM calls, so workers sharing the database don't make the same call at once
+    (see app.services.llm_flight)"""
+
+    __tablename__ = "llm_lease"
+
+    key = Column(String(64), primary_key=True)
+    owner = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+
+# Child tables whose writes bump resume.revision
+RESUME_REVISION_TABLES = ("personal_info", "skillset", "experience", "project", "education")
+
+
 # Database initialization
-def create_db_and_tables():
+async def create_db_and_tables():
     # Ensure the directory for the database file exists
     db_dir = os.path.dirname(SQLITE_FILE_NAME)
-    os.makedirs(db_dir, exist_ok=True)
-    Base.metadata.create_all(engine)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(init_schema)
+
+
+def init_schema(connection):
+    """Create tables and bring databases created by older versions up to date"""
+    Base.metadata.create_all(connection)
+
+    # create_all() never alters existing tables, and only builds indexes together with new tables
+    resume_columns = {column["name"] for column in inspect(connection).get_columns("resume")}
+    if "revision" not in resume_columns:
+        connection.exec_driver_sql("ALTER TABLE resume ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+    # Optimization results used to be keyed on the HTML digest alone, which let resumes share a row
+    if inspect(connection).get_pk_constraint("optimized_resume")["constrained_columns"] == ["id"]:
+        connection.exec_driver_sql("ALTER TABLE optimized_resume RENAME TO optimized_resume_old")
+        OptimizedResume.__table__.create(connection)
+        connection.exec_driver_sql(
+            "INSERT INTO optimized_resume (resume_id, id, html, created_at) "
+            "SELECT resume_id, id, html, created_at FROM optimized_resume_old"
+        )
+        connection.exec_driver_sql("DROP TABLE optimized_resume_old")
+    resume_sql = connection.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'resume'"
+    ).scalar_one()
+    if "AUTOINCREMENT" not in resume_sql.upper():
+        _rebuild_resume_table(connection)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+    # Triggers keep the revision in step with every write, including the single-statement UPDATE paths
+    for table in RESUME_REVISION_TABLES:
+        for event_name, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            connection.exec_driver_sql(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_{event_name.lower()}_bumps_revision "
+                f"AFTER {event_name} ON {table} BEGIN "
+                f"UPDATE resume SET revision = revision + 1 WHERE id = {row}.resume_id; END"
+            )
+    connection.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS resume_name_bumps_revision AFTER UPDATE OF name ON resume BEGIN "
+        "UPDATE resume SET revision = revision + 1 WHERE id = NEW.id; END"
+    )
+
+
+def _rebuild_resume_table(connection):
+    """Recreate the resume table with AUTOINCREMENT ids, keeping its rows and the ids referring to them"""
+    # In legacy mode renaming leaves the section tables' foreign keys and triggers naming "resume" as they
+    # are, so they refer to the new table once the old one is gone
+    connection.exec_driver_sql("PRAGMA legacy_alter_table = ON")
+    for index in Resume.__table__.indexes:
+        connection.exec_driver_sql(f"DROP INDEX IF EXISTS {index.name}")
+    connection.exec_driver_sql("ALTER TABLE resume RENAME TO resume_old")
+    Resume.__table__.create(connection)
+    columns = ", ".join(column.name for column in Resume.__table__.columns)
+    connection.exec_driver_sql(f"INSERT INTO resume ({columns}) SELECT {columns} FROM resume_old")
+    connection.exec_driver_sql("DROP TABLE resume_old")
+    connection.exec_driver_sql("PRAGMA legacy_alter_table = OFF")
+    # Ids of resumes deleted before now are only known where rows still refer to them; never hand those out
+    referenced = " UNION ALL ".join(
+        f"SELECT MAX(resume_id) FROM {table}" for table in (*RESUME_REVISION_TABLES, "optimized_resume")
+    )
+    connection.exec_driver_sql("DELETE FROM sqlite_sequence WHERE name = 'resume'")
+    connection.exec_driver_sql(
+        "INSERT INTO sqlite_sequence (name, seq) "
+        f"SELECT 'resume', COALESCE(MAX(id), 0) FROM (SELECT MAX(id) AS id FROM resume UNION ALL {referenced})"
+    )
 
 
 # Session dependency
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False keeps committed objects readable: an expired attribute would
+# need a lazy refresh, which AsyncSession cannot do implicitly
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+def session_factory_for(session: AsyncSession) -> async_sessionmaker:
+    """Sessions like SessionLocal's on the same engine as session, for work that outlives it, such as a
+    response streamed after its handler has returned"""
+    return async_sessionmaker(session.bind, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 
-def get_session():
-    session = SessionLocal()
-    try:
+async def get_session():
+    async with SessionLocal() as session:
         yield session
-    finally:
-        session.close()
@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 import uvicorn
@@ -6,24 +7,34 @@ from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.exc import NoResultFound
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import create_db_and_tables, engine, get_session
 from app.routes.ats import ats_router
 from app.routes.config import config_router
+from app.routes.metrics import metrics_router
+from app.routes.pdf import pdf_router
 from app.routes.resume import resume_router
-from app.services.resume import get_all_resumes, get_resume_dict
+from app.services.ats import ATS_STREAMING_ENABLED
+from app.services.llm import count_tokens, llm_clients
+from app.services.pdf import pdf_render_pool
+from app.services.resume import get_first_resume_id, get_resume_dict
 
 
 @asynccontextmanager
 async def lifespan(fast_api_app: FastAPI):
     # Actions on startup
     print("Initializing database and LLM...")
-    create_db_and_tables()
+    await create_db_and_tables()
+    pdf_render_pool.start()
+    # Loads the tokenizer (its first use reads, or even downloads, the encoding) off the event loop
+    await asyncio.to_thread(count_tokens, "")
     print("Startup complete.")
     yield
     # Actions on shutdown (if any)
-    engine.dispose()  # Clean up the engine's connection pool
+    await engine.dispose()  # Clean up the engine's connection pool
+    pdf_render_pool.shutdown()
+    await llm_clients.aclose()
     print("Shutting down.")
 
 
@@ -41,15 +52,17 @@ templates = Jinja2Templates(directory="app/templates")
 app.include_router(resume_router)
 app.include_router(ats_router)
 app.include_router(config_router)
+app.include_router(metrics_router)
+app.include_router(pdf_router)
 
 
 @app.get("/", response_class=RedirectResponse)
-async def root(session: Session = Depends(get_session)):
+async def root(session: AsyncSession = Depends(get_session)):
     """Redirect from root to the first available resume"""
     try:
-        resumes = await get_all_resumes(session)
-        if resumes:
-            return RedirectResponse(f"/resume/{resumes[0]['id']}")
+        resume_id = await get_first_resume_id(session)
+        if resume_id is not None:
+            return RedirectResponse(f"/resume/{resume_id}")
         else:
             return RedirectResponse("/api/config")
     except Exception as e:
@@ -57,7 +70,9 @@ async def root(session: Session = Depends(get_session)):
 
 
 @app.get("/resume/{resume_id}", response_class=HTMLResponse)
-async def home(request: Request, resume_id: int, tab: str = Query(None), session: Session = Depends(get_session)):
+async def home(
+    request: Request, resume_id: int, tab: str = Query(None), session: AsyncSession = Depends(get_session)
+):
     try:
         resume_data = await get_resume_dict(session, resume_id)
 
@@ -65,7 +80,12 @@ async def home(request: Request, resume_id: int, tab: str = Query(None), session
 
         return templates.TemplateResponse(
             "index.html",
-            {"request": request, "resume_data": resume_data, "active_tab": active_tab},
+            {
+                "request": request,
+                "resume_data": resume_data,
+                "active_tab": active_tab,
+                "ats_streaming_enabled": ATS_STREAMING_ENABLED,
+            },
         )
     except NoResultFound:
         raise HTTPException(status_code=404, detail="Resume entry not found")
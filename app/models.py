@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, ConfigDict
 
@@ -71,6 +71,22 @@ class Resume(BaseModel):
     name: Optional[str] = None
 
 
+class FieldEdit(BaseModel):
+    entity: str
+    field: str
+    value: str
+    id: Optional[int] = None
+
+
+class BatchEditRequest(BaseModel):
+    edits: List[FieldEdit]
+
+
+class BatchOptimizeRequest(BaseModel):
+    job_descriptions: List[str]
+    refresh: bool = False
+
+
 class AIEnhanceRequest(BaseModel):
     text: str
 
@@ -86,3 +102,42 @@ async def db_resume_to_dict(db_resume):
     """Convert a SQLAlchemy Resume object to a dictionary using Pydantic validation"""
     pydantic_resume = Resume.model_validate(db_resume)
     return pydantic_resume.model_dump()
+
+
+def _section_getter(model):
+    """Build a converter that copies a row's loaded values into a dict in the Pydantic model's field order"""
+    fields = tuple(model.model_fields)
+
+    def row_to_dict(row):
+        # Loaded column values sit in the instance __dict__; reading them there skips SQLAlchemy's
+        # instrumented descriptors, which cost more than the copy itself
+        values = row.__dict__
+        return {field: values.get(field) for field in fields}
+
+    return row_to_dict
+
+
+_personal_info_to_dict = _section_getter(PersonalInfo)
+_skills_to_dict = _section_getter(SkillSet)
+_experience_to_dict = _section_getter(Experience)
+_project_to_dict = _section_getter(Project)
+_education_to_dict = _section_getter(Education)
+
+
+def trusted_resume_to_dict(db_resume) -> Dict[str, Any]:
+    """
+    Convert a SQLAlchemy Resume object to the same dictionary as db_resume_to_dict, without validation.
+    Only for fully loaded rows from the app's own tables (see RESUME_GRAPH_OPTIONS); an unloaded column would
+    read as None. Inbound data must still go through the Pydantic models.
+    """
+    personal_info = db_resume.personal_info
+    skills = db_resume.skills
+    return {
+        "personal_info": _personal_info_to_dict(personal_info) if personal_info is not None else None,
+        "skills": _skills_to_dict(skills) if skills is not None else None,
+        "experience": [_experience_to_dict(item) for item in db_resume.experience],
+        "projects": [_project_to_dict(item) for item in db_resume.projects],
+        "education": [_education_to_dict(item) for item in db_resume.education],
+        "id": db_resume.id,
+        "name": db_resume.name,
+    }
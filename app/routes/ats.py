@@ -1,65 +1,199 @@
-from fastapi import APIRouter, Depends, Form, HTTPException, Request, Response
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import APIRouter, Depends, Form, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from weasyprint import HTML
+from sqlalchemy.exc import NoResultFound
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.db import get_session
-from app.services.ats import optimize_resume
+from app.db import get_session, session_factory_for
+from app.models import BatchOptimizeRequest
+from app.services.ats import (
+    ATS_BATCH_MAX_JOBS,
+    ATS_OPTIMIZE_BY_SECTION,
+    PromptBudgetExceeded,
+    get_optimized_resume_html,
+    optimize_resume,
+    optimize_resume_for_jobs,
+    save_optimized_resume,
+    stream_optimized_resume,
+)
 from app.services.config import get_pdf_page_margin
+from app.services.pdf import PinnedPdfResponse, build_pdf_document, prerender_pdf, render_pdf_file
 from app.services.resume import get_resume_by_id
+from app.utils.disconnect import (
+    ClientDisconnected,
+    cancel_on_disconnect,
+    record_cancelled,
+    record_completed,
+)
 
 ats_router = APIRouter(prefix="/api/resumes", tags=["ats"])
 templates = Jinja2Templates(directory="app/templates")
 
 
-HTML_TO_PDF_BASE = """
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>Resume</title>
-    <style>
-        @page {{
-            size: A4;
-            margin: {pdf_margin};
-        }}
-    </style>
-</head>
-<body>{html_content}</body>
-</html>
-"""
-
-
 @ats_router.get("/{resume_id}/optimize")
-async def get_optimized_resume(resume_id: int, request: Request, session: Session = Depends(get_session)):
+async def get_optimized_resume(
+    resume_id: int,
+    request: Request,
+    refresh: bool = Query(False, description="Ask the LLM again instead of reusing a cached result"),
+    by_section: bool = Query(ATS_OPTIMIZE_BY_SECTION, description="Optimize and cache each section separately"),
+    session: AsyncSession = Depends(get_session),
+):
     """Generate an ATS-optimized version of the specified resume"""
-    optimized_resume = await optimize_resume(session, resume_id)
+    try:
+        optimized_resume, truncated = await cancel_on_disconnect(
+            request, optimize_resume(session, resume_id, refresh=refresh, by_section=by_section), "optimize"
+        )
+    except ClientDisconnected:
+        return Response(status_code=499)  # Client closed request; nobody reads this
+    except PromptBudgetExceeded as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    result_id = await save_optimized_resume(session, resume_id, optimized_resume)
+    # Same document the download will build, so its render is already done or in flight when asked for
+    prerender_pdf(resume_id, build_pdf_document(optimized_resume, await get_pdf_page_margin(session)))
 
     return templates.TemplateResponse(
         "components/ats_preview.html",
         {
             "request": request,
             "optimized_resume": optimized_resume,
+            "result_id": result_id,
+            "job_description_truncated": truncated,
         },
     )
 
 
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _optimization_events(
+    session_factory: async_sessionmaker, resume_id: int, refresh: bool, by_section: bool
+) -> AsyncIterator[str]:
+    """Server-sent events for one optimization: "chunk" events carrying HTML as it is generated, then "done"
+    with the stored result's id, or "failed"."""
+    started_at = time.monotonic()
+    pieces = []
+    truncated = False
+    try:
+        async for html, truncated in stream_optimized_resume(
+            session_factory, resume_id, refresh=refresh, by_section=by_section
+        ):
+            pieces.append(html)
+            yield _sse_event("chunk", {"html": html})
+
+        optimized_resume = "".join(pieces)
+        async with session_factory() as session:
+            result_id = await save_optimized_resume(session, resume_id, optimized_resume)
+            pdf_margin = await get_pdf_page_margin(session)
+        prerender_pdf(resume_id, build_pdf_document(optimized_resume, pdf_margin))
+        record_completed("optimize_stream")
+        yield _sse_event("done", {"result_id": result_id, "job_description_truncated": truncated})
+    except (asyncio.CancelledError, GeneratorExit):
+        # The client closed the stream, and the response cancelled its generator with the LLM call in it
+        record_cancelled("optimize_stream", started_at)
+        raise
+    except Exception as e:
+        yield _sse_event("failed", {"detail": f"Optimization failed: {str(e)}"})
+
+
+@ats_router.get("/{resume_id}/optimize/stream")
+async def stream_optimized_resume_events(
+    resume_id: int,
+    refresh: bool = Query(False, description="Ask the LLM again instead of reusing a cached result"),
+    by_section: bool = Query(ATS_OPTIMIZE_BY_SECTION, description="Optimize and cache each section separately"),
+    session: AsyncSession = Depends(get_session),
+):
+    """Generate an ATS-optimized version of the specified resume, streamed as server-sent events while the
+    LLM writes it"""
+    try:
+        await get_resume_by_id(session, resume_id)
+    except NoResultFound:
+        raise HTTPException(status_code=404, detail=f"Resume with ID {resume_id} not found")
+
+    return StreamingResponse(
+        _optimization_events(session_factory_for(session), resume_id, refresh, by_section),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _batch_optimization_lines(
+    session_factory: async_sessionmaker, resume_id: int, batch: BatchOptimizeRequest
+) -> AsyncIterator[str]:
+    """One NDJSON line per job description, in the order they finish, each result stored as it arrives in a
+    session of its own, so none is held while the remaining jobs wait for the LLM"""
+    started_at = time.monotonic()
+    try:
+        async for index, result, truncated in optimize_resume_for_jobs(
+            session_factory, resume_id, batch.job_descriptions, refresh=batch.refresh
+        ):
+            if isinstance(result, Exception):
+                line = {"index": index, "error": f"Optimization failed: {str(result)}"}
+            else:
+                async with session_factory() as session:
+                    result_id = await save_optimized_resume(session, resume_id, result)
+                line = {
+                    "index": index,
+                    "result_id": result_id,
+                    "html": result,
+                    "job_description_truncated": truncated,
+                }
+            yield json.dumps(line) + "\n"
+        record_completed("optimize_batch")
+    except (asyncio.CancelledError, GeneratorExit):
+        record_cancelled("optimize_batch", started_at)
+        raise
+
+
+@ats_router.post("/{resume_id}/optimize/batch")
+async def batch_optimize_resume(
+    resume_id: int, batch: BatchOptimizeRequest, session: AsyncSession = Depends(get_session)
+):
+    """Optimize the resume for several job descriptions at once, streaming a JSON line per job as it
+    finishes"""
+    if not 1 <= len(batch.job_descriptions) <= ATS_BATCH_MAX_JOBS:
+        raise HTTPException(
+            status_code=422, detail=f"Between 1 and {ATS_BATCH_MAX_JOBS} job descriptions are required"
+        )
+    try:
+        await get_resume_by_id(session, resume_id)
+    except NoResultFound:
+        raise HTTPException(status_code=404, detail=f"Resume with ID {resume_id} not found")
+
+    return StreamingResponse(
+        _batch_optimization_lines(session_factory_for(session), resume_id, batch),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @ats_router.post("/{resume_id}/download-ats-pdf")
 async def download_ats_resume_pdf_from_html(
-    resume_id: int, html_content: str = Form(...), session: Session = Depends(get_session)
+    resume_id: int,
+    result_id: Optional[str] = Form(None),
+    html_content: Optional[str] = Form(None),
+    session: AsyncSession = Depends(get_session),
 ):
-    """Generate and download the ATS-optimized version of the resume as PDF from provided HTML."""
+    """Generate and download the ATS-optimized version of the resume as PDF, from a stored optimization
+    result or from provided HTML."""
+    if not result_id and not html_content:
+        raise HTTPException(status_code=422, detail="Either result_id or html_content is required")
     try:
         resume = await get_resume_by_id(session, resume_id)
+        if result_id:
+            html_content = await get_optimized_resume_html(session, resume_id, result_id)
         pdf_margin = await get_pdf_page_margin(session)
 
-        full_html = HTML_TO_PDF_BASE.format(html_content=html_content, pdf_margin=pdf_margin)
-        pdf_bytes = HTML(string=full_html).write_pdf()
+        full_html = build_pdf_document(html_content, pdf_margin)
+        pdf_path = await render_pdf_file(full_html)
 
-        return Response(
-            content=pdf_bytes,
-            media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment;filename=optimized_resume_{resume.name}.pdf"},
-        )
+        return PinnedPdfResponse(pdf_path, f"optimized_resume_{resume.name}.pdf")
+    except NoResultFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"PDF generation failed: {str(e)}")
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, Response, UploadFile
+from typing import Optional
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, Response, UploadFile
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.exc import NoResultFound
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import get_session
 from app.services.config import (
@@ -12,17 +14,29 @@ from app.services.config import (
     save_llm_settings,
     save_pdf_page_margin,
 )
-from app.services.pdf_import import import_resume_from_pdf
-from app.services.resume import delete_resume_by_id, get_all_resumes
+from app.services.pdf_import import extract_text_from_pdf, parse_resume_text, save_imported_resume
+from app.services.resume import RESUME_LIST_PAGE_SIZE, delete_resume_by_id, list_resumes
+from app.utils.disconnect import ClientDisconnected, cancel_on_disconnect
 
 config_router = APIRouter(prefix="/api/config", tags=["config"])
 templates = Jinja2Templates(directory="app/templates")
 
 
+def _resume_list_context(request: Request, page, sort: str, order: str, q: Optional[str]):
+    return {
+        "request": request,
+        "resumes": page["items"],
+        "next_cursor": page["next_cursor"],
+        "sort": sort,
+        "order": order,
+        "q": q or "",
+    }
+
+
 @config_router.get("")
-async def get_config_page(request: Request, session: Session = Depends(get_session)):
+async def get_config_page(request: Request, session: AsyncSession = Depends(get_session)):
     """Render the configuration page."""
-    resumes = await get_all_resumes(session)
+    page = await list_resumes(session)
     job_description, ats_prompt = await get_ats_settings(session)
     api_key, model = await get_llm_settings(session)
     pdf_margin = await get_pdf_page_margin(session)
@@ -30,8 +44,7 @@ async def get_config_page(request: Request, session: Session = Depends(get_sessi
     return templates.TemplateResponse(
         "config.html",
         {
-            "request": request,
-            "resumes": resumes,
+            **_resume_list_context(request, page, "updated_at", "desc", None),
             "ats_prompt": ats_prompt,
             "job_description": job_description,
             "api_key": api_key,
@@ -46,22 +59,49 @@ async def import_resume(
     request: Request,
     resume_name: str = Form(...),
     resume_file: UploadFile = File(...),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ):
     try:
-        file_content = await resume_file.read()
-        await import_resume_from_pdf(file_content, session, resume_name)
+        text = await extract_text_from_pdf(await resume_file.read())
+        # Only the LLM call is abandoned when the client leaves; a parsed resume is always stored whole
+        parsed_resume = await cancel_on_disconnect(request, parse_resume_text(session, text), "import")
+        await save_imported_resume(session, resume_name, parsed_resume)
 
-        resumes = await get_all_resumes(session)
+        page = await list_resumes(session)
         return templates.TemplateResponse(
-            "components/resume_list_items.html", {"request": request, "resumes": resumes}
+            "components/resume_list_items.html", _resume_list_context(request, page, "updated_at", "desc", None)
         )
+    except ClientDisconnected:
+        return Response(status_code=499)  # Client closed request; nobody reads this
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Import failed: {str(e)}")
 
 
+@config_router.get("/resumes")
+async def get_resume_list_page(
+    request: Request,
+    cursor: Optional[str] = Query(None),
+    sort: str = Query("updated_at"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    q: Optional[str] = Query(None),
+    limit: int = Query(RESUME_LIST_PAGE_SIZE, ge=1, le=200),
+    session: AsyncSession = Depends(get_session),
+):
+    """Render a page of the resume list. Without a cursor this is the whole list body for a new sort or
+    filter; with one it is the next batch of cards, swapped in place of the scroll sentinel."""
+    try:
+        page = await list_resumes(
+            session, limit=limit, cursor=cursor, sort=sort, descending=order == "desc", name_filter=q
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    template_name = "components/resume_list_page.html" if cursor else "components/resume_list_items.html"
+    return templates.TemplateResponse(template_name, _resume_list_context(request, page, sort, order, q))
+
+
 @config_router.delete("/resume/{resume_id}")
-async def delete_resume(resume_id: int, session: Session = Depends(get_session)):
+async def delete_resume(resume_id: int, session: AsyncSession = Depends(get_session)):
     """Delete a resume by ID if it's not the only one."""
     try:
         await delete_resume_by_id(session, resume_id)
@@ -75,7 +115,7 @@ async def save_ats_settings_endpoint(
     request: Request,
     job_description: str = Form(None),
     ats_prompt: str = Form(...),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ):
     """Save ATS optimization settings"""
     try:
@@ -94,7 +134,7 @@ async def save_llm_settings_endpoint(
     request: Request,
     api_key: str = Form(...),
     model: str = Form(...),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ):
     """Save LLM settings"""
     try:
@@ -110,7 +150,7 @@ async def save_llm_settings_endpoint(
 
 @config_router.post("/save-pdf-margin")
 async def save_pdf_margin_endpoint(
-    request: Request, margin: str = Form(...), session: Session = Depends(get_session)
+    request: Request, margin: str = Form(...), session: AsyncSession = Depends(get_session)
 ):
     """Save PDF margin setting"""
     try:
@@ -0,0 +1,28 @@
+from fastapi import APIRouter
+
+from app.services.ats import ats_prompt_stats, ats_rate_limit_stats
+from app.services.llm import llm_client_stats
+from app.services.llm_cache import llm_cache_stats
+from app.services.llm_flight import llm_flight_stats
+from app.services.pdf import pdf_cache_stats, pdf_pool_stats, pdf_prerender_stats
+from app.services.resume import resume_cache_stats
+from app.utils.disconnect import client_disconnect_stats
+
+metrics_router = APIRouter(prefix="/api/metrics", tags=["metrics"])
+
+
+@metrics_router.get("")
+async def get_metrics():
+    """Report in-process counters: PDF rendering, cache hit rates and LLM client, connection and answer reuse"""
+    return {
+        "pdf_pool": pdf_pool_stats(),
+        "pdf_cache": pdf_cache_stats(),
+        "pdf_prerender": pdf_prerender_stats(),
+        "resume_cache": resume_cache_stats(),
+        "llm": llm_client_stats(),
+        "llm_cache": llm_cache_stats(),
+        "llm_flight": llm_flight_stats(),
+        "llm_rate_limit": ats_rate_limit_stats(),
+        "ats_prompt": ats_prompt_stats(),
+        "client_disconnects": client_disconnect_stats(),
+    }
@@ -0,0 +1,45 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import NoResultFound
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import get_session, session_factory_for
+from app.services.pdf import PinnedPdfResponse, render_resume_pdf_file
+from app.services.pdf_export import stream_resume_pdfs_zip
+from app.services.resume import get_resume_by_id, get_resume_names
+
+pdf_router = APIRouter(prefix="/api/resumes", tags=["pdf"])
+
+
+@pdf_router.get("/{resume_id}/pdf")
+async def download_resume_pdf(resume_id: int, session: AsyncSession = Depends(get_session)):
+    """Download the standard (non-ATS) resume preview as PDF, rendered server-side."""
+    try:
+        resume = await get_resume_by_id(session, resume_id)
+        pdf_path = await render_resume_pdf_file(session, resume_id)
+    except NoResultFound:
+        raise HTTPException(status_code=404, detail=f"Resume with ID {resume_id} not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"PDF generation failed: {str(e)}")
+
+    return PinnedPdfResponse(pdf_path, f"resume_{resume.name}.pdf")
+
+
+@pdf_router.get("/export.zip")
+async def export_resume_pdfs(
+    ids: Optional[List[int]] = Query(None, description="Resume ids to export; every resume when omitted"),
+    session: AsyncSession = Depends(get_session),
+):
+    """Download the standard PDFs of many resumes as one ZIP archive, streamed as the PDFs are rendered."""
+    resumes = await get_resume_names(session, ids)
+    missing = sorted(set(ids or []) - set(resumes))
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Resumes not found: {', '.join(map(str, missing))}")
+
+    return StreamingResponse(
+        stream_resume_pdfs_zip(session_factory_for(session), resumes),
+        media_type="application/zip",
+        headers={"Content-Disposition": "attachment;filename=resumes.zip"},
+    )
@@ -1,96 +1,105 @@
 from fastapi import APIRouter, Depends, Form, HTTPException, Request, Response
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.exc import NoResultFound
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import get_session
+from app.models import BatchEditRequest
 from app.services.resume import (
     add_education,
     add_experience,
     add_project,
+    apply_field_edits,
     delete_education_by_id,
     delete_experience_by_id,
     delete_project_by_id,
     get_resume_by_id,
     get_resume_dict,
+    get_resume_revision,
+    get_resume_section,
     update_education_field,
     update_experience_field,
     update_personal_info,
     update_project_field,
     update_skills,
 )
+from app.utils.http_cache import etag_matches, not_modified, resume_etag, set_etag
 
 resume_router = APIRouter(prefix="/api/resumes", tags=["resume"])
 templates = Jinja2Templates(directory="app/templates")
 
 
+async def _render_section(
+    request: Request, session: AsyncSession, resume_id: int, section: str, template_name: str
+) -> Response:
+    """Render one editor tab, answering 304 when the browser already holds this revision of it"""
+    try:
+        if request.headers.get("if-none-match"):
+            revision = await get_resume_revision(session, resume_id)
+            etag = resume_etag(resume_id, revision, template_name)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+
+        resume_data = await get_resume_section(session, resume_id, section)
+        response = templates.TemplateResponse(template_name, {"request": request, "resume_data": resume_data})
+        return set_etag(response, resume_etag(resume_id, resume_data["revision"], template_name))
+    except NoResultFound:
+        raise HTTPException(status_code=404, detail=f"Resume with ID {resume_id} not found")
+
+
 @resume_router.get("/{resume_id}/section/personal")
-async def get_personal_section(request: Request, resume_id: int, session: Session = Depends(get_session)):
+async def get_personal_section(request: Request, resume_id: int, session: AsyncSession = Depends(get_session)):
     """Get the personal information section of a specific resume form"""
-    resume_data = await get_resume_dict(session, resume_id)
-    return templates.TemplateResponse(
-        "components/personal_form.html",
-        {"request": request, "resume_data": resume_data},
-    )
+    return await _render_section(request, session, resume_id, "personal_info", "components/personal_form.html")
 
 
 @resume_router.get("/{resume_id}/section/experience")
-async def get_experience_section(request: Request, resume_id: int, session: Session = Depends(get_session)):
+async def get_experience_section(request: Request, resume_id: int, session: AsyncSession = Depends(get_session)):
     """Get the experience section of a specific resume form"""
-    resume_data = await get_resume_dict(session, resume_id)
-    return templates.TemplateResponse(
-        "components/resume_form.html", {"request": request, "resume_data": resume_data}
-    )
+    return await _render_section(request, session, resume_id, "experience", "components/resume_form.html")
 
 
 @resume_router.get("/{resume_id}/section/skills")
-async def get_skills_section(request: Request, resume_id: int, session: Session = Depends(get_session)):
+async def get_skills_section(request: Request, resume_id: int, session: AsyncSession = Depends(get_session)):
     """Get the skills section of a specific resume form"""
-    resume_data = await get_resume_dict(session, resume_id)
-    return templates.TemplateResponse(
-        "components/skills_form.html", {"request": request, "resume_data": resume_data}
-    )
+    return await _render_section(request, session, resume_id, "skills", "components/skills_form.html")
 
 
 @resume_router.get("/{resume_id}/section/education")
-async def get_education_section(request: Request, resume_id: int, session: Session = Depends(get_session)):
+async def get_education_section(request: Request, resume_id: int, session: AsyncSession = Depends(get_session)):
     """Get the education section of a specific resume form"""
-    resume_data = await get_resume_dict(session, resume_id)
-    return templates.TemplateResponse(
-        "components/education_form.html",
-        {"request": request, "resume_data": resume_data},
-    )
+    return await _render_section(request, session, resume_id, "education", "components/education_form.html")
 
 
 @resume_router.get("/{resume_id}/section/projects")
-async def get_projects_section(request: Request, resume_id: int, session: Session = Depends(get_session)):
+async def get_projects_section(request: Request, resume_id: int, session: AsyncSession = Depends(get_session)):
     """Get the projects section of a specific resume form"""
-    resume_data = await get_resume_dict(session, resume_id)
-    return templates.TemplateResponse(
-        "components/projects_form.html",
-        {"request": request, "resume_data": resume_data},
-    )
+    return await _render_section(request, session, resume_id, "projects", "components/projects_form.html")
 
 
 @resume_router.get("/{resume_id}/preview")
-async def get_resume_preview(request: Request, resume_id: int, session: Session = Depends(get_session)):
+async def get_resume_preview(request: Request, resume_id: int, session: AsyncSession = Depends(get_session)):
     """Get the standard resume preview component."""
+    template_name = "components/resume_preview.html"
     try:
-        resume_data = await get_resume_dict(session, resume_id)
-        return templates.TemplateResponse(
-            "components/resume_preview.html", {"request": request, "resume_data": resume_data}
-        )
+        revision = await get_resume_revision(session, resume_id)
+        etag = resume_etag(resume_id, revision, template_name)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        resume_data = await get_resume_dict(session, resume_id, revision=revision)
+        response = templates.TemplateResponse(template_name, {"request": request, "resume_data": resume_data})
+        return set_etag(response, etag)
     except NoResultFound:
         raise HTTPException(status_code=404, detail=f"Resume with ID {resume_id} not found")
 
 
 @resume_router.patch("/{resume_id}/personal_info/{field}")
 async def update_personal_info_field(
-    resume_id: int, field: str, value: str = Form(...), session: Session = Depends(get_session)
+    resume_id: int, field: str, value: str = Form(...), session: AsyncSession = Depends(get_session)
 ):
     """Update a field in the personal info section"""
     try:
-        await get_resume_by_id(session, resume_id)
         await update_personal_info(session, resume_id, field, value)
         return {"value": value}
     except NoResultFound:
@@ -101,11 +110,10 @@ async def update_personal_info_field(
 
 @resume_router.patch("/{resume_id}/skills/{field}")
 async def update_skills_field_endpoint(
-    resume_id: int, field: str, value: str = Form(...), session: Session = Depends(get_session)
+    resume_id: int, field: str, value: str = Form(...), session: AsyncSession = Depends(get_session)
 ):
     """Update a skills field"""
     try:
-        await get_resume_by_id(session, resume_id)
         await update_skills(session, resume_id, field, value)
         return {"value": value}
     except NoResultFound:
@@ -120,17 +128,16 @@ async def update_education_field_endpoint(
     education_id: int,
     field: str,
     value: str = Form(...),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ):
     """Update a field in an education entry"""
     try:
-        await get_resume_by_id(session, resume_id)
         await update_education_field(session, resume_id, education_id, field, value)
         return {"value": value}
     except NoResultFound:
         raise HTTPException(status_code=404, detail="Resume or education entry not found")
-    except Exception:
-        raise HTTPException(status_code=500, detail="Database error: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 
 @resume_router.patch("/{resume_id}/experience/{experience_id}/{field}")
@@ -139,11 +146,10 @@ async def update_experience_field_endpoint(
     experience_id: int,
     field: str,
     value: str = Form(...),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ):
     """Update a field in an experience entry"""
     try:
-        await get_resume_by_id(session, resume_id)
         await update_experience_field(session, resume_id, experience_id, field, value)
         return {"value": value}
     except NoResultFound:
@@ -158,11 +164,10 @@ async def update_project_field_endpoint(
     project_id: int,
     field: str,
     value: str = Form(...),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ):
     """Update a field in a project entry"""
     try:
-        await get_resume_by_id(session, resume_id)
         await update_project_field(session, resume_id, project_id, field, value)
         return {"value": value}
     except NoResultFound:
@@ -171,8 +176,21 @@ async def update_project_field_endpoint(
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 
+@resume_router.patch("/{resume_id}/batch")
+async def batch_update_fields_endpoint(
+    resume_id: int, batch: BatchEditRequest, session: AsyncSession = Depends(get_session)
+):
+    """Apply many field edits across the resume sections in one transaction, with a result per edit"""
+    try:
+        results = await apply_field_edits(session, resume_id, batch.edits)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    updated = sum(1 for result in results if result["status"] == "updated")
+    return {"updated": updated, "results": results}
+
+
 @resume_router.post("/{resume_id}/education")
-async def add_education_endpoint(request: Request, resume_id: int, session: Session = Depends(get_session)):
+async def add_education_endpoint(request: Request, resume_id: int, session: AsyncSession = Depends(get_session)):
     """Add a new education entry to the resume"""
     try:
         await get_resume_by_id(session, resume_id)
@@ -187,7 +205,9 @@ async def add_education_endpoint(request: Request, resume_id: int, session: Sess
 
 
 @resume_router.delete("/{resume_id}/education/{education_id}")
-async def delete_education_endpoint(resume_id: int, education_id: int, session: Session = Depends(get_session)):
+async def delete_education_endpoint(
+    resume_id: int, education_id: int, session: AsyncSession = Depends(get_session)
+):
     """Delete an education entry from the resume by its ID."""
     try:
         await get_resume_by_id(session, resume_id)
@@ -198,7 +218,7 @@ async def delete_education_endpoint(resume_id: int, education_id: int, session:
 
 
 @resume_router.post("/{resume_id}/project")
-async def add_project_endpoint(request: Request, resume_id: int, session: Session = Depends(get_session)):
+async def add_project_endpoint(request: Request, resume_id: int, session: AsyncSession = Depends(get_session)):
     """Add a new project to the resume"""
     try:
         await get_resume_by_id(session, resume_id)  # Needed for template context
@@ -213,7 +233,7 @@ async def add_project_endpoint(request: Request, resume_id: int, session: Sessio
 
 
 @resume_router.delete("/{resume_id}/project/{project_id}")
-async def delete_project_endpoint(resume_id: int, project_id: int, session: Session = Depends(get_session)):
+async def delete_project_endpoint(resume_id: int, project_id: int, session: AsyncSession = Depends(get_session)):
     """Delete a project from the resume by its ID."""
     try:
         await get_resume_by_id(session, resume_id)
@@ -224,7 +244,7 @@ async def delete_project_endpoint(resume_id: int, project_id: int, session: Sess
 
 
 @resume_router.post("/{resume_id}/experience")
-async def add_experience_endpoint(request: Request, resume_id: int, session: Session = Depends(get_session)):
+async def add_experience_endpoint(request: Request, resume_id: int, session: AsyncSession = Depends(get_session)):
     """Add a new experience entry to the resume"""
     try:
         await get_resume_by_id(session, resume_id)
@@ -240,7 +260,9 @@ async def add_experience_endpoint(request: Request, resume_id: int, session: Ses
 
 
 @resume_router.delete("/{resume_id}/experience/{experience_id}")
-async def delete_experience_endpoint(resume_id: int, experience_id: int, session: Session = Depends(get_session)):
+async def delete_experience_endpoint(
+    resume_id: int, experience_id: int, session: AsyncSession = Depends(get_session)
+):
     """Delete an experience entry by its ID."""
     try:
         await get_resume_by_id(session, resume_id)
@@ -1,55 +1,521 @@
+import asyncio
+import contextlib
+import hashlib
 import json
-from typing import Any, Dict
+import logging
+import os
+import re
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 from dotenv import load_dotenv
 from llama_index.core.llms import ChatMessage, MessageRole
-from llama_index.llms.openai import OpenAI
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import NoResultFound
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.models import db_resume_to_dict
+from app.db import OptimizedResume, session_factory_for
 from app.services.config import get_ats_settings, get_llm_settings
-from app.services.resume import get_resume_by_id
+from app.services.llm import OPENAI_API_BASE, count_tokens, get_llm
+from app.services.llm_cache import get_cached_response, llm_cache_key
+from app.services.llm_flight import LLMCall, complete_once, stream_once
+from app.services.resume import get_resume_dict
+from app.utils.rate_limit import TokenRateLimiter
 
 load_dotenv()
 
+# Optimization results kept per resume; older ones are pruned when a new one is saved
+OPTIMIZED_RESULTS_PER_RESUME = int(os.getenv("OPTIMIZED_RESULTS_PER_RESUME", "20"))
+# Show optimization output in the browser as it is generated instead of all at once
+ATS_STREAMING_ENABLED = os.getenv("ATS_STREAMING_ENABLED", "0") == "1"
+# Batch optimization: job descriptions accepted per request, LLM calls in flight at once, and the LLM tokens
+# per minute all optimizations may use together (0 for no limit)
+ATS_BATCH_MAX_JOBS = int(os.getenv("ATS_BATCH_MAX_JOBS", "20"))
+ATS_BATCH_CONCURRENCY = int(os.getenv("ATS_BATCH_CONCURRENCY", "5"))
+ATS_TOKENS_PER_MINUTE = int(os.getenv("ATS_TOKENS_PER_MINUTE", "0"))
+# Optimize each resume section with its own LLM call, so unchanged sections are answered from the cache
+# (can be chosen per request too)
+ATS_OPTIMIZE_BY_SECTION = os.getenv("ATS_OPTIMIZE_BY_SECTION", "0") == "1"
+# Most prompt tokens (system prompt plus resume and job description) sent per optimization; the job
+# description of a longer prompt is cut to fit, the resume is always sent whole, and an optimization whose
+# resume leaves no room for the job description fails (0 for no limit)
+ATS_PROMPT_TOKEN_BUDGET = int(os.getenv("ATS_PROMPT_TOKEN_BUDGET", "0"))
 
-async def optimize_resume(session: Session, resume_id: int) -> str:
-    resume = await get_resume_by_id(session, resume_id)
-    resume_data = await db_resume_to_dict(resume)
+logger = logging.getLogger(__name__)
 
-    job_description, ats_prompt = await get_ats_settings(session)
-    api_key, model_name = await get_llm_settings(session)
 
-    user_message = await build_user_message(resume_data, job_description)
+ATS_TEMPERATURE = 0.1
+
+ats_token_limiter = TokenRateLimiter(ATS_TOKENS_PER_MINUTE)
+_prompt_stats = {"prompts": 0, "prompt_tokens": 0, "max_prompt_tokens": 0, "truncated": 0}
+
+# Internal keys that mean nothing to the LLM
+_PROMPT_OMITTED_KEYS = frozenset({"id", "resume_id"})
+# Resume sections in the prompt
+_PROMPT_SECTIONS = ("personal_info", "skills", "experience", "projects", "education")
+_TRUNCATION_MARK = " [truncated]"
+
+# Sections of the optimized document in order, with their headings; each experience entry is optimized on
+# its own, the other sections whole
+_DOCUMENT_SECTIONS = (
+    ("personal_info", None),
+    ("experience", "Experience"),
+    ("projects", "Projects"),
+    ("skills", "Skills"),
+    ("education", "Education"),
+)
+SECTION_INSTRUCTIONS = (
+    "You are given one section of the resume. Reply with only that section as an HTML fragment: no <html>, "
+    "<head> or <body>, no section heading, and nothing from other sections."
+)
+
+
+class PromptBudgetExceeded(Exception):
+    """The resume leaves no room for the job description within ATS_PROMPT_TOKEN_BUDGET"""
+
+
+def _estimate_call_tokens(prompt_tokens: int) -> int:
+    """Rough token cost of an optimization call: the prompt, plus as much again for the completion, which
+    rewrites the resume at about the same length"""
+    return prompt_tokens * 2
 
-    llm = OpenAI(api_key=api_key, model=model_name, temperature=0.1)
+
+def _chat_call(
+    llm: Any, messages: List[ChatMessage], truncated: bool, semaphore: Optional[asyncio.Semaphore] = None
+) -> LLMCall:
+    """The LLM call for messages, within the token rate limit and, if given, a slot of semaphore. The prompt
+    is added to the prompt stats when the call is made."""
+
+    async def call(emit: Callable[[str], None]) -> None:
+        async with semaphore or contextlib.nullcontext():
+            prompt_tokens = _record_prompt(messages, truncated)
+            await ats_token_limiter.acquire(_estimate_call_tokens(prompt_tokens))
+            response = await llm.achat(messages)
+        emit(response.message.content)
+
+    return call
+
+
+async def _build_optimization(
+    session: AsyncSession, resume_id: int, job_description: Optional[str] = None
+) -> Tuple[str, str, List[ChatMessage], str, bool]:
+    """Gather what an optimization needs: the API key, model, chat messages, the completion's cache key and
+    whether the prompt was truncated. The configured job description is used unless one is given."""
+    resume_data = await get_resume_dict(session, resume_id)
+
+    configured_job_description, ats_prompt = await get_ats_settings(session)
+    job_description = configured_job_description if job_description is None else job_description
+    api_key, model_name = await get_llm_settings(session)
+
+    user_message, truncated = await _fit_user_message(ats_prompt, resume_data, job_description)
 
     messages = [ChatMessage(ats_prompt, role=MessageRole.SYSTEM), ChatMessage(user_message, role=MessageRole.USER)]
-    response = await llm.achat(messages)
+    cache_key = llm_cache_key(OPENAI_API_BASE, model_name, ATS_TEMPERATURE, ats_prompt, user_message)
+    return api_key, model_name, messages, cache_key, truncated
+
+
+async def optimize_resume(
+    session: AsyncSession, resume_id: int, refresh: bool = False, by_section: bool = False
+) -> Tuple[str, bool]:
+    """Optimize a resume for the configured job description, returning the HTML and whether the job
+    description was cut to fit ATS_PROMPT_TOKEN_BUDGET.
 
-    ats_resume_data_html = response.message.content
+    Completions are cached on everything that determines them, so re-optimizing an unchanged resume for
+    the same job answers from the cache; refresh=True asks the LLM again and replaces the cached answer.
+    With by_section=True each section is optimized and cached on its own (see _optimize_sections()).
+    """
+    if by_section:
+        model_name, plan, truncated = await _plan_sections(session, resume_id, refresh)
+        sections = _optimize_sections(session_factory_for(session), model_name, plan)
+        return "".join([html async for html in sections]), truncated
+
+    api_key, model_name, messages, cache_key, truncated = await _build_optimization(session, resume_id)
+
+    ats_resume_data_html = None if refresh else await get_cached_response(session, cache_key)
+    if ats_resume_data_html is None:
+        llm = get_llm(api_key, model_name, temperature=ATS_TEMPERATURE)
+        # Identical optimizations already running (a double click, a second tab) share this call
+        ats_resume_data_html = await complete_once(
+            session_factory_for(session), cache_key, model_name, _chat_call(llm, messages, truncated)
+        )
 
     clean_ats_resume_data_html = _parse_llm_response(ats_resume_data_html)
-    return clean_ats_resume_data_html
+    return clean_ats_resume_data_html, truncated
+
+
+async def stream_optimized_resume(
+    session_factory: async_sessionmaker, resume_id: int, refresh: bool = False, by_section: bool = False
+) -> AsyncIterator[Tuple[str, bool]]:
+    """Optimize a resume like optimize_resume(), yielding the cleaned HTML in pieces as the LLM writes it,
+    each with whether the job description was cut to fit the prompt.
+
+    The pieces join up to exactly what optimize_resume() returns, and the finished completion is cached the
+    same way. A cache hit is yielded as a single piece; a request identical to one already streaming follows
+    that one's output. Sessions are opened from session_factory only around the database work, so none is
+    held while the LLM is generating. By section, each section is yielded whole as soon as it and the ones
+    before it are done.
+    """
+    if by_section:
+        async with session_factory() as session:
+            model_name, plan, truncated = await _plan_sections(session, resume_id, refresh)
+        async for html in _optimize_sections(session_factory, model_name, plan):
+            yield html, truncated
+        return
+
+    async with session_factory() as session:
+        api_key, model_name, messages, cache_key, truncated = await _build_optimization(session, resume_id)
+        cached = None if refresh else await get_cached_response(session, cache_key)
+    if cached is not None:
+        yield _parse_llm_response(cached), truncated
+        return
+
+    llm = get_llm(api_key, model_name, temperature=ATS_TEMPERATURE)
+
+    async def stream_call(emit: Callable[[str], None]) -> None:
+        prompt_tokens = _record_prompt(messages, truncated)
+        await ats_token_limiter.acquire(_estimate_call_tokens(prompt_tokens))
+        async for response in await llm.astream_chat(messages):
+            emit(response.delta or "")
+
+    stripper = HtmlFenceStripper()
+    async for piece in stream_once(session_factory, cache_key, model_name, stream_call):
+        html = stripper.feed(piece)
+        if html:
+            yield html, truncated
+    html = stripper.flush()
+    if html:
+        yield html, truncated
+
+
+def _section_groups(resume_data: Dict[str, Any]) -> List[Tuple[str, Optional[str], List[Any]]]:
+    """(section, heading, contents) of the non-empty sections in document order; each content is one LLM call"""
+    groups = []
+    for section, heading in _DOCUMENT_SECTIONS:
+        content = _compact(resume_data.get(section))
+        if content:
+            groups.append((section, heading, content if section == "experience" else [content]))
+    return groups
+
+
+def _fit_section_message(system_tokens: int, section: str, content: Any, job_description: str) -> Tuple[str, bool]:
+    """User message optimizing one section, with the job description cut to keep within the token budget, and
+    whether it was cut. Raises PromptBudgetExceeded when the section leaves no room for the job description."""
+
+    def build(job: str) -> str:
+        section_json = json.dumps(content, ensure_ascii=False, separators=(",", ":"))
+        return (
+            "Optimize this section of my resume for ATS systems and this job.\n"
+            f"#{section} {section_json}\n#job_description\n{job}\n"
+        )
+
+    user_message = build(job_description)
+    user_tokens = count_tokens(user_message)
+    truncated = ATS_PROMPT_TOKEN_BUDGET > 0 and system_tokens + user_tokens > ATS_PROMPT_TOKEN_BUDGET
+    if truncated:
+        other_tokens = system_tokens + count_tokens(build(""))
+        user_message = build(_fit_job_description(job_description, other_tokens, f"{section} section"))
+    return user_message, truncated
+
+
+# Per section group: its heading and, per LLM call, the cached completion or the cache key and call to make
+_SectionPlan = List[Tuple[Optional[str], List[Union[str, Tuple[str, LLMCall]]]]]
+
+
+async def _plan_sections(
+    session: AsyncSession, resume_id: int, refresh: bool = False
+) -> Tuple[str, _SectionPlan, bool]:
+    """Read what optimizing a resume by section needs, and the sections already cached: the model name, the
+    plan for _optimize_sections() and whether any section's prompt cut the job description. Only reads, so
+    the session can be closed before any LLM call."""
+    resume_data = await get_resume_dict(session, resume_id)
+    job_description, ats_prompt = await get_ats_settings(session)
+    api_key, model_name = await get_llm_settings(session)
+    llm = get_llm(api_key, model_name, temperature=ATS_TEMPERATURE)
+    system_prompt = f"{ats_prompt}\n\n{SECTION_INSTRUCTIONS}"
+    system_tokens = count_tokens(system_prompt)
+    semaphore = asyncio.Semaphore(max(1, ATS_BATCH_CONCURRENCY))
+
+    plan: _SectionPlan = []
+    any_truncated = False
+    for section, heading, contents in _section_groups(resume_data):
+        calls: List[Union[str, Tuple[str, LLMCall]]] = []
+        for content in contents:
+            user_message, truncated = _fit_section_message(system_tokens, section, content, job_description)
+            any_truncated = any_truncated or truncated
+            cache_key = llm_cache_key(OPENAI_API_BASE, model_name, ATS_TEMPERATURE, system_prompt, user_message)
+            cached = None if refresh else await get_cached_response(session, cache_key)
+            if cached is None:
+                messages = [
+                    ChatMessage(system_prompt, role=MessageRole.SYSTEM),
+                    ChatMessage(user_message, role=MessageRole.USER),
+                ]
+                calls.append((cache_key, _chat_call(llm, messages, truncated, semaphore)))
+            else:
+                calls.append(cached)
+        plan.append((heading, calls))
+    return model_name, plan, any_truncated
+
+
+async def _optimize_sections(
+    session_factory: async_sessionmaker, model_name: str, plan: _SectionPlan
+) -> AsyncIterator[str]:
+    """Optimize a resume section by section, yielding each section's HTML in document order.
+
+    Every section, and every experience entry, is its own LLM call cached on its content and the job
+    description, so after a small edit only the changed part goes to the LLM. Calls for the sections
+    missing from the cache (see _plan_sections()) run concurrently, up to ATS_BATCH_CONCURRENCY at once, and
+    the results are stitched together under the section headings. Sessions are opened from session_factory
+    only to store completions.
+    """
+    # Per group: heading and, per call, the cached completion or the task producing it
+    groups: List[Tuple[Optional[str], List[Union[str, asyncio.Task]]]] = []
+    tasks: List[asyncio.Task] = []
+    try:
+        for heading, calls in plan:
+            completions: List[Union[str, asyncio.Task]] = []
+            for call in calls:
+                if isinstance(call, tuple):
+                    cache_key, chat_call = call
+                    task = asyncio.create_task(complete_once(session_factory, cache_key, model_name, chat_call))
+                    tasks.append(task)
+                    completions.append(task)
+                else:
+                    completions.append(call)
+            groups.append((heading, completions))
+
+        for heading, completions in groups:
+            html = ['<section class="ats-section">']
+            if heading:
+                html.append(f"<h2>{heading}</h2>")
+            for completion in completions:
+                if isinstance(completion, asyncio.Task):
+                    completion = await completion
+                html.append(_parse_llm_response(completion))
+            html.append("</section>")
+            yield "\n".join(html) + "\n"
+    finally:
+        # Failed, or nobody is listening anymore: stop the calls still running
+        for task in tasks:
+            task.cancel()
+
+
+async def optimize_resume_for_jobs(
+    session_factory: async_sessionmaker,
+    resume_id: int,
+    job_descriptions: Sequence[str],
+    refresh: bool = False,
+    concurrency: int = ATS_BATCH_CONCURRENCY,
+) -> AsyncIterator[Tuple[int, Union[str, Exception], bool]]:
+    """Optimize a resume for each job description, yielding (index, html, job description truncated) as each
+    one finishes.
+
+    Up to `concurrency` LLM calls run at once, within the shared token rate limit, and cached completions
+    are answered without taking a slot. A job that fails yields its exception instead of ending the batch.
+    Each job uses its own sessions from session_factory, none of them held while the LLM is generating.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def optimize(index: int, job_description: str) -> Tuple[int, Union[str, Exception], bool]:
+        truncated = False
+        try:
+            async with session_factory() as session:
+                api_key, model_name, messages, cache_key, truncated = await _build_optimization(
+                    session, resume_id, job_description
+                )
+                content = None if refresh else await get_cached_response(session, cache_key)
+            if content is None:
+                llm = get_llm(api_key, model_name, temperature=ATS_TEMPERATURE)
+                call = _chat_call(llm, messages, truncated, semaphore)
+                content = await complete_once(session_factory, cache_key, model_name, call)
+            return index, _parse_llm_response(content), truncated
+        except Exception as e:
+            return index, e, truncated
+
+    tasks = [asyncio.create_task(optimize(index, job)) for index, job in enumerate(job_descriptions)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # The client went away, or the consumer failed: stop the calls nobody will collect
+        for task in tasks:
+            task.cancel()
+
+
+def ats_rate_limit_stats() -> Dict[str, Any]:
+    return ats_token_limiter.stats()
+
+
+def _compact(value: Any) -> Any:
+    """Drop internal ids and empty values, which cost tokens and carry nothing for the LLM"""
+    if isinstance(value, dict):
+        items = ((key, _compact(item)) for key, item in value.items() if key not in _PROMPT_OMITTED_KEYS)
+        return {key: item for key, item in items if item not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [item for item in map(_compact, value) if item not in (None, "", [], {})]
+    return value
 
 
 async def build_user_message(resume_data: Dict[str, Any], job_description: str) -> str:
-    """Create a simple user message with resume data and job description"""
-    resume_json = json.dumps(resume_data, indent=2)
+    """Create the user message with resume data and job description.
+
+    Each resume section is one marker line of minified JSON, without internal ids or empty fields, which
+    takes about half the tokens of indented JSON.
+    """
+    lines = ["Optimize my resume for ATS systems based on this data and job. Reply in HTML I can use directly."]
+    for section in _PROMPT_SECTIONS:
+        content = _compact(resume_data.get(section))
+        if content:
+            lines.append(f"#{section} {json.dumps(content, ensure_ascii=False, separators=(',', ':'))}")
+    lines.append("#job_description")
+    lines.append(job_description)
+    return "\n".join(lines) + "\n"
+
 
-    user_message = f"""Please optimize my resume for ATS systems based on the following data:
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens tokens, marking that it was cut; empty when not even the mark fits"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    budget = max_tokens - count_tokens(_TRUNCATION_MARK)
+    if budget <= 0:
+        return ""
+    cut = len(text) * budget // count_tokens(text)
+    while cut > 0 and count_tokens(text[:cut]) > budget:
+        cut = cut * 9 // 10
+    return text[:cut].rstrip() + _TRUNCATION_MARK if cut > 0 else ""
 
-## RESUME DATA:
-{resume_json}
 
-## JOB DESCRIPTION:
-{job_description}
+async def _fit_user_message(
+    ats_prompt: str, resume_data: Dict[str, Any], job_description: str
+) -> Tuple[str, bool]:
+    """Build the user message within ATS_PROMPT_TOKEN_BUDGET together with the system prompt, and tell whether
+    it had to be cut.
+
+    Only the job description is cut, as it only guides the rewrite: the resume is always sent whole, so the
+    optimized resume keeps every entry. Raises PromptBudgetExceeded when the resume leaves no room for the
+    job description.
+    """
+    system_tokens = count_tokens(ats_prompt)
+    user_message = await build_user_message(resume_data, job_description)
+    budget = ATS_PROMPT_TOKEN_BUDGET
+    truncated = budget > 0 and system_tokens + count_tokens(user_message) > budget
+    if truncated:
+        resume_tokens = count_tokens(await build_user_message(resume_data, ""))
+        job_description = _fit_job_description(job_description, system_tokens + resume_tokens, "resume")
+        user_message = await build_user_message(resume_data, job_description)
+    return user_message, truncated
 
-Please format the optimized resume in HTML format that I can directly use.
-"""
-    return user_message
+
+def _fit_job_description(job_description: str, other_tokens: int, what: str) -> str:
+    """Cut the job description to the budget left by the rest of the prompt. Raises PromptBudgetExceeded when
+    none of it fits, rather than tailoring the resume to an empty job."""
+    fitted = _truncate_to_tokens(job_description, ATS_PROMPT_TOKEN_BUDGET - other_tokens)
+    if not fitted:
+        raise PromptBudgetExceeded(
+            f"The {what} is too long for the prompt token budget of {ATS_PROMPT_TOKEN_BUDGET}: with the system "
+            f"prompt it takes {other_tokens} tokens, leaving no room for the job description"
+        )
+    return fitted
+
+
+def _record_prompt(messages: List[ChatMessage], truncated: bool) -> int:
+    """Log the size of a prompt being sent to the LLM, add it to the prompt stats and return its tokens"""
+    system_tokens = count_tokens(messages[0].content or "")
+    user_tokens = sum(count_tokens(message.content or "") for message in messages[1:])
+    prompt_tokens = system_tokens + user_tokens
+    _prompt_stats["prompts"] += 1
+    _prompt_stats["prompt_tokens"] += prompt_tokens
+    _prompt_stats["max_prompt_tokens"] = max(_prompt_stats["max_prompt_tokens"], prompt_tokens)
+    _prompt_stats["truncated"] += truncated
+    logger.info(
+        "ATS prompt: %d tokens (system %d, user %d)%s",
+        prompt_tokens,
+        system_tokens,
+        user_tokens,
+        f", truncated to the {ATS_PROMPT_TOKEN_BUDGET} token budget" if truncated else "",
+    )
+    return prompt_tokens
+
+
+def ats_prompt_stats() -> Dict[str, Any]:
+    prompts = _prompt_stats["prompts"]
+    return {
+        **_prompt_stats,
+        "mean_prompt_tokens": round(_prompt_stats["prompt_tokens"] / prompts) if prompts else 0,
+        "token_budget": ATS_PROMPT_TOKEN_BUDGET,
+    }
 
 
 def _parse_llm_response(content: str) -> str:
     content = content.replace("```html", "").replace("```", "")
     return content
+
+
+# A run of backticks at the end of the text, possibly followed by the start of "html": a code fence the next
+# piece of a stream may complete
+_OPEN_FENCE_TAIL = re.compile(r"`+(?:h(?:t(?:ml?)?)?)?\Z")
+
+
+class HtmlFenceStripper:
+    """Applies _parse_llm_response() to text arriving in pieces.
+
+    Text that could still turn out to be part of a code fence is held back until the next piece (or flush())
+    settles it, so the output joins up to the same result as parsing the whole text at once.
+    """
+
+    def __init__(self):
+        self._pending = ""
+
+    def feed(self, piece: str) -> str:
+        text = self._pending + piece
+        tail = _OPEN_FENCE_TAIL.search(text)
+        cut = tail.start() if tail else len(text)
+        self._pending = text[cut:]
+        return _parse_llm_response(text[:cut])
+
+    def flush(self) -> str:
+        text, self._pending = self._pending, ""
+        return _parse_llm_response(text)
+
+
+async def save_optimized_resume(session: AsyncSession, resume_id: int, html: str) -> str:
+    """Store an optimization result of a resume and return its id, the SHA-256 of the HTML.
+
+    Results are stored per resume. Saving HTML that is already stored for the resume only refreshes its
+    timestamp, so repeated identical results take one row. Only the newest OPTIMIZED_RESULTS_PER_RESUME
+    results of a resume are kept.
+    """
+    result_id = hashlib.sha256(html.encode("utf-8")).hexdigest()
+    now = datetime.now()
+    stmt = insert(OptimizedResume).values(
+        id=result_id, resume_id=resume_id, html=zlib.compress(html.encode("utf-8")), created_at=now
+    )
+    await session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[OptimizedResume.resume_id, OptimizedResume.id], set_={"created_at": now}
+        )
+    )
+
+    newest = (
+        select(OptimizedResume.id)
+        .where(OptimizedResume.resume_id == resume_id)
+        .order_by(OptimizedResume.created_at.desc())
+        .limit(OPTIMIZED_RESULTS_PER_RESUME)
+    )
+    await session.execute(
+        delete(OptimizedResume).where(OptimizedResume.resume_id == resume_id, OptimizedResume.id.not_in(newest))
+    )
+    await session.commit()
+    return result_id
+
+
+async def get_optimized_resume_html(session: AsyncSession, resume_id: int, result_id: str) -> str:
+    """Get the HTML of a stored optimization result of a resume"""
+    result = await session.execute(
+        select(OptimizedResume.html).where(OptimizedResume.resume_id == resume_id, OptimizedResume.id == result_id)
+    )
+    compressed = result.scalar_one_or_none()
+    if compressed is None:
+        raise NoResultFound(f"Optimization result {result_id} not found for resume {resume_id}")
+    return zlib.decompress(compressed).decode("utf-8")
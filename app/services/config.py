@@ -1,9 +1,12 @@
 import os
-from typing import Optional
+import time
+from typing import Dict, Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy import Integer, cast, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import Config
+from app.services.llm import invalidate_llm_clients
 
 # Constants for config keys
 JOB_DESCRIPTION_KEY = "job_description"
@@ -14,6 +17,16 @@ PDF_PAGE_MARGIN_KEY = "pdf_page_margin"
 
 DEFAULT_PDF_PAGE_MARGIN = "10mm"
 
+# Process-local copy of the config table. Every write bumps a generation row in the same transaction;
+# readers compare it with the cached generation at most once per CONFIG_CACHE_CHECK_INTERVAL seconds,
+# so writes made by other workers are picked up without a query per request.
+CONFIG_GENERATION_KEY = "_config_generation"
+CONFIG_CACHE_CHECK_INTERVAL = float(os.getenv("CONFIG_CACHE_CHECK_INTERVAL", "2"))
+
+_config_cache: Optional[Dict[str, Optional[str]]] = None
+_config_generation = 0
+_config_checked_at = 0.0
+
 
 async def get_default_ats_prompt() -> str:
     """Get the default ATS prompt template"""
@@ -47,29 +60,81 @@ CSS STYLES MUST BE INLINE
 """
 
 
-async def get_config_value(session: Session, key: str, default: Optional[str]) -> str:
+def clear_config_cache() -> None:
+    """Drop the cached config so the next read reloads it from the database"""
+    global _config_cache
+    _config_cache = None
+
+
+async def _get_config_cache(session: AsyncSession) -> Dict[str, Optional[str]]:
+    """Return the cached config, reloading it when another writer has bumped the generation"""
+    global _config_cache, _config_generation, _config_checked_at
+    now = time.monotonic()
+    if _config_cache is not None:
+        if now - _config_checked_at < CONFIG_CACHE_CHECK_INTERVAL:
+            return _config_cache
+        result = await session.execute(select(Config.value).where(Config.key == CONFIG_GENERATION_KEY))
+        _config_checked_at = now
+        if int(result.scalar() or 0) == _config_generation:
+            return _config_cache
+
+    result = await session.execute(select(Config.key, Config.value))
+    cache = dict(result.all())
+    _config_generation = int(cache.pop(CONFIG_GENERATION_KEY, None) or 0)
+    _config_cache = cache
+    _config_checked_at = now
+    return cache
+
+
+async def _bump_config_generation(session: AsyncSession) -> int:
+    """Increment the generation row inside the current transaction and return its new value"""
+    result = await session.execute(
+        update(Config)
+        .where(Config.key == CONFIG_GENERATION_KEY)
+        .values(value=cast(Config.value, Integer) + 1)
+        .returning(Config.value)
+        .execution_options(synchronize_session=False)
+    )
+    generation = result.scalar()
+    if generation is None:
+        session.add(Config(key=CONFIG_GENERATION_KEY, value="1", description="Config cache generation"))
+        return 1
+    return int(generation)
+
+
+async def get_config_value(session: AsyncSession, key: str, default: Optional[str]) -> str:
     """Get a configuration value by key"""
-    config_entry = session.query(Config).filter(Config.key == key).first()
-    if config_entry:
-        if value := str(config_entry.value):
+    config = await _get_config_cache(session)
+    if key in config:
+        if value := str(config[key]):
             return value
     return default
 
 
 async def set_config_value(
-    session: Session, key: str, value: Optional[str], description: Optional[str] = None
+    session: AsyncSession, key: str, value: Optional[str], description: Optional[str] = None
 ) -> None:
     """Set a configuration value by key"""
-    config_entry = session.query(Config).filter(Config.key == key).first()
+    result = await session.execute(select(Config).where(Config.key == key))
+    config_entry = result.scalars().first()
     if config_entry:
         config_entry.value = value
     else:
         config_entry = Config(key=key, value=value, description=description)
         session.add(config_entry)
-    session.commit()
+    generation = await _bump_config_generation(session)
+    await session.commit()
+
+    # Write through only if nobody else wrote since our last load; otherwise reload on the next read
+    global _config_generation
+    if _config_cache is not None and generation == _config_generation + 1:
+        _config_cache[key] = value
+        _config_generation = generation
+    else:
+        clear_config_cache()
 
 
-async def get_ats_settings(session: Session) -> (str, str):
+async def get_ats_settings(session: AsyncSession) -> (str, str):
     """Get ATS optimization settings"""
     default_ats_prompt = await get_default_ats_prompt()
     ats_prompt = await get_config_value(session, ATS_PROMPT_KEY, default_ats_prompt)
@@ -77,30 +142,31 @@ async def get_ats_settings(session: Session) -> (str, str):
     return job_description, ats_prompt
 
 
-async def save_ats_settings(session: Session, job_description: Optional[str], ats_prompt: str) -> None:
+async def save_ats_settings(session: AsyncSession, job_description: Optional[str], ats_prompt: str) -> None:
     """Save ATS optimization settings"""
     await set_config_value(session, JOB_DESCRIPTION_KEY, job_description, "Job description for ATS optimization")
     await set_config_value(session, ATS_PROMPT_KEY, ats_prompt, "Custom ATS optimization prompt")
 
 
-async def get_llm_settings(session: Session) -> tuple[str, str]:
+async def get_llm_settings(session: AsyncSession) -> tuple[str, str]:
     """Get LLM settings (API key and model)"""
     api_key = await get_config_value(session, OPENAI_API_KEY_KEY, os.getenv("OPENAI_API_KEY", ""))
     model = await get_config_value(session, OPENAI_MODEL_KEY, os.getenv("OPENAI_LLM_MODEL", "gpt-3.5-turbo"))
     return api_key, model
 
 
-async def save_llm_settings(session: Session, api_key: str, model: str) -> None:
+async def save_llm_settings(session: AsyncSession, api_key: str, model: str) -> None:
     """Save LLM settings"""
     await set_config_value(session, OPENAI_API_KEY_KEY, api_key, "OpenAI API Key for LLM integration")
     await set_config_value(session, OPENAI_MODEL_KEY, model, "OpenAI model for resume optimization")
+    invalidate_llm_clients()
 
 
-async def get_pdf_page_margin(session: Session) -> str:
+async def get_pdf_page_margin(session: AsyncSession) -> str:
     """Get PDF page margin setting"""
     return await get_config_value(session, PDF_PAGE_MARGIN_KEY, DEFAULT_PDF_PAGE_MARGIN)
 
 
-async def save_pdf_page_margin(session: Session, margin: str) -> None:
+async def save_pdf_page_margin(session: AsyncSession, margin: str) -> None:
     """Save PDF page margin setting"""
     await set_config_value(session, PDF_PAGE_MARGIN_KEY, margin, "Margin for PDF exports")
@@ -0,0 +1,139 @@
+import os
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import httpx
+from llama_index.llms.openai import OpenAI
+
+from app.utils.lru import LRUCache
+
+# Optional OpenAI-compatible endpoint; the OpenAI default when unset
+OPENAI_API_BASE = os.getenv("OPENAI_API_BASE") or None
+# Configured LLM clients kept for reuse, keyed by (api_key, model, base_url, temperature)
+LLM_CLIENT_CACHE_SIZE = int(os.getenv("LLM_CLIENT_CACHE_SIZE", "16"))
+DEFAULT_TEMPERATURE = 0.1
+
+
+class _ConnectionStats:
+    """Counts requests and the TCP connections and TLS handshakes they needed, via httpcore's trace hook"""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+
+    async def on_request(self, request: httpx.Request) -> None:
+        self.requests += 1
+        request.extensions["trace"] = self._trace
+
+    async def _trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+        elif event_name == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+
+    def stats(self) -> Dict[str, Any]:
+        reused = max(0, self.requests - self.connections_opened)
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "tls_handshakes": self.tls_handshakes,
+            "connection_reuse_rate": round(reused / self.requests, 3) if self.requests else 0.0,
+        }
+
+
+class LLMClientRegistry:
+    """Reuses configured LLM clients across requests.
+
+    All clients share one HTTP connection pool, so connections and TLS sessions to the API survive from
+    one request to the next, even across models and API keys. Clients for credentials that are no longer
+    configured are dropped by invalidate().
+    """
+
+    def __init__(self, maxsize: int):
+        self._clients = LRUCache(maxsize)
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._connection_stats = _ConnectionStats()
+        self.invalidations = 0
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(60.0, connect=10.0),
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60),
+                event_hooks={"request": [self._connection_stats.on_request]},
+            )
+        return self._http_client
+
+    def get(
+        self,
+        api_key: str,
+        model: str,
+        base_url: Optional[str] = OPENAI_API_BASE,
+        temperature: float = DEFAULT_TEMPERATURE,
+    ) -> OpenAI:
+        key = (api_key, model, base_url, temperature)
+        llm = self._clients.get(key)
+        if llm is None:
+            llm = OpenAI(
+                api_key=api_key,
+                model=model,
+                api_base=base_url,
+                temperature=temperature,
+                async_http_client=self._get_http_client(),
+            )
+            self._clients.set(key, llm)
+        return llm
+
+    def invalidate(self) -> None:
+        self._clients.clear()
+        self.invalidations += 1
+
+    async def aclose(self) -> None:
+        self._clients.clear()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clients": self._clients.stats(),
+            "invalidations": self.invalidations,
+            "http": self._connection_stats.stats(),
+        }
+
+
+llm_clients = LLMClientRegistry(LLM_CLIENT_CACHE_SIZE)
+
+
+# Tokenizer's encode function once loaded, or False when it could not be
+_tokenizer: Union[Callable[[str], List[int]], bool, None] = None
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in text by the OpenAI tokenizer bundled with llama-index, or an estimate of one
+    per 4 characters when the tokenizer is unavailable"""
+    global _tokenizer
+    if _tokenizer is None:
+        try:
+            from llama_index.core.utils import get_tokenizer
+
+            _tokenizer = get_tokenizer()
+        except Exception:
+            _tokenizer = False
+    if _tokenizer is False:
+        return (len(text) + 3) // 4
+    return len(_tokenizer(text))
+
+
+def get_llm(api_key: str, model: str, temperature: float = DEFAULT_TEMPERATURE) -> OpenAI:
+    """Get the shared LLM client for these settings, creating it on first use"""
+    return llm_clients.get(api_key, model, temperature=temperature)
+
+
+def invalidate_llm_clients() -> None:
+    """Drop cached LLM clients, e.g. after the configured credentials change"""
+    llm_clients.invalidate()
+
+
+def llm_client_stats() -> Dict[str, Any]:
+    return llm_clients.stats()
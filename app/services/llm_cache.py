@@ -0,0 +1,150 @@
+import hashlib
+import json
+import logging
+import os
+import weakref
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import LLMResponseCache, session_factory_for
+
+# Cached completions expire after LLM_CACHE_TTL_SECONDS; beyond LLM_CACHE_MAX_ENTRIES the least recently
+# used ones are evicted. LLM_CACHE_MAX_ENTRIES=0 disables the cache.
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "500"))
+# Hits are counted in memory and written out with the next stored completion, or by a hit on an entry whose
+# recorded last use is older than this, so lookups do not each need a write transaction
+LLM_CACHE_TOUCH_SECONDS = int(os.getenv("LLM_CACHE_TOUCH_SECONDS", "60"))
+
+logger = logging.getLogger(__name__)
+
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "touch_writes": 0}
+# Per engine: hits not written yet, as key -> (count, last use)
+_pending_touches: "weakref.WeakKeyDictionary[Any, Dict[str, Tuple[int, datetime]]]" = weakref.WeakKeyDictionary()
+
+
+def llm_cache_key(
+    base_url: Optional[str], model: str, temperature: float, system_prompt: str, user_message: str
+) -> str:
+    """Hash of everything that determines a completion; base_url tells apart endpoints serving a model of the
+    same name (None for the provider's default endpoint)"""
+    identity = json.dumps([base_url, model, temperature, system_prompt, user_message], ensure_ascii=False)
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+
+def _expiry_cutoff() -> datetime:
+    return datetime.now() - timedelta(seconds=LLM_CACHE_TTL_SECONDS)
+
+
+async def get_cached_response(session: AsyncSession, key: str) -> Optional[str]:
+    """Get an unexpired cached completion, marking it as used, or None.
+
+    The lookup only reads; the hit is recorded in memory and written out later (see LLM_CACHE_TOUCH_SECONDS).
+    """
+    if LLM_CACHE_MAX_ENTRIES <= 0:
+        return None
+    # On a short session of its own: closing it ends the read transaction, whose snapshot would pin the WAL,
+    # and the hit's write commits nothing of the caller's
+    async with session_factory_for(session)() as lookup_session:
+        result = await lookup_session.execute(
+            select(LLMResponseCache.response, LLMResponseCache.last_used_at).where(
+                LLMResponseCache.key == key, LLMResponseCache.created_at >= _expiry_cutoff()
+            )
+        )
+        row = result.one_or_none()
+        if row is None:
+            _stats["misses"] += 1
+            return None
+        _stats["hits"] += 1
+
+        now = datetime.now()
+        pending = _pending_touches.setdefault(session.bind, {})
+        count, _ = pending.get(key, (0, now))
+        pending[key] = (count + 1, now)
+        if now - row.last_used_at >= timedelta(seconds=LLM_CACHE_TOUCH_SECONDS):
+            # Keep the recorded recency close enough for eviction; a busy database only delays it
+            try:
+                await _write_touches(lookup_session)
+                await lookup_session.commit()
+            except OperationalError as e:
+                await lookup_session.rollback()
+                logger.warning("Could not record LLM cache hits: %s", e)
+    return zlib.decompress(row.response).decode("utf-8")
+
+
+async def _write_touches(session: AsyncSession) -> None:
+    """Add the hits counted in memory for session's database to its entries, in the current transaction"""
+    pending = _pending_touches.pop(session.bind, None)
+    if not pending:
+        return
+    try:
+        for key, (count, last_used_at) in pending.items():
+            await session.execute(
+                update(LLMResponseCache)
+                .where(LLMResponseCache.key == key)
+                .values(
+                    last_used_at=func.max(LLMResponseCache.last_used_at, last_used_at),
+                    hits=LLMResponseCache.hits + count,
+                )
+                .execution_options(synchronize_session=False)
+            )
+    except BaseException:
+        # Not written: keep them for the next attempt, along with any counted meanwhile
+        merged = _pending_touches.setdefault(session.bind, {})
+        for key, (count, last_used_at) in pending.items():
+            newer_count, newer_last_used_at = merged.get(key, (0, last_used_at))
+            merged[key] = (count + newer_count, max(last_used_at, newer_last_used_at))
+        raise
+    _stats["touch_writes"] += 1
+
+
+async def store_response(session: AsyncSession, key: str, model: str, response: str) -> None:
+    """Cache a completion, replacing any previous one under the key, and evict expired and excess entries"""
+    if LLM_CACHE_MAX_ENTRIES <= 0:
+        return
+    now = datetime.now()
+    values = {"model": model, "response": zlib.compress(response.encode("utf-8")), "created_at": now}
+    stmt = insert(LLMResponseCache).values(key=key, last_used_at=now, hits=0, **values)
+    await session.execute(
+        stmt.on_conflict_do_update(index_elements=[LLMResponseCache.key], set_={**values, "last_used_at": now})
+    )
+    # Eviction goes by last use, so bring it up to date first
+    await _write_touches(session)
+
+    expired = await session.execute(delete(LLMResponseCache).where(LLMResponseCache.created_at < _expiry_cutoff()))
+    newest = (
+        select(LLMResponseCache.key).order_by(LLMResponseCache.last_used_at.desc()).limit(LLM_CACHE_MAX_ENTRIES)
+    )
+    excess = await session.execute(delete(LLMResponseCache).where(LLMResponseCache.key.not_in(newest)))
+    await session.commit()
+    _stats["stores"] += 1
+    _stats["evictions"] += expired.rowcount + excess.rowcount
+
+
+async def peek_cached_response(session: AsyncSession, key: str, fresh_since: datetime) -> Optional[str]:
+    """Get a cached completion stored at or after fresh_since, without counting a lookup or marking it used.
+
+    The read transaction stays open; use a session that is closed right after."""
+    result = await session.execute(
+        select(LLMResponseCache.response).where(
+            LLMResponseCache.key == key, LLMResponseCache.created_at >= fresh_since
+        )
+    )
+    compressed = result.scalar_one_or_none()
+    return zlib.decompress(compressed).decode("utf-8") if compressed is not None else None
+
+
+def llm_cache_stats() -> Dict[str, Any]:
+    lookups = _stats["hits"] + _stats["misses"]
+    return {
+        **_stats,
+        "hit_rate": round(_stats["hits"] / lookups, 3) if lookups else 0.0,
+        "ttl_seconds": LLM_CACHE_TTL_SECONDS,
+        "max_entries": LLM_CACHE_MAX_ENTRIES,
+    }
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.db import LLMLease
+from app.services.llm_cache import peek_cached_response, store_response
+
+# How long a worker's claim on an LLM call holds before others may take it over (a worker that died
+# mid-call never releases it), and how often other workers check whether the call has finished
+LLM_LEASE_SECONDS = int(os.getenv("LLM_LEASE_SECONDS", "120"))
+LLM_LEASE_POLL_SECONDS = float(os.getenv("LLM_LEASE_POLL_SECONDS", "0.5"))
+
+# Identifies this process's leases
+_LEASE_OWNER = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+# An LLM call: feeds the completion, in one or many pieces, to the function it is given
+LLMCall = Callable[[Callable[[str], None]], Awaitable[None]]
+
+logger = logging.getLogger(__name__)
+
+_stats = {"calls": 0, "joined": 0, "waited_for_other_worker": 0, "lease_takeovers": 0}
+
+
+class _Flight:
+    """One LLM call in progress and the requests waiting for it.
+
+    The call runs in its own task, so it outlives any single waiter; it is cancelled when the last waiter
+    goes away. The completion is kept as the pieces it arrived in, so streaming waiters that join late
+    replay what came before.
+    """
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.pieces: List[str] = []
+        self.waiters = 0
+        self._updated = asyncio.Event()
+
+    def add_piece(self, piece: str) -> None:
+        if piece:
+            self.pieces.append(piece)
+            self.notify()
+
+    def notify(self) -> None:
+        updated, self._updated = self._updated, asyncio.Event()
+        updated.set()
+
+    async def wait_for_update(self) -> None:
+        await self._updated.wait()
+
+
+_flights: Dict[str, _Flight] = {}
+
+
+async def _acquire_lease(session_factory: async_sessionmaker, key: str) -> bool:
+    """Claim the call for key unless another live lease holds it"""
+    now = datetime.now()
+    expires_at = now + timedelta(seconds=LLM_LEASE_SECONDS)
+    stmt = insert(LLMLease).values(key=key, owner=_LEASE_OWNER, expires_at=expires_at)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[LLMLease.key],
+        set_={"owner": _LEASE_OWNER, "expires_at": expires_at},
+        where=LLMLease.expires_at < now,
+    )
+    async with session_factory() as session:
+        result = await session.execute(stmt)
+        await session.commit()
+    return result.rowcount == 1
+
+
+async def _release_lease(session_factory: async_sessionmaker, key: str) -> None:
+    async with session_factory() as session:
+        await session.execute(delete(LLMLease).where(LLMLease.key == key, LLMLease.owner == _LEASE_OWNER))
+        await session.commit()
+
+
+async def _lead(flight: _Flight, session_factory: async_sessionmaker, key: str, model: str, call: LLMCall) -> None:
+    """Make the call for key once across workers, and cache the completion.
+
+    While another worker holds the lease, wait for its completion to reach the cache instead; if its lease
+    lapses first, take over.
+    """
+    waiting_since = datetime.now()
+    waited = False
+    while not await _acquire_lease(session_factory, key):
+        if not waited:
+            _stats["waited_for_other_worker"] += 1
+            waited = True
+        await asyncio.sleep(LLM_LEASE_POLL_SECONDS)
+        async with session_factory() as session:
+            content = await peek_cached_response(session, key, waiting_since)
+        if content is not None:
+            flight.add_piece(content)
+            return
+    if waited:
+        _stats["lease_takeovers"] += 1
+
+    try:
+        _stats["calls"] += 1
+        await call(flight.add_piece)
+        try:
+            async with session_factory() as session:
+                await store_response(session, key, model, "".join(flight.pieces))
+        except Exception as e:
+            # The waiters have their completion either way; other workers waiting on the lease make the
+            # call themselves once it is released
+            logger.warning("Could not cache LLM response: %s", e)
+    finally:
+        await _release_lease(session_factory, key)
+
+
+def _join(session_factory: async_sessionmaker, key: str, model: str, call: LLMCall) -> _Flight:
+    flight = _flights.get(key)
+    if flight is None:
+        flight = _Flight()
+        flight.task = asyncio.create_task(_lead(flight, session_factory, key, model, call))
+
+        def finished(task: asyncio.Task) -> None:
+            if _flights.get(key) is flight:
+                del _flights[key]
+            flight.notify()
+
+        flight.task.add_done_callback(finished)
+        _flights[key] = flight
+    else:
+        _stats["joined"] += 1
+    flight.waiters += 1
+    return flight
+
+
+def _leave(flight: _Flight) -> None:
+    flight.waiters -= 1
+    if flight.waiters == 0 and not flight.task.done():
+        # Nobody is waiting for this completion anymore
+        flight.task.cancel()
+
+
+async def complete_once(session_factory: async_sessionmaker, key: str, model: str, call: LLMCall) -> str:
+    """Get the completion for a cache miss by making the LLM call, unless the same call is already in
+    flight, in this process or another worker, in which case wait for that one's completion instead.
+
+    The completion is stored in the LLM response cache under key. A waiter that is cancelled leaves the
+    call running for the others.
+    """
+    flight = _join(session_factory, key, model, call)
+    try:
+        await asyncio.shield(flight.task)
+        return "".join(flight.pieces)
+    finally:
+        _leave(flight)
+
+
+async def stream_once(
+    session_factory: async_sessionmaker, key: str, model: str, call: LLMCall
+) -> AsyncIterator[str]:
+    """Like complete_once(), yielding the completion in pieces as they arrive.
+
+    A request joining a call in flight first gets the pieces so far. A completion made by another worker
+    arrives as one piece.
+    """
+    flight = _join(session_factory, key, model, call)
+    try:
+        sent = 0
+        while True:
+            while sent < len(flight.pieces):
+                sent += 1
+                yield flight.pieces[sent - 1]
+            if flight.task.done():
+                flight.task.result()  # Raise the call's error, if any
+                if sent == len(flight.pieces):
+                    return
+            else:
+                await flight.wait_for_update()
+    finally:
+        _leave(flight)
+
+
+def llm_flight_stats() -> Dict[str, Any]:
+    return {**_stats, "in_flight": len(_flights)}
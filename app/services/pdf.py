@@ -0,0 +1,375 @@
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi.responses import FileResponse
+from fastapi.templating import Jinja2Templates
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.config import get_pdf_page_margin
+from app.services.pdf_worker import HTML_TO_PDF_BASE, RESUME_PDF_STYLESHEETS, load_weasyprint, ping, render_job
+from app.services.resume import get_resume_dict, get_resume_revision
+from app.utils.disk_cache import DiskLRUCache
+from app.utils.http_cache import templates_fingerprint
+
+# Rendering pool settings. PDF_POOL_WORKERS=0 renders in a thread of this process instead, which keeps the
+# event loop free but shares the process's memory and GIL with the app.
+PDF_POOL_WORKERS = int(os.getenv("PDF_POOL_WORKERS", "2"))
+# A worker process is replaced after this many jobs, since WeasyPrint's memory use creeps up over time
+PDF_POOL_MAX_JOBS_PER_WORKER = int(os.getenv("PDF_POOL_MAX_JOBS_PER_WORKER", "50"))
+# When a worker reports a resident set above this after a job, the whole pool is swapped for fresh workers
+PDF_POOL_MAX_RSS_MB = int(os.getenv("PDF_POOL_MAX_RSS_MB", "512"))
+
+# Rendered PDFs, stored under the SHA-256 of the complete HTML document they were rendered from
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", "data/pdf_cache")
+PDF_CACHE_MAX_MB = int(os.getenv("PDF_CACHE_MAX_MB", "256"))
+
+RESUME_PDF_TEMPLATE = "components/resume_preview.html"
+
+# Speculative rendering of a freshly optimized resume's PDF, so the download that usually follows finds it
+# ready or in progress. At most PDF_PRERENDER_MAX_PENDING pre-renders run at once; beyond that none start.
+PDF_PRERENDER_ENABLED = os.getenv("PDF_PRERENDER_ENABLED", "0") == "1"
+PDF_PRERENDER_MAX_PENDING = int(os.getenv("PDF_PRERENDER_MAX_PENDING", "4"))
+
+
+class PdfRenderPool:
+    """Renders HTML documents to PDF in worker processes, off the event loop.
+
+    Workers are spawned (never forked from the web process) and warmed up by their initializer. Each
+    worker is replaced after max_jobs_per_worker jobs, and the pool is swapped for a fresh one when a
+    worker's memory passes max_rss_mb; jobs already queued on the old pool still finish there.
+    """
+
+    def __init__(self, workers: int, max_jobs_per_worker: int, max_rss_mb: int):
+        self.workers = workers
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.max_rss_mb = max_rss_mb
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._generation = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._recycles = 0
+        self._render_seconds_total = 0.0
+        self._render_seconds_max = 0.0
+        self._wait_seconds_total = 0.0
+        self._last_worker_rss_mb = 0.0
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=load_weasyprint,
+            max_tasks_per_child=self.max_jobs_per_worker or None,
+        )
+        # Workers start on demand; one no-op job per worker starts (and warms) all of them now
+        for _ in range(self.workers):
+            executor.submit(ping)
+        return executor
+
+    def start(self) -> None:
+        if self.workers > 0 and self._executor is None:
+            self._executor = self._new_executor()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def _recycle(self, generation: int) -> None:
+        # Several jobs of one generation can report high memory; only the first one swaps the pool
+        if generation != self._generation or self._executor is None:
+            return
+        old_executor = self._executor
+        self._generation += 1
+        self._recycles += 1
+        self._executor = self._new_executor()
+        old_executor.shutdown(wait=False)
+
+    async def render(self, full_html: str, stylesheets: Tuple[str, ...] = ()) -> bytes:
+        """Render a complete HTML document to PDF bytes, with the stylesheet files in stylesheets"""
+        self.start()
+        generation = self._generation
+        self._in_flight += 1
+        submitted_at = time.perf_counter()
+        try:
+            if self._executor is None:
+                pdf_bytes, render_seconds, rss_mb = await asyncio.to_thread(render_job, full_html, stylesheets)
+            else:
+                loop = asyncio.get_running_loop()
+                pdf_bytes, render_seconds, rss_mb = await loop.run_in_executor(
+                    self._executor, render_job, full_html, stylesheets
+                )
+        except BrokenProcessPool:
+            # A worker died mid-job (e.g. killed for memory); later jobs get a fresh pool
+            self._failed += 1
+            self._recycle(generation)
+            raise
+        except BaseException:
+            self._failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+
+        self._completed += 1
+        self._render_seconds_total += render_seconds
+        self._render_seconds_max = max(self._render_seconds_max, render_seconds)
+        self._wait_seconds_total += max(0.0, time.perf_counter() - submitted_at - render_seconds)
+        self._last_worker_rss_mb = rss_mb
+        if self._executor is not None and self.max_rss_mb and rss_mb > self.max_rss_mb:
+            self._recycle(generation)
+        return pdf_bytes
+
+    def stats(self) -> Dict[str, Any]:
+        completed = self._completed or 1
+        return {
+            "mode": "process" if self.workers > 0 else "thread",
+            "workers": self.workers,
+            "generation": self._generation,
+            "in_flight": self._in_flight,
+            "queue_depth": max(0, self._in_flight - max(self.workers, 1)),
+            "completed": self._completed,
+            "failed": self._failed,
+            "recycles": self._recycles,
+            "render_ms_avg": round(self._render_seconds_total / completed * 1000, 1),
+            "render_ms_max": round(self._render_seconds_max * 1000, 1),
+            "wait_ms_avg": round(self._wait_seconds_total / completed * 1000, 1),
+            "last_worker_rss_mb": round(self._last_worker_rss_mb, 1),
+            "max_jobs_per_worker": self.max_jobs_per_worker,
+            "max_rss_mb": self.max_rss_mb,
+        }
+
+
+templates = Jinja2Templates(directory="app/templates")
+
+pdf_render_pool = PdfRenderPool(PDF_POOL_WORKERS, PDF_POOL_MAX_JOBS_PER_WORKER, PDF_POOL_MAX_RSS_MB)
+pdf_cache = DiskLRUCache(PDF_CACHE_DIR, PDF_CACHE_MAX_MB * 1024 * 1024, suffix=".pdf")
+
+
+def build_pdf_document(html_content: str, pdf_margin: str) -> str:
+    """Wrap an HTML fragment in the A4 page document used for every PDF download"""
+    return HTML_TO_PDF_BASE.format(html_content=html_content, pdf_margin=pdf_margin)
+
+
+async def render_pdf(full_html: str, stylesheets: Tuple[str, ...] = ()) -> bytes:
+    """Render a complete HTML document to PDF bytes in the shared render pool"""
+    return await pdf_render_pool.render(full_html, stylesheets)
+
+
+def pdf_document_key(full_html: str) -> str:
+    return hashlib.sha256(full_html.encode("utf-8")).hexdigest()
+
+
+class PdfRenderJobs:
+    """In-flight renders into the PDF cache, shared by downloads and speculative pre-renders.
+
+    A download for a document that is already rendering joins that job instead of starting a second
+    one. A pre-render is speculative: it is cancelled when a newer pre-render starts for the same resume,
+    unless a download has joined it, and none is started while max_pending of them are still running.
+    Cancelling only drops the job if it is still queued for a worker; a render in progress runs to the
+    end but its result is discarded.
+    """
+
+    def __init__(self, max_pending: int):
+        self.max_pending = max_pending
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._joined: set = set()
+        self._speculative: Dict[int, Tuple[str, asyncio.Task]] = {}
+        self.started = 0
+        self.joined = 0
+        self.skipped = 0
+        self.cancelled = 0
+
+    async def _render_into_cache(self, key: str, full_html: str, stylesheets: Tuple[str, ...]) -> Path:
+        pdf_bytes = await render_pdf(full_html, stylesheets)
+        return await asyncio.to_thread(pdf_cache.put, key, pdf_bytes)
+
+    def _start(self, key: str, full_html: str, stylesheets: Tuple[str, ...] = ()) -> asyncio.Task:
+        task = asyncio.create_task(self._render_into_cache(key, full_html, stylesheets))
+        self._tasks[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return task
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        self._joined.discard(key)
+        if not task.cancelled():
+            # Failures are reported to joined downloads; this only keeps unjoined ones from being logged
+            task.exception()
+
+    async def get(self, full_html: str) -> Path:
+        """Path of the PDF for a complete HTML document, rendering it only when it is not cached yet"""
+
+        async def document() -> str:
+            return full_html
+
+        return await self.get_or_build(pdf_document_key(full_html), document)
+
+    async def get_or_build(
+        self, key: str, build_document: Callable[[], Awaitable[str]], stylesheets: Tuple[str, ...] = ()
+    ) -> Path:
+        """Path of the PDF cached under key. On a miss, build_document is awaited for the HTML to render,
+        unless a render for key is already in flight, which is joined instead.
+
+        The file is pinned in the cache so it cannot be evicted before it is read; pass the path to
+        release_pdf_file() once done with it.
+        """
+        path = pdf_cache.get(key, pin=True)
+        while path is None:
+            task = self._tasks.get(key)
+            if task is None:
+                full_html = await build_document()
+                # Another request may have started the same render while the document was being built
+                task = self._tasks.get(key) or self._start(key, full_html, stylesheets)
+            else:
+                self.joined += 1
+            self._joined.add(key)
+            # Shielded, so a download abandoned by its client does not cancel a render others may be waiting on
+            await asyncio.shield(task)
+            # Evicted again before it could be pinned only if other renders filled the cache meanwhile
+            path = pdf_cache.pin(key)
+        return path
+
+    def prerender(self, resume_id: int, full_html: str) -> bool:
+        """Start rendering a document a download is likely to ask for soon. Returns whether a job started."""
+        key = pdf_document_key(full_html)
+        previous = self._speculative.get(resume_id)
+        if previous is not None and previous[0] == key:
+            return False
+        if previous is not None:
+            previous_key, previous_task = self._speculative.pop(resume_id)
+            if not previous_task.done() and previous_key not in self._joined:
+                # Unlisted right away, so a download arriving before the task unwinds starts a fresh render
+                del self._tasks[previous_key]
+                previous_task.cancel()
+                self.cancelled += 1
+
+        if key in self._tasks or pdf_cache.path_for(key).exists():
+            return False
+        pending = sum(1 for _, task in self._speculative.values() if not task.done())
+        if pending >= self.max_pending:
+            self.skipped += 1
+            return False
+
+        task = self._start(key, full_html)
+        self._speculative[resume_id] = (key, task)
+        task.add_done_callback(lambda done: self._forget_speculative(resume_id, done))
+        self.started += 1
+        return True
+
+    def _forget_speculative(self, resume_id: int, task: asyncio.Task) -> None:
+        if resume_id in self._speculative and self._speculative[resume_id][1] is task:
+            del self._speculative[resume_id]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": PDF_PRERENDER_ENABLED,
+            "in_flight": len(self._tasks),
+            "speculative_pending": sum(1 for _, task in self._speculative.values() if not task.done()),
+            "max_pending": self.max_pending,
+            "started": self.started,
+            "joined": self.joined,
+            "skipped": self.skipped,
+            "cancelled": self.cancelled,
+        }
+
+
+pdf_render_jobs = PdfRenderJobs(PDF_PRERENDER_MAX_PENDING)
+
+
+async def render_pdf_file(full_html: str) -> Path:
+    """Path of the PDF for a complete HTML document, rendering it only when it is not cached yet. The file
+    stays in the cache until release_pdf_file() is called with the path."""
+    return await pdf_render_jobs.get(full_html)
+
+
+def release_pdf_file(pdf_path: Path) -> None:
+    """Let the cache evict a PDF returned by render_pdf_file() or render_resume_pdf_file() again"""
+    pdf_cache.release(pdf_path)
+
+
+class PinnedPdfResponse(FileResponse):
+    """FileResponse for a PDF returned by render_pdf_file() or render_resume_pdf_file(), which releases it once
+    the response is over, including when sending fails because the client went away (a background task is
+    skipped then)"""
+
+    def __init__(self, pdf_path: Path, filename: str):
+        super().__init__(
+            pdf_path,
+            media_type="application/pdf",
+            headers={"Content-Disposition": f"attachment;filename={filename}"},
+        )
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            release_pdf_file(Path(self.path))
+
+
+def resume_pdf_key(resume_id: int, revision: int, pdf_margin: str) -> str:
+    """Cache key of a resume's standard PDF: changes with its content, the margin, templates and styles.
+
+    Resume ids are never reused (see Resume), so the id and revision identify the content. The cache
+    outlives restarts; the key's version keeps PDFs cached before ids were unique from matching a resume
+    that took a deleted one's id.
+    """
+    identity = (
+        f"resume-pdf-v2:{resume_id}:{revision}:{pdf_margin}:{templates_fingerprint()}:{_stylesheets_fingerprint()}"
+    )
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def _stylesheets_fingerprint() -> str:
+    digest = hashlib.sha256()
+    for path in RESUME_PDF_STYLESHEETS:
+        with open(path, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+async def render_resume_pdf_file(session: AsyncSession, resume_id: int) -> Path:
+    """Path of the PDF of a resume's standard preview.
+
+    The PDF is cached under the resume's revision, so while the resume is unchanged a request costs a
+    revision lookup and no rendering. Raises NoResultFound if the resume does not exist. The file stays in
+    the cache until release_pdf_file() is called with the path.
+    """
+    revision = await get_resume_revision(session, resume_id)
+    pdf_margin = await get_pdf_page_margin(session)
+
+    async def document() -> str:
+        resume_data = await get_resume_dict(session, resume_id, revision=revision)
+        html_content = templates.get_template(RESUME_PDF_TEMPLATE).render(resume_data=resume_data)
+        return build_pdf_document(html_content, pdf_margin)
+
+    key = resume_pdf_key(resume_id, revision, pdf_margin)
+    return await pdf_render_jobs.get_or_build(key, document, RESUME_PDF_STYLESHEETS)
+
+
+def prerender_pdf(resume_id: int, full_html: str) -> bool:
+    """Start rendering a resume's PDF in the background when pre-rendering is enabled"""
+    if not PDF_PRERENDER_ENABLED:
+        return False
+    return pdf_render_jobs.prerender(resume_id, full_html)
+
+
+def pdf_pool_stats() -> Dict[str, Any]:
+    return pdf_render_pool.stats()
+
+
+def pdf_cache_stats() -> Dict[str, Any]:
+    return pdf_cache.stats()
+
+
+def pdf_prerender_stats() -> Dict[str, Any]:
+    return pdf_render_jobs.stats()
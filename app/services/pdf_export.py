@@ -0,0 +1,129 @@
+import asyncio
+import io
+import os
+import re
+import time
+import zipfile
+from collections import deque
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, Set, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.pdf import PDF_POOL_WORKERS, release_pdf_file, render_resume_pdf_file
+
+# Renders in flight during a bulk export. Twice the pool size keeps every worker busy while finished PDFs
+# are being written to the archive.
+PDF_EXPORT_CONCURRENCY = int(os.getenv("PDF_EXPORT_CONCURRENCY", str(max(2, PDF_POOL_WORKERS * 2))))
+
+
+class _ZipChunkWriter(io.RawIOBase):
+    """Write-only sink for ZipFile that hands out what was written since the last drain.
+
+    It can seek only within the data not drained yet. Each entry is written whole between drains, so that
+    is enough for ZipFile to go back and fill in the CRC and sizes in the entry's local header, and the
+    archive can be sent while it is being built without data descriptors.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._buffer = bytearray()
+        self._drained = 0
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        offset = self._position - self._drained
+        end = offset + len(data)
+        self._buffer[offset:end] = data
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._drained + len(self._buffer)
+        if not self._drained <= offset <= self._drained + len(self._buffer):
+            raise io.UnsupportedOperation("cannot seek into data already drained")
+        self._position = offset
+        return offset
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._drained += len(data)
+        self._buffer.clear()
+        return data
+
+
+def export_file_name(resume_id: int, name: str) -> str:
+    """Archive member name for a resume's PDF; the id prefix keeps resumes with the same name apart"""
+    safe_name = re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("._") or "resume"
+    return f"{resume_id}_{safe_name}.pdf"
+
+
+def _write_pdf_entry(archive: zipfile.ZipFile, arcname: str, pdf_path: Path) -> None:
+    # PDFs are compressed already, so entries are stored. Stored entries need their CRC and sizes in the
+    # local header for streaming readers (Java's ZipInputStream rejects them with data descriptors), which
+    # ZipFile fills in by seeking back within the writer's undrained buffer.
+    info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+    info.compress_type = zipfile.ZIP_STORED
+    archive.writestr(info, pdf_path.read_bytes())
+
+
+async def stream_resume_pdfs_zip(
+    session_factory: Callable[[], AsyncSession], resumes: Dict[int, str], concurrency: int = PDF_EXPORT_CONCURRENCY
+) -> AsyncIterator[bytes]:
+    """Yield a ZIP archive of the resumes' PDFs, one chunk per finished file.
+
+    Up to `concurrency` resumes render at once, each with its own session, and files are added in the
+    order they finish. Only the PDFs in flight are held in memory, however many resumes are exported.
+    A resume that fails to render is recorded as a text file in the archive rather than ending it.
+    """
+
+    async def render(resume_id: int) -> Tuple[int, Path]:
+        async with session_factory() as session:
+            return resume_id, await render_resume_pdf_file(session, resume_id)
+
+    writer = _ZipChunkWriter()
+    pending: Set[asyncio.Task] = set()
+    task_resume_ids: Dict[asyncio.Task, int] = {}
+    queue = deque(resumes)
+    try:
+        with zipfile.ZipFile(writer, "w") as archive:
+            while queue or pending:
+                while queue and len(pending) < concurrency:
+                    resume_id = queue.popleft()
+                    task = asyncio.create_task(render(resume_id))
+                    task_resume_ids[task] = resume_id
+                    pending.add(task)
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    resume_id = task_resume_ids.pop(task)
+                    arcname = export_file_name(resume_id, resumes[resume_id])
+                    try:
+                        _, pdf_path = task.result()
+                        try:
+                            await asyncio.to_thread(_write_pdf_entry, archive, arcname, pdf_path)
+                        finally:
+                            release_pdf_file(pdf_path)
+                    except Exception as e:
+                        archive.writestr(f"{arcname[:-4]}.error.txt", f"PDF generation failed: {e}\n")
+                    yield writer.drain()
+        # Closing the archive wrote the central directory
+        yield writer.drain()
+    finally:
+        # The client went away, or the export failed: stop the renders nobody will collect, and release the
+        # PDFs of those that finished without being written, in flight or already handed back by wait()
+        for task in task_resume_ids:
+            if task.done() and not task.cancelled() and task.exception() is None:
+                release_pdf_file(task.result()[1])
+            task.cancel()
@@ -1,10 +1,12 @@
+import asyncio
+
 import fitz  # noqa
 from llama_index.core.llms import ChatMessage
-from llama_index.llms.openai import OpenAI
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import Resume
 from app.services.config import get_llm_settings
+from app.services.llm import get_llm
 from app.services.resume import create_resume
 
 
@@ -25,7 +27,7 @@ async def parse_resume_text(session, text: str) -> Resume:
     """Use Llamaindex to parse resume text into structured data matching our models."""
     api_key, model_name = await get_llm_settings(session)
 
-    llm = OpenAI(api_key=api_key, model=model_name, temperature=0.1)
+    llm = get_llm(api_key, model_name, temperature=0.1)
     structured_llm = llm.as_structured_llm(output_cls=Resume)
 
     prompt = f"""
@@ -53,9 +55,16 @@ Format the information exactly according to the Resume schema. Guidelines:
     return output.raw
 
 
-async def import_resume_from_pdf(file_content: bytes, session: Session, name: str = "Imported Resume") -> Resume:
-    """Process a PDF resume file and create a new resume in the database."""
-    text = await extract_text_from_pdf(file_content)
-    parsed_resume = await parse_resume_text(session, text)
-    resume = await create_resume(session, name, parsed_resume.model_dump())
-    return resume
+async def save_imported_resume(session: AsyncSession, name: str, parsed_resume: Resume):
+    """Create a new resume in the database from parsed data.
+
+    The write is shielded from cancellation: once the LLM has parsed the resume, a caller cancelled
+    meanwhile (its client left) still gets it stored, rather than interrupting create_resume mid-commit.
+    """
+    write = asyncio.ensure_future(create_resume(session, name, parsed_resume.model_dump()))
+    try:
+        return await asyncio.shield(write)
+    except asyncio.CancelledError:
+        # Let the commit finish before the caller's session is closed
+        await asyncio.wait({write})
+        raise
@@ -0,0 +1,83 @@
+"""Rendering side of the PDF render pool (see app.services.pdf).
+
+Worker processes import this module to unpickle their jobs, so it deliberately imports nothing from the
+app: a worker starts, and is replaced, without loading the web stack.
+"""
+
+import os
+import time
+from typing import Any, Dict, List, Tuple
+
+HTML_TO_PDF_BASE = """
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>Resume</title>
+    <style>
+        @page {{
+            size: A4;
+            margin: {pdf_margin};
+        }}
+    </style>
+</head>
+<body>{html_content}</body>
+</html>
+"""
+
+# Small document rendered once per worker, so font discovery and stylesheet setup happen before the first job
+WARMUP_HTML = HTML_TO_PDF_BASE.format(html_content="<p>Warm-up</p>", pdf_margin="1cm")
+
+# Stylesheets for the server-side export of the standard resume preview. Tailwind styles the preview in the
+# browser, but WeasyPrint cannot run its CDN script, so the utility classes the template uses live here.
+RESUME_PDF_STYLESHEETS = ("static/css/resume_pdf.css",)
+
+# WeasyPrint's HTML class and the parsed stylesheets, per worker process, loaded by the initializer
+_HTML = None
+_PARSED_STYLESHEETS: Dict[str, Any] = {}
+
+
+def load_weasyprint(warm_up: bool = True):
+    global _HTML
+    if _HTML is None:
+        # Imported here so the web process never loads WeasyPrint when a pool renders for it
+        from weasyprint import HTML
+
+        _HTML = HTML
+        if warm_up:
+            _HTML(string=WARMUP_HTML).write_pdf(stylesheets=_load_stylesheets(RESUME_PDF_STYLESHEETS))
+    return _HTML
+
+
+def _load_stylesheets(paths: Tuple[str, ...]) -> List[Any]:
+    """Parsed stylesheets for paths, each parsed once per process and reused by every later render"""
+    from weasyprint import CSS
+
+    for path in paths:
+        if path not in _PARSED_STYLESHEETS:
+            _PARSED_STYLESHEETS[path] = CSS(filename=path)
+    return [_PARSED_STYLESHEETS[path] for path in paths]
+
+
+def _current_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        # Peak rather than current RSS, in KiB on Linux and bytes on macOS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def render_job(full_html: str, stylesheets: Tuple[str, ...] = ()) -> Tuple[bytes, float, float]:
+    """Render one document; runs in a worker. Returns the PDF, render seconds and the worker's RSS in MB"""
+    html_class = load_weasyprint()
+    start = time.perf_counter()
+    pdf_bytes = html_class(string=full_html).write_pdf(stylesheets=_load_stylesheets(stylesheets))
+    return pdf_bytes, time.perf_counter() - start, _current_rss_mb()
+
+
+def ping() -> int:
+    return os.getpid()
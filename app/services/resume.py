@@ -1,46 +1,226 @@
-from typing import Any, Dict, List, Type
+import base64
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Type
 
-from sqlalchemy import update
+from sqlalchemy import and_, delete, or_, select, update
 from sqlalchemy.exc import NoResultFound
-from sqlalchemy.orm import Session
-
-from app.db import Education, Experience, PersonalInfo, Project, Resume, SkillSet
-from app.models import db_resume_to_dict
-
-
-async def get_resume_by_id(session: Session, resume_id: int) -> Resume:
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.db import Education, Experience, OptimizedResume, PersonalInfo, Project, Resume, SkillSet
+from app.models import FieldEdit, trusted_resume_to_dict
+from app.utils.lru import LRUCache
+
+# Loads a resume with every section in a fixed number of queries: the one-to-one sections are joined
+# onto the resume SELECT and each list section is fetched with a single IN query (4 queries in total)
+RESUME_GRAPH_OPTIONS = (
+    joinedload(Resume.personal_info),
+    joinedload(Resume.skills),
+    selectinload(Resume.experience),
+    selectinload(Resume.projects),
+    selectinload(Resume.education),
+)
+
+# Serialized resume dicts keyed by (resume_id, revision). A write to any section bumps the revision, so
+# stale entries are never read again and simply age out of the LRU.
+RESUME_CACHE_SIZE = int(os.getenv("RESUME_CACHE_SIZE", "256"))
+_resume_dict_cache = LRUCache(RESUME_CACHE_SIZE)
+
+# Resume sections as they appear in the resume dict, mapped to the table holding their rows
+SECTION_ENTITIES = {
+    "personal_info": PersonalInfo,
+    "skills": SkillSet,
+    "experience": Experience,
+    "projects": Project,
+    "education": Education,
+}
+SINGLE_ROW_SECTIONS = {"personal_info", "skills"}
+
+# Resume listing: the columns a list row shows and the orders it can be paged in. Every sort column has a
+# composite (column, id) index on the resume table.
+RESUME_LIST_PAGE_SIZE = int(os.getenv("RESUME_LIST_PAGE_SIZE", "50"))
+RESUME_LIST_COLUMNS = (Resume.id, Resume.name, Resume.created_at, Resume.updated_at)
+RESUME_LIST_SORT_COLUMNS = {"updated_at": Resume.updated_at, "created_at": Resume.created_at, "name": Resume.name}
+DATETIME_SORT_KEYS = {"updated_at", "created_at"}
+
+# Keys and foreign keys are never editable through field updates
+NON_EDITABLE_FIELDS = {"id", "resume_id"}
+
+
+def _editable_fields(entity_class) -> List[str]:
+    return [column.key for column in entity_class.__table__.columns if column.key not in NON_EDITABLE_FIELDS]
+
+
+async def get_resume_by_id(session: AsyncSession, resume_id: int) -> Resume:
     """Get a resume by ID"""
-    resume = session.query(Resume).filter(Resume.id == resume_id).one_or_none()
+    result = await session.execute(select(Resume).where(Resume.id == resume_id))
+    resume = result.scalar_one_or_none()
     if not resume:
         raise NoResultFound(f"Resume with ID {resume_id} not found")
     return resume
 
 
-async def get_resume_dict(session: Session, resume_id: int) -> Dict[str, Any]:
-    """Get a resume by ID and convert it to a dictionary using Pydantic models"""
-    resume = await get_resume_by_id(session, resume_id)
+async def get_resume_graph(session: AsyncSession, resume_id: int) -> Resume:
+    """Get a resume by ID with all of its sections loaded"""
+    result = await session.execute(select(Resume).options(*RESUME_GRAPH_OPTIONS).where(Resume.id == resume_id))
+    resume = result.unique().scalar_one_or_none()
     if not resume:
         raise NoResultFound(f"Resume with ID {resume_id} not found")
+    return resume
+
+
+async def get_resume_revision(session: AsyncSession, resume_id: int) -> int:
+    """Get the content revision of a resume. Raises NoResultFound if the resume does not exist."""
+    result = await session.execute(select(Resume.revision).where(Resume.id == resume_id))
+    revision = result.scalar_one_or_none()
+    if revision is None:
+        raise NoResultFound(f"Resume with ID {resume_id} not found")
+    return revision
+
 
-    resume_dict = await db_resume_to_dict(resume)
+async def get_resume_dict(session: AsyncSession, resume_id: int, revision: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Get a resume by ID and convert it to a dictionary shaped like the Pydantic Resume model.
+    Served from the revision-keyed cache when the resume has not changed, which costs a single primary key
+    lookup (skipped when the caller already knows the revision). The returned dict is shared with the cache
+    and must not be mutated.
+    """
+    if revision is None:
+        revision = await get_resume_revision(session, resume_id)
+    resume_dict = _resume_dict_cache.get((resume_id, revision))
+    if resume_dict is not None:
+        return resume_dict
+
+    resume = await get_resume_graph(session, resume_id)
+    # These rows were written through the app's own validated paths, so skip re-validating them here
+    resume_dict = trusted_resume_to_dict(resume)
+    # Key on the revision loaded with the graph, which is never older than the one checked above
+    _resume_dict_cache.set((resume_id, resume.revision), resume_dict)
     return resume_dict
 
 
-async def get_all_resumes(session: Session) -> List[Dict[str, Any]]:
-    """Get all resumes"""
-    resumes = session.query(Resume).all()
-    return [
-        {
-            "id": resume.id,
-            "name": resume.name,
-            "created_at": resume.created_at,
-            "updated_at": resume.updated_at,
-        }
-        for resume in resumes
-    ]
+def resume_cache_stats() -> Dict[str, int]:
+    """Hit/miss counters and size of the serialized resume cache"""
+    return _resume_dict_cache.stats()
+
 
+def clear_resume_cache() -> None:
+    """Drop every cached resume dict"""
+    _resume_dict_cache.clear()
 
-async def create_resume(session: Session, name: str, data: Dict[str, Any]) -> Resume:
+
+async def get_resume_section(session: AsyncSession, resume_id: int, section: str) -> Dict[str, Any]:
+    """
+    Load a single section of a resume, shaped like the full resume dict but holding only that section
+    plus the resume's content revision. Uses one query on the section's indexed resume_id and builds plain
+    dicts from the rows, skipping ORM hydration and Pydantic validation.
+    Raises NoResultFound if the resume does not exist.
+    """
+    entity_class = SECTION_ENTITIES[section]
+    columns = entity_class.__table__.columns
+    # Outer join from resume so a missing resume (no rows) can be told apart from an empty section
+    stmt = (
+        select(Resume.revision.label("section_resume_revision"), *columns)
+        .select_from(Resume)
+        .outerjoin(entity_class, entity_class.resume_id == Resume.id)
+        .where(Resume.id == resume_id)
+        .order_by(entity_class.id)
+    )
+    rows = (await session.execute(stmt)).all()
+    if not rows:
+        raise NoResultFound(f"Resume with ID {resume_id} not found")
+
+    items = [
+        {column.key: row._mapping[column] for column in columns}
+        for row in rows
+        if row._mapping[entity_class.__table__.c.id] is not None
+    ]
+    revision = rows[0].section_resume_revision
+    if section in SINGLE_ROW_SECTIONS:
+        return {"id": resume_id, "revision": revision, section: items[0] if items else None}
+    return {"id": resume_id, "revision": revision, section: items}
+
+
+def _encode_list_cursor(sort: str, descending: bool, value: Any, resume_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort, descending, value, resume_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode_list_cursor(cursor: str, sort: str, descending: bool) -> Tuple[Any, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, cursor_descending, value, resume_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Malformed resume list cursor") from e
+    if cursor_sort != sort or cursor_descending != descending or not isinstance(resume_id, int):
+        raise ValueError("Resume list cursor does not match the requested sort order")
+    if sort in DATETIME_SORT_KEYS and value is not None:
+        value = datetime.fromisoformat(value)
+    return value, resume_id
+
+
+async def list_resumes(
+    session: AsyncSession,
+    limit: int = RESUME_LIST_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    sort: str = "updated_at",
+    descending: bool = True,
+    name_filter: Optional[str] = None,
+) -> Dict[str, Any]:
+    """List one page of resumes, ordered by the sort column with id as tie-breaker.
+
+    Only the listed columns are selected, and paging continues from the last row of the previous page
+    (keyset pagination), so each page costs one index range scan no matter how deep it is. Returns the
+    page items and an opaque cursor for the next page, which is None on the last page.
+    """
+    if sort not in RESUME_LIST_SORT_COLUMNS:
+        raise ValueError(f"Cannot sort resumes by '{sort}'")
+    sort_column = RESUME_LIST_SORT_COLUMNS[sort]
+
+    stmt = select(*RESUME_LIST_COLUMNS)
+    if name_filter:
+        stmt = stmt.where(Resume.name.icontains(name_filter, autoescape=True))
+    if cursor:
+        value, last_id = _decode_list_cursor(cursor, sort, descending)
+        if descending:
+            stmt = stmt.where(or_(sort_column < value, and_(sort_column == value, Resume.id < last_id)))
+        else:
+            stmt = stmt.where(or_(sort_column > value, and_(sort_column == value, Resume.id > last_id)))
+    if descending:
+        stmt = stmt.order_by(sort_column.desc(), Resume.id.desc())
+    else:
+        stmt = stmt.order_by(sort_column.asc(), Resume.id.asc())
+
+    # One extra row tells whether another page follows without a COUNT query
+    rows = (await session.execute(stmt.limit(limit + 1))).all()
+    items = [dict(row._mapping) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = _encode_list_cursor(sort, descending, last[sort], last["id"])
+    return {"items": items, "next_cursor": next_cursor}
+
+
+async def get_resume_names(session: AsyncSession, resume_ids: Optional[List[int]] = None) -> Dict[int, str]:
+    """Map resume ids to names, for the given ids or for every resume, in id order"""
+    stmt = select(Resume.id, Resume.name).order_by(Resume.id)
+    if resume_ids is not None:
+        stmt = stmt.where(Resume.id.in_(resume_ids))
+    result = await session.execute(stmt)
+    return {resume_id: name for resume_id, name in result.all()}
+
+
+async def get_first_resume_id(session: AsyncSession) -> Optional[int]:
+    """Get the id of the first resume, or None when there are none"""
+    result = await session.execute(select(Resume.id).order_by(Resume.id).limit(1))
+    return result.scalar_one_or_none()
+
+
+async def create_resume(session: AsyncSession, name: str, data: Dict[str, Any]) -> Resume:
     """Create a new resume with the provided data"""
     resume = Resume(name=name)
     session.add(resume)
@@ -67,83 +247,117 @@ async def create_resume(session: Session, name: str, data: Dict[str, Any]) -> Re
         education = Education(resume=resume, **edu_data)
         session.add(education)
 
-    session.commit()
-    session.refresh(resume)
+    await session.commit()
+    await session.refresh(resume)
     return resume
 
 
 async def update_entity_field(
-    session: Session, entity_class, filter_by: Dict[str, Any], field: str, value: str
+    session: AsyncSession, entity_class, filter_by: Dict[str, Any], field: str, value: str
 ) -> bool:
     """
     Generic function to update any entity field
-    Returns True on success. Raises NoResultFound if the entity was not found.
+    The filter carries the ownership check (e.g. id and resume_id), so a single UPDATE both verifies the
+    row exists for that resume and writes it. Returns True on success. Raises NoResultFound if no row matched.
     """
-    if not hasattr(entity_class, field):
+    rowcount = await _execute_field_update(session, entity_class, filter_by, field, value)
+    await session.commit()
+    if rowcount == 0:
+        raise NoResultFound(f"{entity_class.__name__} not found with filter {filter_by}")
+    return True
+
+
+async def _execute_field_update(
+    session: AsyncSession, entity_class, filter_by: Dict[str, Any], field: str, value: str
+) -> int:
+    """Run the UPDATE for a single field without committing and return the number of matched rows"""
+    if field not in _editable_fields(entity_class):
         raise ValueError(f"Invalid field: {field} for {entity_class.__name__}")
     filter_conditions = []
     for key, val in filter_by.items():
         filter_conditions.append(getattr(entity_class, key) == val)
     update_stmt = update(entity_class).where(*filter_conditions).values({field: value})
-    result = session.execute(update_stmt)
-    session.commit()
-    if result.rowcount == 0:
-        raise NoResultFound(f"{entity_class.__name__} not found with filter {filter_by}")
-    return True
+    result = await session.execute(update_stmt)
+    return result.rowcount
 
 
-async def update_personal_info(session: Session, resume_id: int, field: str, value: str) -> bool:
+async def apply_field_edits(session: AsyncSession, resume_id: int, edits: List[FieldEdit]) -> List[Dict[str, Any]]:
+    """
+    Apply many field edits across the resume sections in a single transaction.
+    Every edit gets a result with a status of "updated", "not_found" or "invalid"; invalid and missing
+    entries are skipped without affecting the others, and everything else is committed once.
+    """
+    results = []
+    for edit in edits:
+        result = {"entity": edit.entity, "id": edit.id, "field": edit.field}
+        entity_class = SECTION_ENTITIES.get(edit.entity)
+        if entity_class is None:
+            results.append({**result, "status": "invalid", "error": f"Invalid entity: {edit.entity}"})
+            continue
+        if edit.entity not in SINGLE_ROW_SECTIONS and edit.id is None:
+            results.append({**result, "status": "invalid", "error": f"An id is required for {edit.entity}"})
+            continue
+
+        filter_by = {"resume_id": resume_id}
+        if edit.entity not in SINGLE_ROW_SECTIONS:
+            filter_by["id"] = edit.id
+        try:
+            rowcount = await _execute_field_update(session, entity_class, filter_by, edit.field, edit.value)
+        except ValueError as e:
+            results.append({**result, "status": "invalid", "error": str(e)})
+            continue
+        results.append({**result, "status": "updated" if rowcount else "not_found"})
+
+    await session.commit()
+    return results
+
+
+async def update_personal_info(session: AsyncSession, resume_id: int, field: str, value: str) -> bool:
     """Update a personal info field"""
     return await update_entity_field(session, PersonalInfo, {"resume_id": resume_id}, field, value)
 
 
-async def update_skills(session: Session, resume_id: int, field: str, value: str) -> bool:
+async def update_skills(session: AsyncSession, resume_id: int, field: str, value: str) -> bool:
     """Update a skills field"""
     return await update_entity_field(session, SkillSet, {"resume_id": resume_id}, field, value)
 
 
 async def update_education_field(
-    session: Session, resume_id: int, education_id: int, field: str, value: str
+    session: AsyncSession, resume_id: int, education_id: int, field: str, value: str
 ) -> bool:
     """Update an education field"""
-    education = (
-        session.query(Education).filter(Education.id == education_id, Education.resume_id == resume_id).first()
-    )
-    if not education:
-        raise NoResultFound(f"Education entry with ID {education_id} not found for resume {resume_id}.")
     return await update_entity_field(
         session, Education, {"id": education_id, "resume_id": resume_id}, field, value
     )
 
 
 async def update_experience_field(
-    session: Session, resume_id: int, experience_id: int, field: str, value: str
+    session: AsyncSession, resume_id: int, experience_id: int, field: str, value: str
 ) -> bool:
     """Update an experience field"""
-    experience = (
-        session.query(Experience).filter(Experience.id == experience_id, Experience.resume_id == resume_id).first()
-    )
-    if not experience:
-        raise NoResultFound(f"Experience entry with ID {experience_id} not found for resume {resume_id}.")
     return await update_entity_field(
         session, Experience, {"id": experience_id, "resume_id": resume_id}, field, value
     )
 
 
-async def update_project_field(session: Session, resume_id: int, project_id: int, field: str, value: str) -> bool:
+async def update_project_field(
+    session: AsyncSession, resume_id: int, project_id: int, field: str, value: str
+) -> bool:
     """Update a project field"""
     return await update_entity_field(session, Project, {"id": project_id, "resume_id": resume_id}, field, value)
 
 
-async def _add_item_to_collection(session: Session, resume_id: int, item_class: Type[Any], default_values=None):
+async def _add_item_to_collection(
+    session: AsyncSession, resume_id: int, item_class: Type[Any], default_values=None
+):
     """Generic function to add an item to a resume collection"""
     item = item_class(resume_id=resume_id, **(default_values or {}))
     session.add(item)
-    session.commit()
+    await session.commit()
     return item
 
 
-async def add_education(session: Session, resume_id: int) -> Education:
+async def add_education(session: AsyncSession, resume_id: int) -> Education:
     """Add a new education entry to a resume"""
     return await _add_item_to_collection(
         session,
@@ -157,19 +371,20 @@ async def add_education(session: Session, resume_id: int) -> Education:
     )
 
 
-async def delete_education_by_id(session: Session, resume_id: int, education_id: int) -> bool:
+async def delete_education_by_id(session: AsyncSession, resume_id: int, education_id: int) -> bool:
     """Delete an education entry by its ID."""
-    education_entry = (
-        session.query(Education).filter(Education.id == education_id, Education.resume_id == resume_id).first()
+    result = await session.execute(
+        select(Education).where(Education.id == education_id, Education.resume_id == resume_id)
     )
+    education_entry = result.scalars().first()
     if not education_entry:
         raise NoResultFound(f"Education entry with ID {education_id} not found for resume {resume_id}.")
-    session.delete(education_entry)
-    session.commit()
+    await session.delete(education_entry)
+    await session.commit()
     return True
 
 
-async def add_project(session: Session, resume_id: int) -> Project:
+async def add_project(session: AsyncSession, resume_id: int) -> Project:
     """Add a new project to a resume"""
     return await _add_item_to_collection(
         session,
@@ -184,17 +399,18 @@ async def add_project(session: Session, resume_id: int) -> Project:
     )
 
 
-async def delete_project_by_id(session: Session, resume_id: int, project_id: int) -> bool:
+async def delete_project_by_id(session: AsyncSession, resume_id: int, project_id: int) -> bool:
     """Delete a project by its ID."""
-    project_entry = session.query(Project).filter(Project.id == project_id, Project.resume_id == resume_id).first()
+    result = await session.execute(select(Project).where(Project.id == project_id, Project.resume_id == resume_id))
+    project_entry = result.scalars().first()
     if not project_entry:
         raise NoResultFound(f"Project entry with ID {project_id} not found for resume {resume_id}.")
-    session.delete(project_entry)
-    session.commit()
+    await session.delete(project_entry)
+    await session.commit()
     return True
 
 
-async def add_experience(session: Session, resume_id: int) -> Experience:
+async def add_experience(session: AsyncSession, resume_id: int) -> Experience:
     """Add a new experience entry to a resume"""
     default_values = {
         "title": "New Job Title",
@@ -207,23 +423,28 @@ async def add_experience(session: Session, resume_id: int) -> Experience:
     return await _add_item_to_collection(session, resume_id, Experience, default_values)
 
 
-async def delete_experience_by_id(session: Session, resume_id: int, experience_id: int) -> bool:
+async def delete_experience_by_id(session: AsyncSession, resume_id: int, experience_id: int) -> bool:
     """Delete an experience entry by its ID."""
-    experience_entry = (
-        session.query(Experience).filter(Experience.id == experience_id, Experience.resume_id == resume_id).first()
+    result = await session.execute(
+        select(Experience).where(Experience.id == experience_id, Experience.resume_id == resume_id)
     )
+    experience_entry = result.scalars().first()
     if not experience_entry:
         raise NoResultFound(f"Experience entry with ID {experience_id} not found for resume {resume_id}.")
-    session.delete(experience_entry)
-    session.commit()
+    await session.delete(experience_entry)
+    await session.commit()
     return True
 
 
-async def delete_resume_by_id(session: Session, resume_id: int) -> None:
+async def delete_resume_by_id(session: AsyncSession, resume_id: int) -> None:
     """Delete a resume by ID."""
     resume = await get_resume_by_id(session, resume_id)
     if not resume:
         raise NoResultFound(f"Resume with ID {resume_id} not found.")
 
-    session.delete(resume)
-    session.commit()
+    await session.execute(delete(OptimizedResume).where(OptimizedResume.resume_id == resume_id))
+    await session.delete(resume)
+    await session.commit()
+    for key in _resume_dict_cache.keys():
+        if key[0] == resume_id:
+            _resume_dict_cache.pop(key)
@@ -0,0 +1,62 @@
+import asyncio
+import os
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Dict, TypeVar
+
+from fastapi import Request
+
+# How often a long-running request checks whether its client is still there
+DISCONNECT_POLL_SECONDS = float(os.getenv("DISCONNECT_POLL_SECONDS", "0.5"))
+
+T = TypeVar("T")
+
+# Per operation: runs finished, runs cancelled because the client left, and the seconds they had been running
+_stats: Dict[str, Dict[str, float]] = defaultdict(
+    lambda: {"completed": 0, "cancelled": 0, "cancelled_seconds": 0.0}
+)
+
+
+class ClientDisconnected(Exception):
+    """The client went away before the response was ready, and the work for it was cancelled"""
+
+
+def record_cancelled(operation: str, started_at: float) -> None:
+    """Count work cancelled because its client left, given when it started (time.monotonic())"""
+    _stats[operation]["cancelled"] += 1
+    _stats[operation]["cancelled_seconds"] += time.monotonic() - started_at
+
+
+def record_completed(operation: str) -> None:
+    _stats[operation]["completed"] += 1
+
+
+async def cancel_on_disconnect(request: Request, work: Awaitable[T], operation: str) -> T:
+    """Await work, cancelling it as soon as the client disconnects.
+
+    Slow handlers (LLM calls) otherwise run to completion for a client that aborted long ago, spending
+    tokens and holding connections. Raises ClientDisconnected after cancelling.
+    """
+    started_at = time.monotonic()
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                record_completed(operation)
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                record_cancelled(operation, started_at)
+                raise ClientDisconnected(operation)
+    finally:
+        # Also when this handler itself is cancelled, e.g. at shutdown
+        task.cancel()
+
+
+def client_disconnect_stats() -> Dict[str, Any]:
+    return {
+        operation: {**counts, "cancelled_seconds": round(counts["cancelled_seconds"], 3)}
+        for operation, counts in _stats.items()
+    }
@@ -0,0 +1,163 @@
+import os
+import tempfile
+import threading
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+
+class DiskLRUCache:
+    """Content-addressed file cache bounded by total size, evicting the least recently used files.
+
+    Entries are written to a temporary file in the cache directory and renamed into place, so readers
+    (including other processes sharing the directory) never see a partial file. Recency is kept in the
+    files' mtimes, which lets the index be rebuilt from the directory after a restart. The newest entry is
+    never evicted, even when it alone exceeds max_bytes.
+
+    The index is guarded by a lock, as writes usually run in worker threads while reads run on the event
+    loop. An entry pinned by get(pin=True) or pin() is not evicted until it is released, so a file can be
+    served after the call returns without a concurrent put() deleting it first.
+    """
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int, suffix: str = ""):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._index: Optional["OrderedDict[str, int]"] = None
+        self._total_bytes = 0
+        self._pins: Counter = Counter()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def _load_index(self) -> "OrderedDict[str, int]":
+        if self._index is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            entries = []
+            for path in self.directory.glob(f"*{self.suffix}"):
+                if path.name.startswith("."):
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, path.name[: len(path.name) - len(self.suffix)], stat.st_size))
+            self._index = OrderedDict((key, size) for _, key, size in sorted(entries))
+            self._total_bytes = sum(self._index.values())
+        return self._index
+
+    def _forget(self, key: str) -> None:
+        size = self._load_index().pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _remember(self, key: str, size: int) -> None:
+        self._forget(key)
+        self._index[key] = size
+        self._total_bytes += size
+
+    def _touch(self, key: str) -> Optional[Path]:
+        """Mark key as most recently used and return its path, or None when the file is gone"""
+        index = self._load_index()
+        path = self.path_for(key)
+        try:
+            # Touching the file both checks it still exists (another process may have evicted it) and
+            # persists its recency
+            os.utime(path)
+            size = index[key] if key in index else path.stat().st_size
+        except FileNotFoundError:
+            self._forget(key)
+            return None
+        self._remember(key, size)
+        return path
+
+    def get(self, key: str, pin: bool = False) -> Optional[Path]:
+        """Path of the cached file for key, or None. A hit marks the entry as most recently used and, with
+        pin=True, keeps it from eviction until release() is called with the path."""
+        with self._lock:
+            path = self._touch(key)
+            if path is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if pin:
+                self._pins[key] += 1
+            return path
+
+    def pin(self, key: str) -> Optional[Path]:
+        """Like get(pin=True), without counting as a lookup; for an entry the caller has just stored"""
+        with self._lock:
+            path = self._touch(key)
+            if path is not None:
+                self._pins[key] += 1
+            return path
+
+    def release(self, path: Path) -> None:
+        """Unpin the entry at path, letting it be evicted again"""
+        key = path.name[: len(path.name) - len(self.suffix)]
+        with self._lock:
+            self._pins[key] -= 1
+            if self._pins[key] <= 0:
+                del self._pins[key]
+            self._evict()
+
+    def put(self, key: str, data: bytes) -> Path:
+        """Store data under key atomically, evict old entries beyond max_bytes, and return the file's path"""
+        with self._lock:
+            self._load_index()
+        path = self.path_for(key)
+        fd, temp_name = tempfile.mkstemp(dir=self.directory, prefix=".tmp-", suffix=self.suffix)
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(data)
+            os.replace(temp_name, path)
+        except BaseException:
+            try:
+                os.unlink(temp_name)
+            except FileNotFoundError:
+                pass
+            raise
+        with self._lock:
+            self._remember(key, len(data))
+            self._evict()
+        return path
+
+    def _evict(self) -> None:
+        """Delete the least recently used unpinned entries, except the newest, until within max_bytes"""
+        candidates = [key for key in list(self._index)[:-1] if key not in self._pins]
+        for key in candidates:
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._total_bytes -= self._index.pop(key)
+            self.evictions += 1
+            try:
+                os.unlink(self.path_for(key))
+            except FileNotFoundError:
+                pass
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._load_index()):
+                try:
+                    os.unlink(self.path_for(key))
+                except FileNotFoundError:
+                    pass
+            self._index.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._index) if self._index is not None else 0,
+            "pinned": len(self._pins),
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,53 @@
+import hashlib
+import os
+from functools import lru_cache
+
+from fastapi import Request, Response
+
+TEMPLATES_DIR = "app/templates"
+
+
+@lru_cache(maxsize=1)
+def templates_fingerprint() -> str:
+    """Hash of every template file, so a deploy that changes markup also changes the ETags"""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(TEMPLATES_DIR):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            digest.update(path.encode())
+            with open(path, "rb") as file:
+                digest.update(file.read())
+    return digest.hexdigest()
+
+
+def resume_etag(resume_id: int, revision: int, template_name: str) -> str:
+    """Strong ETag for a fragment rendered from a resume's content at a given revision.
+
+    Resume ids are never reused (see Resume); the version keeps ETags browsers got before they were unique
+    from matching a resume that took a deleted one's id.
+    """
+    identity = f"resume-v2:{resume_id}:{revision}:{template_name}:{templates_fingerprint()}"
+    return f'"{hashlib.sha256(identity.encode()).hexdigest()[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check the request's If-None-Match header against etag (weak comparison, as RFC 9110 requires)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+
+def set_etag(response: Response, etag: str) -> Response:
+    # no-cache lets the browser store the fragment but makes it revalidate with If-None-Match every time
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def not_modified(etag: str) -> Response:
+    return set_etag(Response(status_code=304), etag)
@@ -0,0 +1,41 @@
+from contextlib import contextmanager
+from typing import List
+
+from sqlalchemy import event
+
+
+class QueryCounter:
+    """Collects the SQL statements an engine executes while it is attached"""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@contextmanager
+def count_queries(engine):
+    """Record every statement executed through engine (sync or async) inside the with block"""
+    counter = QueryCounter()
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter.statements.append(statement)
+
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", _before_cursor_execute)
+
+
+@contextmanager
+def assert_max_queries(engine, budget: int):
+    """Fail with the offending statements if the with block executes more than budget queries"""
+    with count_queries(engine) as counter:
+        yield counter
+    if counter.count > budget:
+        statements = "\n".join(f"  {statement}" for statement in counter.statements)
+        raise AssertionError(f"Expected at most {budget} queries, got {counter.count}:\n{statements}")
@@ -0,0 +1,56 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Union
+
+
+class TokenRateLimiter:
+    """Token bucket for LLM calls: holds up to tokens_per_minute tokens and refills continuously.
+
+    acquire() waits until the bucket can cover the call; waiters are served in arrival order, so a large
+    call is not starved by smaller ones behind it. A call larger than the whole bucket waits for a full
+    bucket and is then let through. tokens_per_minute <= 0 disables the limit. clock and sleep can be
+    replaced, e.g. by a simulated clock in tests.
+    """
+
+    def __init__(
+        self,
+        tokens_per_minute: int,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        self.tokens_per_minute = tokens_per_minute
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(max(tokens_per_minute, 0))
+        self._updated_at = clock()
+        self._lock = asyncio.Lock()
+        self.waits = 0
+        self.waited_seconds = 0.0
+
+    def _refill(self) -> None:
+        now = self._clock()
+        rate_per_second = self.tokens_per_minute / 60
+        self._tokens = min(self.tokens_per_minute, self._tokens + (now - self._updated_at) * rate_per_second)
+        self._updated_at = now
+
+    async def acquire(self, tokens: int) -> None:
+        if self.tokens_per_minute <= 0:
+            return
+        tokens = min(tokens, self.tokens_per_minute)
+        async with self._lock:
+            self._refill()
+            if self._tokens < tokens:
+                delay = (tokens - self._tokens) / (self.tokens_per_minute / 60)
+                self.waits += 1
+                self.waited_seconds += delay
+                await self._sleep(delay)
+                self._refill()
+            self._tokens -= tokens
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        return {
+            "tokens_per_minute": self.tokens_per_minute,
+            "available": int(self._tokens),
+            "waits": self.waits,
+            "waited_seconds": round(self.waited_seconds, 3),
+        }
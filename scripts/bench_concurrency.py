@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Measure PATCH latency while slow /optimize calls are in flight.
+
+Runs the FastAPI app in-process against a throwaway SQLite file, fires a storm of autosave
+PATCH requests alongside several optimize requests whose LLM call is replaced by a sleep,
+and reports latency percentiles for each group.
+
+Usage: python scripts/bench_concurrency.py [--patches 500] [--concurrency 25] [--optimizers 4]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+class SlowLLM:
+    """Stand-in for the OpenAI client: waits like a real completion, then returns fixed HTML."""
+
+    delay = 2.0
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def achat(self, messages):
+        await asyncio.sleep(self.delay)
+
+        class _Message:
+            content = "<div>optimized</div>"
+
+        class _Response:
+            message = _Message()
+
+        return _Response()
+
+
+def percentile(samples, pct):
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(label, samples):
+    if not samples:
+        print(f"{label:<10} n=0")
+        return
+    print(
+        f"{label:<10} n={len(samples):<5} "
+        f"p50={percentile(samples, 50) * 1000:8.1f}ms "
+        f"p95={percentile(samples, 95) * 1000:8.1f}ms "
+        f"p99={percentile(samples, 99) * 1000:8.1f}ms "
+        f"max={max(samples) * 1000:8.1f}ms "
+        f"mean={statistics.mean(samples) * 1000:8.1f}ms"
+    )
+
+
+async def run(args):
+    import httpx
+
+    from app.db import SessionLocal, create_db_and_tables, engine
+    from app.main import app
+    from app.services.resume import create_resume
+
+    await create_db_and_tables()
+    async with SessionLocal() as session:
+        resume = await create_resume(
+            session,
+            "Benchmark",
+            {
+                "personal_info": {
+                    "name": "Bench",
+                    "location": "Nowhere",
+                    "email": "bench@example.com",
+                    "linkedin": "linkedin.com/in/bench",
+                    "github": "github.com/bench",
+                },
+                "skills": {"technical_skills": "Python", "soft_skills": "Patience", "tools": "SQLite"},
+                "experience": [
+                    {
+                        "title": f"Engineer {i}",
+                        "company": "Bench Corp",
+                        "location": "Remote",
+                        "start_date": "2020",
+                        "end_date": "Present",
+                        "description": "• Measured things",
+                    }
+                    for i in range(10)
+                ],
+                "projects": [],
+                "education": [],
+            },
+        )
+        resume_id = resume.id
+
+    SlowLLM.delay = args.llm_delay
+    patch_latencies = []
+    optimize_latencies = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one_patch(i):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.patch(
+                    f"/api/resumes/{resume_id}/personal_info/name", data={"value": f"Bench {i}"}
+                )
+                patch_latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        async def one_optimize():
+            start = time.perf_counter()
+            response = await client.get(f"/api/resumes/{resume_id}/optimize", params={"refresh": "true"})
+            optimize_latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+        with patch("app.services.ats.get_llm", SlowLLM):
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(one_optimize() for _ in range(args.optimizers)),
+                *(one_patch(i) for i in range(args.patches)),
+            )
+            elapsed = time.perf_counter() - started
+
+    await engine.dispose()
+
+    print(f"{args.patches} PATCHes (concurrency {args.concurrency}) + {args.optimizers} optimize calls")
+    print(f"wall time {elapsed:.2f}s, {args.patches / elapsed:.0f} PATCH/s")
+    report("PATCH", patch_latencies)
+    report("optimize", optimize_latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patches", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=25)
+    parser.add_argument("--optimizers", type=int, default=4)
+    parser.add_argument("--llm-delay", type=float, default=2.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Must be set before app.db is imported so the engine points at the scratch database
+        os.environ["RESUME_DB_FILE"] = os.path.join(tmp_dir, "bench.db")
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
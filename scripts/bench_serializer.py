@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Compare the validated (Pydantic) and trusted resume serializers.
+
+Builds an in-memory SQLAlchemy Resume graph with the requested number of child rows and times
+Resume.model_validate(...).model_dump() against trusted_resume_to_dict.
+
+Usage: python scripts/bench_serializer.py [--experience 30] [--projects 20] [--education 5] [--number 2000]
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import db  # noqa: E402
+from app.models import Resume, trusted_resume_to_dict  # noqa: E402
+
+
+def build_resume(experience_count, project_count, education_count):
+    return db.Resume(
+        id=1,
+        name="Benchmark",
+        personal_info=db.PersonalInfo(
+            id=1,
+            resume_id=1,
+            name="Bench",
+            location="Nowhere",
+            email="bench@example.com",
+            linkedin="linkedin.com/in/bench",
+            github="github.com/bench",
+        ),
+        skills=db.SkillSet(id=1, resume_id=1, technical_skills="Python", soft_skills="Patience", tools="SQLite"),
+        experience=[
+            db.Experience(
+                id=i,
+                resume_id=1,
+                title=f"Engineer {i}",
+                company="Bench Corp",
+                location="Remote",
+                start_date="2020",
+                end_date="Present",
+                description="• Measured things\n" * 5,
+            )
+            for i in range(experience_count)
+        ],
+        projects=[
+            db.Project(
+                id=i,
+                resume_id=1,
+                name=f"Project {i}",
+                url="github.com/bench/project",
+                technologies="Python, SQLite",
+                description="• Built things",
+            )
+            for i in range(project_count)
+        ],
+        education=[
+            db.Education(id=i, resume_id=1, institution="Bench U", degree="BSc", graduation_date="2019")
+            for i in range(education_count)
+        ],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--experience", type=int, default=30)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--education", type=int, default=5)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    resume = build_resume(args.experience, args.projects, args.education)
+    assert trusted_resume_to_dict(resume) == Resume.model_validate(resume).model_dump()
+
+    validated = min(
+        timeit.repeat(lambda: Resume.model_validate(resume).model_dump(), number=args.number, repeat=5)
+    )
+    trusted = min(timeit.repeat(lambda: trusted_resume_to_dict(resume), number=args.number, repeat=5))
+
+    rows = args.experience + args.projects + args.education
+    print(f"{rows} child rows, best of 5 x {args.number} conversions")
+    print(f"validated  {validated / args.number * 1e6:9.1f} us/resume")
+    print(f"trusted    {trusted / args.number * 1e6:9.1f} us/resume")
+    print(f"speedup    {validated / trusted:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Compare SQLite read/write throughput with the connection profile on and off.
+
+Each run uses a fresh database file (journal_mode=WAL is persistent, so the runs cannot share one),
+seeds a handful of resumes, then runs concurrent autosave-style writers (one UPDATE + commit per
+operation) next to readers that load a full resume. Errors such as "database is locked" are counted
+rather than raised.
+
+Usage: python scripts/bench_sqlite_profile.py [--seconds 5] [--writers 8] [--readers 8]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import select, update  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from app.db import SQLITE_PRAGMAS, Base, Experience, PersonalInfo, apply_sqlite_profile  # noqa: E402
+from app.services.resume import create_resume  # noqa: E402
+
+RESUME_COUNT = 10
+
+
+def resume_payload(index):
+    return {
+        "personal_info": {
+            "name": f"Bench {index}",
+            "location": "Nowhere",
+            "email": "bench@example.com",
+            "linkedin": "linkedin.com/in/bench",
+            "github": "github.com/bench",
+        },
+        "skills": {"technical_skills": "Python", "soft_skills": "Patience", "tools": "SQLite"},
+        "experience": [
+            {
+                "title": f"Engineer {i}",
+                "company": "Bench Corp",
+                "location": "Remote",
+                "start_date": "2020",
+                "end_date": "Present",
+                "description": "• Measured things\n" * 5,
+            }
+            for i in range(20)
+        ],
+        "projects": [],
+        "education": [],
+    }
+
+
+async def run_profile(db_file, tuned, args):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_file}", pool_size=args.writers + args.readers)
+    if tuned:
+        apply_sqlite_profile(engine)
+    session_factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with session_factory() as session:
+        for index in range(RESUME_COUNT):
+            await create_resume(session, f"Bench {index}", resume_payload(index))
+
+    counters = {"writes": 0, "reads": 0, "errors": 0}
+    deadline = time.perf_counter() + args.seconds
+
+    async def writer(worker):
+        counter = 0
+        async with session_factory() as session:
+            while time.perf_counter() < deadline:
+                counter += 1
+                resume_id = (worker + counter) % RESUME_COUNT + 1
+                try:
+                    await session.execute(
+                        update(PersonalInfo)
+                        .where(PersonalInfo.resume_id == resume_id)
+                        .values(name=f"Writer {worker} #{counter}")
+                    )
+                    await session.commit()
+                    counters["writes"] += 1
+                except OperationalError:
+                    await session.rollback()
+                    counters["errors"] += 1
+
+    async def reader(worker):
+        counter = 0
+        async with session_factory() as session:
+            while time.perf_counter() < deadline:
+                counter += 1
+                resume_id = (worker + counter) % RESUME_COUNT + 1
+                try:
+                    await session.execute(select(PersonalInfo).where(PersonalInfo.resume_id == resume_id))
+                    result = await session.execute(select(Experience).where(Experience.resume_id == resume_id))
+                    result.scalars().all()
+                    await session.commit()
+                    counters["reads"] += 1
+                except OperationalError:
+                    await session.rollback()
+                    counters["errors"] += 1
+
+    await asyncio.gather(*(writer(i) for i in range(args.writers)), *(reader(i) for i in range(args.readers)))
+    await engine.dispose()
+    return counters
+
+
+async def run(args):
+    print(f"profile: {SQLITE_PRAGMAS}")
+    print(f"{args.writers} writers + {args.readers} readers for {args.seconds:.0f}s per run\n")
+    for label, tuned in (("default", False), ("tuned", True)):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            counters = await run_profile(os.path.join(tmp_dir, "bench.db"), tuned, args)
+        print(
+            f"{label:<8} writes/s={counters['writes'] / args.seconds:9.1f} "
+            f"reads/s={counters['reads'] / args.seconds:9.1f} errors={counters['errors']}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=8)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,7 @@ let downloadAtsButton = null;
 
 // State
 let currentOptimizeXhr = null;
+let currentOptimizeStream = null;
 
 /**
  * Caches frequently accessed DOM elements.
@@ -106,6 +107,10 @@ const PreviewManager = {
       currentOptimizeXhr = null;  // Clear the reference
       this._resetOptimizeButtonState(); // Manually reset button visuals
     }
+    if (currentOptimizeStream) {
+      console.log('Preview refresh triggered while optimization is streaming. Aborting optimization.');
+      OptimizeStream.finish(false);
+    }
 
     if (!previewContainer) {
         console.warn("Preview container not found, skipping refresh.");
@@ -167,12 +172,119 @@ const PreviewManager = {
   }
 };
 
+/**
+ * Streams ATS optimization output into the preview as it is generated, for optimize buttons with a
+ * data-stream-url (server-sent events) instead of an hx-get.
+ */
+const OptimizeStream = {
+  html: '',
+  renderScheduled: false,
+
+  /**
+   * Start optimizing, replacing any optimization still streaming.
+   * @param {HTMLElement} button - The optimize button.
+   */
+  start(button) {
+    if (currentOptimizeStream) {
+      console.warn('Aborting previous optimize stream.');
+      this.finish(false);
+    }
+
+    const previewContent = document.getElementById('resume-preview-content');
+    if (!previewContent) return;
+    previewContent.outerHTML =
+      '<div id="resume-preview-content" class="resume-preview" data-result-id=""><div class="ats-content pb-4"></div></div>';
+
+    this.html = '';
+    button.classList.add('htmx-request');
+    PreviewManager.updateDownloadButton(false);
+    LoadingManager.showLoadingIndicator();
+
+    const source = new EventSource(button.dataset.streamUrl);
+    currentOptimizeStream = source;
+
+    source.addEventListener('chunk', (event) => {
+      if (source !== currentOptimizeStream) return;
+      this.html += JSON.parse(event.data).html;
+      LoadingManager.hideLoadingIndicator(); // The text arriving is progress enough
+      this._scheduleRender();
+    });
+    source.addEventListener('done', (event) => {
+      if (source !== currentOptimizeStream) return;
+      const data = JSON.parse(event.data);
+      const previewContent = document.getElementById('resume-preview-content');
+      if (previewContent) {
+        previewContent.dataset.resultId = data.result_id;
+        if (data.job_description_truncated) this._showTruncationNotice(previewContent);
+      }
+      this.finish(true);
+    });
+    source.addEventListener('failed', (event) => {
+      if (source !== currentOptimizeStream) return;
+      console.error('Optimize stream failed:', JSON.parse(event.data).detail);
+      this.finish(false);
+    });
+    // Connection errors; closing stops EventSource from reconnecting, which would start the optimization over
+    source.onerror = () => {
+      if (source !== currentOptimizeStream) return;
+      console.error('Optimize stream connection lost.');
+      this.finish(false);
+    };
+  },
+
+  /**
+   * Close the stream and settle the button and preview state.
+   * @param {boolean} succeeded - Whether the optimization completed.
+   */
+  finish(succeeded) {
+    if (currentOptimizeStream) {
+      currentOptimizeStream.close();
+      currentOptimizeStream = null;
+    }
+    this._render();
+    if (optimizeButton) optimizeButton.classList.remove('htmx-request');
+    LoadingManager.hideLoadingIndicator();
+    PreviewManager.updateDownloadButton(succeeded);
+  },
+
+  /**
+   * Render at most once per frame, however fast chunks arrive.
+   * @private
+   */
+  _scheduleRender() {
+    if (this.renderScheduled) return;
+    this.renderScheduled = true;
+    requestAnimationFrame(() => this._render());
+  },
+
+  _render() {
+    this.renderScheduled = false;
+    const content = document.querySelector('#resume-preview-content .ats-content');
+    if (content) content.innerHTML = this.html;
+  },
+
+  /**
+   * Tell the user only the beginning of the job description was used, like the ATS preview template does.
+   * @param {HTMLElement} previewContent - The preview container.
+   * @private
+   */
+  _showTruncationNotice(previewContent) {
+    const notice = document.createElement('div');
+    notice.className = 'bg-yellow-100 border-l-4 border-yellow-500 text-yellow-700 p-4 mb-4';
+    notice.setAttribute('role', 'alert');
+    notice.textContent =
+      'The job description is over the prompt token budget, so only its beginning was used for this optimization.';
+    previewContent.prepend(notice);
+  }
+};
+
 /**
  * Handles specific document-level actions like downloads and delegated clicks.
  */
 const DocumentActions = {
   /**
-   * Handle ATS download button click by submitting preview content via form post.
+   * Handle ATS download button click by submitting the stored result id (or, failing that, the preview
+   * content) via form post.
    * @param {HTMLElement} button - The download button element.
    */
    handleAtsDownload(button) {
@@ -180,8 +292,11 @@ const DocumentActions = {
     const contentSelector = button.dataset.contentSelector;
     const contentElement = document.querySelector(contentSelector);
     const htmlContent = contentElement ? contentElement.innerHTML : "";
+    // The optimized HTML is stored server-side; its id avoids uploading the whole document again
+    const resultElement = contentElement ? contentElement.closest('[data-result-id]') : null;
+    const resultId = resultElement ? resultElement.dataset.resultId : "";
 
-    if (!url || !contentSelector || !htmlContent) {
+    if (!url || !contentSelector || (!resultId && !htmlContent)) {
       console.error("Download button missing data-url, data-content-selector, or preview content is empty.");
       return;
     }
@@ -193,8 +308,8 @@ const DocumentActions = {
 
     const contentInput = document.createElement('input');
     contentInput.type = 'hidden';
-    contentInput.name = 'html_content';
-    contentInput.value = htmlContent;
+    contentInput.name = resultId ? 'result_id' : 'html_content';
+    contentInput.value = resultId || htmlContent;
     form.appendChild(contentInput);
 
     // Include CSRF token if present (common in Flask/Django)
@@ -241,6 +356,9 @@ const EventHandlers = {
     if (downloadAtsButton) {
         downloadAtsButton.addEventListener('click', () => DocumentActions.handleAtsDownload(downloadAtsButton));
     }
+    if (optimizeButton?.dataset.streamUrl) {
+        optimizeButton.addEventListener('click', () => OptimizeStream.start(optimizeButton));
+    }
 
     // Use event delegation for HTMX events on document.body
     document.body.addEventListener('htmx:beforeSend', this.handleBeforeSend);
@@ -1,14 +1,36 @@
 """Configuration and fixtures for the pytest test suite."""
 
-from typing import Any, Dict, List
+import asyncio
+from typing import Any, Callable, Dict, List, Union
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
 import pytest
 import pytest_asyncio
 from fastapi.testclient import TestClient
+from llama_index.core.llms import ChatMessage, ChatResponse
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm.exc import NoResultFound
+from sqlalchemy.pool import StaticPool
 
+from app import db
+from app.db import get_session, init_schema
 from app.main import app as fastapi_app
+from app.services import ats, pdf, pdf_import
+from app.services.config import clear_config_cache
+from app.services.resume import clear_resume_cache, create_resume
+from app.utils import disconnect
+from app.utils.disk_cache import DiskLRUCache
+
+
+@pytest.fixture(autouse=True)
+def reset_process_caches():
+    """Keeps the process-wide caches from leaking between tests and their databases."""
+    clear_config_cache()
+    clear_resume_cache()
+    yield
+    clear_config_cache()
+    clear_resume_cache()
 
 
 @pytest_asyncio.fixture(scope="function")
@@ -17,6 +39,18 @@ async def mock_session():
     return AsyncMock()
 
 
+@pytest_asyncio.fixture(scope="function")
+async def db_session():
+    """Provides a real AsyncSession bound to a fresh in-memory SQLite database."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(init_schema)
+    session_factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    async with session_factory() as session:
+        yield session
+    await engine.dispose()
+
+
 @pytest.fixture(scope="session")
 def client():
     """Provides a FastAPI TestClient instance."""
@@ -28,6 +62,30 @@ def client():
         yield None
 
 
+@pytest_asyncio.fixture(scope="function")
+async def api_client(db_session):
+    """Provides an async HTTP client for the app with get_session bound to the in-memory db_session."""
+
+    async def _get_test_session():
+        yield db_session
+
+    fastapi_app.dependency_overrides[get_session] = _get_test_session
+    transport = httpx.ASGITransport(app=fastapi_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+        yield async_client
+    fastapi_app.dependency_overrides.pop(get_session, None)
+
+
+@pytest.fixture(scope="function")
+def local_pdf_rendering(tmp_path, monkeypatch):
+    """Renders PDFs in a thread (no worker processes) into a temporary cache; returns the pool for its stats."""
+    pool = pdf.PdfRenderPool(workers=0, max_jobs_per_worker=0, max_rss_mb=0)
+    monkeypatch.setattr(pdf, "pdf_render_pool", pool)
+    monkeypatch.setattr(pdf, "pdf_cache", DiskLRUCache(tmp_path, 1024 * 1024, suffix=".pdf"))
+    monkeypatch.setattr(pdf, "pdf_render_jobs", pdf.PdfRenderJobs(max_pending=4))
+    return pool
+
+
 @pytest.fixture(scope="function")
 def valid_personal_info() -> Dict[str, Any]:
     """Provides a valid PersonalInfo data dictionary."""
@@ -229,6 +287,33 @@ def sample_resume_data(
     }
 
 
+@pytest_asyncio.fixture(scope="function")
+async def stored_resume(db_session, sample_resume_data):
+    """Persists sample_resume_data (minus fields the tables don't have) and returns the Resume row."""
+    data = {key: value for key, value in sample_resume_data.items() if key != "id"}
+    data["personal_info"] = {key: value for key, value in data["personal_info"].items() if key != "phone"}
+    return await create_resume(db_session, "Stored Resume", data)
+
+
+@pytest.fixture(scope="function")
+def sample_orm_resume(sample_resume_data):
+    """Provides a transient (never persisted) SQLAlchemy Resume graph built from sample_resume_data."""
+    personal_info = {key: value for key, value in sample_resume_data["personal_info"].items() if key != "phone"}
+    return db.Resume(
+        id=sample_resume_data["id"],
+        name="Sample Resume",
+        personal_info=db.PersonalInfo(id=1, resume_id=1, **personal_info),
+        skills=db.SkillSet(id=1, resume_id=1, **sample_resume_data["skills"]),
+        experience=[
+            db.Experience(id=i, resume_id=1, **exp) for i, exp in enumerate(sample_resume_data["experience"])
+        ],
+        projects=[db.Project(id=i, resume_id=1, **proj) for i, proj in enumerate(sample_resume_data["projects"])],
+        education=[
+            db.Education(id=i, resume_id=1, **edu) for i, edu in enumerate(sample_resume_data["education"])
+        ],
+    )
+
+
 @pytest.fixture(scope="function")
 def missing_resume_section_data() -> Dict[str, Any]:
     """Provides resume data missing a required section (personal_info)."""
@@ -399,6 +484,138 @@ def llm_response_missing_sections() -> str:
     return "Optimized Resume:\nPersonal Info:\nName: John Doe"
 
 
+class FakeLLM:
+    """Stand-in for the OpenAI client returned by get_llm().
+
+    Each call's completion is reply(messages, call_number), or reply itself when it is a string; a reply
+    function may raise to fail the call. achat() answers after delay seconds and astream_chat() spreads the
+    completion over that time in pieces of piece_size characters. Records every call's messages, the calls
+    cancelled while waiting, and the most calls in flight at once.
+    """
+
+    def __init__(
+        self,
+        reply: Union[str, Callable[[List[ChatMessage], int], str]] = lambda messages, call: f"<p>call {call}</p>",
+        delay: float = 0.0,
+        piece_size: int = 4,
+    ):
+        self.reply = reply
+        self.delay = delay
+        self.piece_size = piece_size
+        self.output_cls = None
+        self.messages: List[List[ChatMessage]] = []
+        self.cancelled = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def as_structured_llm(self, output_cls):
+        """Like the real client's: completions are then JSON, answered parsed into output_cls as .raw"""
+        self.output_cls = output_cls
+        return self
+
+    @property
+    def calls(self) -> int:
+        return len(self.messages)
+
+    def _start(self, messages) -> int:
+        self.messages.append(messages)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        return self.calls
+
+    async def _wait(self, seconds: float) -> None:
+        try:
+            await asyncio.sleep(seconds)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+    def _content(self, messages, call: int) -> str:
+        return self.reply if isinstance(self.reply, str) else self.reply(messages, call)
+
+    async def achat(self, messages):
+        call = self._start(messages)
+        try:
+            await self._wait(self.delay)
+            content = self._content(messages, call)
+        finally:
+            self.in_flight -= 1
+        raw = self.output_cls.model_validate_json(content) if self.output_cls else None
+        return ChatResponse(message=ChatMessage(role="assistant", content=content), raw=raw)
+
+    async def astream_chat(self, messages):
+        call = self._start(messages)
+
+        async def pieces():
+            try:
+                content = self._content(messages, call)
+                starts = range(0, len(content), self.piece_size)
+                for start in starts:
+                    await self._wait(self.delay / len(starts))
+                    end = start + self.piece_size
+                    piece = content[start:end]
+                    yield ChatResponse(message=ChatMessage(role="assistant", content=piece), delta=piece)
+            finally:
+                self.in_flight -= 1
+
+        return pieces()
+
+
+@pytest.fixture(scope="function")
+def fake_llm(request, monkeypatch):
+    """Provides a FakeLLM standing in for the app's LLM client; indirect parametrization passes its options,
+    e.g. @pytest.mark.parametrize("fake_llm", [{"delay": 0.1}], indirect=True)."""
+    llm = FakeLLM(**getattr(request, "param", {}))
+    monkeypatch.setattr(ats, "get_llm", lambda *args, **kwargs: llm)
+    monkeypatch.setattr(pdf_import, "get_llm", lambda *args, **kwargs: llm)
+    return llm
+
+
+@pytest.fixture(scope="function")
+def leaving_client(api_client, monkeypatch):
+    """Provides send(method, url, leave_after, **request_options), which calls the app like api_client does
+    but has the client disconnect leave_after seconds into the request; it returns the response status."""
+    monkeypatch.setattr(disconnect, "DISCONNECT_POLL_SECONDS", 0.01)
+
+    async def send(method: str, url: str, leave_after: float, **request_options) -> int:
+        request = api_client.build_request(method, url, **request_options)
+        body = request.read()
+        loop = asyncio.get_running_loop()
+        leaves_at = loop.time() + leave_after
+        pending = [{"type": "http.request", "body": body, "more_body": False}]
+        messages = []
+
+        async def receive():
+            if pending:
+                return pending.pop()
+            # Request.is_disconnected() cancels a receive() that would wait, so until then it sees no message
+            if loop.time() < leaves_at:
+                await asyncio.sleep(leaves_at - loop.time())
+            return {"type": "http.disconnect"}
+
+        async def send_message(message):
+            messages.append(message)
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": request.url.path,
+            "raw_path": request.url.raw_path.split(b"?")[0],
+            "query_string": request.url.query,
+            "root_path": "",
+            "headers": [(name.lower(), value) for name, value in request.headers.raw],
+            "client": ("testclient", 50000),
+            "server": ("test", 80),
+        }
+        await fastapi_app(scope, receive, send_message)
+        return next(message["status"] for message in messages if message["type"] == "http.response.start")
+
+    return send
+
+
 def _create_mock_fixture(is_async: bool = True, side_effect=None):
     mock_type = AsyncMock if is_async else MagicMock
     mock = mock_type()
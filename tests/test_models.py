@@ -11,6 +11,8 @@ from app.models import (
     Project,
     Resume,
     SkillSet,
+    db_resume_to_dict,
+    trusted_resume_to_dict,
 )
 
 
@@ -195,3 +197,13 @@ def test_ai_points_request_invalid_type_num_points(invalid_ai_points_type_num_da
     """Test AIPointsRequest raises ValidationError for incorrect num_points type."""
     with pytest.raises(ValidationError):
         AIPointsRequest(**invalid_ai_points_type_num_data)
+
+
+@pytest.mark.asyncio
+async def test_trusted_resume_to_dict_matches_validated(sample_orm_resume):
+    """Test the unvalidated fast path produces exactly what the Pydantic round trip produces."""
+    validated = await db_resume_to_dict(sample_orm_resume)
+    trusted = trusted_resume_to_dict(sample_orm_resume)
+    assert trusted == validated
+    assert list(trusted) == list(validated)
+    assert list(trusted["experience"][0]) == list(validated["experience"][0])
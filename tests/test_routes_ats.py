@@ -1,7 +1,19 @@
 """Test suite for ATS API endpoints (app.routes.ats)."""
 
+import asyncio
+import json
+
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.db import OptimizedResume, Resume
+from app.routes import ats as ats_routes
+from app.services import ats
+from app.services.ats import get_optimized_resume_html, save_optimized_resume
+from app.services.config import save_ats_settings
+from app.utils import disconnect
+from app.utils.disconnect import ClientDisconnected, cancel_on_disconnect, client_disconnect_stats
 
 # Note: Fixtures like client, mock_get_or_create_resume, mock_optimize_resume etc.
 # would be defined in tests/conftest.py
@@ -23,3 +35,210 @@ async def test_ats_optimize_error_during_optimization(
     client: TestClient, mock_get_or_create_resume, mock_optimize_resume_error
 ):
     """Test GET /api/ats/optimize returns 500 if optimization service fails."""
+
+
+def _parse_events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+class _LeavingClient:
+    """Stand-in for a Request whose client disconnects after a number of checks."""
+
+    def __init__(self, checks_before_leaving: int):
+        self.checks_left = checks_before_leaving
+
+    async def is_disconnected(self) -> bool:
+        self.checks_left -= 1
+        return self.checks_left < 0
+
+
+@pytest.mark.asyncio
+async def test_cancel_on_disconnect_cancels_work_when_client_leaves(monkeypatch):
+    """Test work is cancelled and counted once the client is gone, and finishes normally otherwise."""
+    monkeypatch.setattr(disconnect, "DISCONNECT_POLL_SECONDS", 0.01)
+    cancelled = asyncio.Event()
+
+    async def slow_llm_call():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(ClientDisconnected):
+        await cancel_on_disconnect(_LeavingClient(2), slow_llm_call(), "test_llm")
+    assert cancelled.is_set()
+    assert client_disconnect_stats()["test_llm"]["cancelled"] == 1
+
+    async def quick_llm_call():
+        await asyncio.sleep(0.03)
+        return "<p>done</p>"
+
+    assert await cancel_on_disconnect(_LeavingClient(100), quick_llm_call(), "test_llm") == "<p>done</p>"
+    assert client_disconnect_stats()["test_llm"]["completed"] == 1
+
+
+# --- Test GET /api/resumes/{resume_id}/optimize ---
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fake_llm", [{"delay": 10}], indirect=True)
+async def test_optimize_cancels_llm_call_when_client_leaves(db_session, stored_resume, fake_llm, leaving_client):
+    """Test a client leaving mid-optimization gets 499, its LLM call is cancelled and nothing is stored."""
+    status = await leaving_client("GET", f"/api/resumes/{stored_resume.id}/optimize", leave_after=0.05)
+    assert status == 499
+    assert fake_llm.calls == 1 and fake_llm.cancelled == 1
+    assert (await db_session.execute(select(OptimizedResume))).scalars().all() == []
+
+
+# --- Test GET /api/resumes/{resume_id}/optimize/stream ---
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "fake_llm", [{"reply": "```html\n<h1>Optimized</h1>\n<p>Streamed</p>\n```"}], indirect=True
+)
+async def test_optimize_stream_sends_html_then_stored_result_id(
+    api_client, db_session, stored_resume, local_pdf_rendering, fake_llm
+):
+    """Test the stream carries the cleaned HTML in pieces, then the id it was stored under; a repeat is
+    answered from the LLM cache."""
+    url = f"/api/resumes/{stored_resume.id}/optimize/stream"
+
+    response = await api_client.get(url)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _parse_events(response.text)
+    chunks = [data["html"] for event, data in events if event == "chunk"]
+    assert len(chunks) > 1
+    assert "".join(chunks) == "\n<h1>Optimized</h1>\n<p>Streamed</p>\n"
+    assert events[-1][0] == "done"
+    result_id = events[-1][1]["result_id"]
+    assert await get_optimized_resume_html(db_session, stored_resume.id, result_id) == "".join(chunks)
+
+    repeat = _parse_events((await api_client.get(url)).text)
+    assert [event for event, _ in repeat] == ["chunk", "done"]
+    assert repeat[-1][1]["result_id"] == result_id
+    assert fake_llm.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_optimize_reports_truncated_job_description(
+    api_client, db_session, stored_resume, local_pdf_rendering, fake_llm, monkeypatch
+):
+    """Test the preview and the stream's done event say when the job description was cut to the budget."""
+    await save_ats_settings(db_session, "Build reliable distributed systems. " * 400, "Optimize it.")
+    notice = "only its beginning was used"
+
+    assert notice not in (await api_client.get(f"/api/resumes/{stored_resume.id}/optimize")).text
+    events = _parse_events((await api_client.get(f"/api/resumes/{stored_resume.id}/optimize/stream")).text)
+    assert events[-1][1]["job_description_truncated"] is False
+
+    monkeypatch.setattr(ats, "ATS_PROMPT_TOKEN_BUDGET", 1500)
+    assert notice in (await api_client.get(f"/api/resumes/{stored_resume.id}/optimize")).text
+    events = _parse_events((await api_client.get(f"/api/resumes/{stored_resume.id}/optimize/stream")).text)
+    assert events[-1][1]["job_description_truncated"] is True
+
+
+@pytest.mark.asyncio
+async def test_optimize_fails_when_resume_leaves_no_room_for_job(
+    api_client, db_session, stored_resume, fake_llm, monkeypatch
+):
+    """Test a resume over the prompt budget is refused up front, by status or a "failed" event, without a call."""
+    monkeypatch.setattr(ats, "ATS_PROMPT_TOKEN_BUDGET", 50)
+
+    response = await api_client.get(f"/api/resumes/{stored_resume.id}/optimize")
+    assert response.status_code == 422
+    assert "no room for the job description" in response.json()["detail"]
+    events = _parse_events((await api_client.get(f"/api/resumes/{stored_resume.id}/optimize/stream")).text)
+    assert [event for event, _ in events] == ["failed"]
+    assert "no room for the job description" in events[0][1]["detail"]
+    assert fake_llm.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_optimize_stream_unknown_resume(api_client):
+    """Test an unknown resume is a 404 before any event is sent."""
+    assert (await api_client.get("/api/resumes/999/optimize/stream")).status_code == 404
+
+
+# --- Test POST /api/resumes/{resume_id}/optimize/batch ---
+def _echo_job(messages, call: int) -> str:
+    return f"<p>{messages[-1].content.split('#job_description')[1].split()[0]}</p>"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fake_llm", [{"reply": _echo_job}], indirect=True)
+async def test_batch_optimize_streams_a_stored_result_per_job(api_client, db_session, stored_resume, fake_llm):
+    """Test each job description gets its own line with a stored result, and limits are enforced."""
+    url = f"/api/resumes/{stored_resume.id}/optimize/batch"
+
+    response = await api_client.post(url, json={"job_descriptions": ["backend", "frontend", "data"]})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["index"] for line in lines) == [0, 1, 2]
+    for line in lines:
+        assert await get_optimized_resume_html(db_session, stored_resume.id, line["result_id"]) == line["html"]
+        assert line["job_description_truncated"] is False
+    assert {line["html"] for line in lines} == {"<p>backend</p>", "<p>frontend</p>", "<p>data</p>"}
+
+    assert (await api_client.post(url, json={"job_descriptions": []})).status_code == 422
+    too_many = {"job_descriptions": ["x"] * (ats.ATS_BATCH_MAX_JOBS + 1)}
+    assert (await api_client.post(url, json=too_many)).status_code == 422
+    missing = {"job_descriptions": ["backend"]}
+    assert (await api_client.post("/api/resumes/999/optimize/batch", json=missing)).status_code == 404
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fake_llm", [{"reply": _echo_job}], indirect=True)
+async def test_batch_optimize_holds_no_session_between_results(api_client, stored_resume, fake_llm, monkeypatch):
+    """Test each result is stored in a short session of its own, closed before the next result arrives."""
+    saves = []
+
+    async def save(session, resume_id, html):
+        saves.append((session, await save_optimized_resume(session, resume_id, html)))
+        return saves[-1][1]
+
+    monkeypatch.setattr(ats_routes, "save_optimized_resume", save)
+    url = f"/api/resumes/{stored_resume.id}/optimize/batch"
+    response = await api_client.post(url, json={"job_descriptions": ["backend", "frontend", "data"]})
+    assert len(response.text.splitlines()) == 3
+    assert len({id(session) for session, _ in saves}) == 3
+    assert not any(session.in_transaction() for session, _ in saves)
+
+
+# --- Test POST /api/resumes/{resume_id}/download-ats-pdf ---
+@pytest.mark.asyncio
+async def test_download_ats_pdf_by_result_id(api_client, db_session, stored_resume, local_pdf_rendering):
+    """Test the PDF is built from a stored optimization result referenced by id."""
+    result_id = await save_optimized_resume(db_session, stored_resume.id, "<h1>Optimized</h1>")
+    response = await api_client.post(
+        f"/api/resumes/{stored_resume.id}/download-ats-pdf", data={"result_id": result_id}
+    )
+    assert response.status_code == 200
+    assert response.content.startswith(b"%PDF")
+    assert response.headers["content-disposition"].startswith("attachment")
+
+
+@pytest.mark.asyncio
+async def test_download_ats_pdf_unknown_result_id(api_client, stored_resume, local_pdf_rendering):
+    """Test an unknown result id is a 404 and a request without content is rejected."""
+    url = f"/api/resumes/{stored_resume.id}/download-ats-pdf"
+    assert (await api_client.post(url, data={"result_id": "0" * 64})).status_code == 404
+    assert (await api_client.post(url, data={})).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_download_ats_pdf_of_another_resumes_result(
+    api_client, db_session, stored_resume, local_pdf_rendering
+):
+    """Test a result id is only accepted under the resume it was stored for."""
+    other = Resume(name="Other Resume")
+    db_session.add(other)
+    await db_session.commit()
+    result_id = await save_optimized_resume(db_session, other.id, "<h1>Someone else</h1>")
+    response = await api_client.post(
+        f"/api/resumes/{stored_resume.id}/download-ats-pdf", data={"result_id": result_id}
+    )
+    assert response.status_code == 404
@@ -0,0 +1,73 @@
+"""Test suite for configuration API endpoints (app.routes.config)."""
+
+import asyncio
+import json
+
+import fitz
+import pytest
+from sqlalchemy import select
+
+from app import models
+from app.db import Resume
+from app.services import pdf_import
+from app.services.resume import create_resume
+
+
+def _resume_pdf() -> bytes:
+    with fitz.open() as document:
+        document.new_page().insert_text((72, 72), "Jane Doe - Software Engineer")
+        return document.tobytes()
+
+
+def _import_request(name: str):
+    return {
+        "data": {"resume_name": name},
+        "files": {"resume_file": ("resume.pdf", _resume_pdf(), "application/pdf")},
+    }
+
+
+async def _resume_names(db_session):
+    return (await db_session.execute(select(Resume.name))).scalars().all()
+
+
+# --- Test POST /api/config/import-resume ---
+@pytest.mark.asyncio
+async def test_import_resume_stores_parsed_resume(api_client, db_session, fake_llm, sample_resume_data):
+    """Test the PDF's text is parsed by the LLM and stored as a new resume."""
+    fake_llm.reply = json.dumps(sample_resume_data)
+    response = await api_client.post("/api/config/import-resume", **_import_request("Imported"))
+    assert response.status_code == 200
+    assert "Jane Doe" in fake_llm.messages[0][0].content
+    assert await _resume_names(db_session) == ["Imported"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fake_llm", [{"delay": 10}], indirect=True)
+async def test_import_resume_cancels_llm_call_when_client_leaves(db_session, fake_llm, leaving_client):
+    """Test a client leaving while the resume is parsed gets 499, the LLM call is cancelled and no resume
+    is written."""
+    status = await leaving_client("POST", "/api/config/import-resume", 0.05, **_import_request("Abandoned"))
+    assert status == 499
+    assert fake_llm.calls == 1 and fake_llm.cancelled == 1
+    assert await _resume_names(db_session) == []
+
+
+@pytest.mark.asyncio
+async def test_imported_resume_write_survives_cancellation(db_session, sample_resume_data, monkeypatch):
+    """Test cancelling the import while its resume is being written lets the write finish first."""
+    writing = asyncio.Event()
+
+    async def slow_create_resume(session, name, data):
+        writing.set()
+        await asyncio.sleep(0.05)
+        return await create_resume(session, name, data)
+
+    monkeypatch.setattr(pdf_import, "create_resume", slow_create_resume)
+    task = asyncio.create_task(
+        pdf_import.save_imported_resume(db_session, "Kept", models.Resume.model_validate(sample_resume_data))
+    )
+    await writing.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert await _resume_names(db_session) == ["Kept"]
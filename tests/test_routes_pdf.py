@@ -0,0 +1,150 @@
+"""Test suite for the standard resume PDF export (app.routes.pdf)."""
+
+import asyncio
+import io
+import struct
+import zipfile
+
+import pytest
+
+from app.db import session_factory_for
+from app.services import pdf, pdf_export
+from app.services.pdf import render_resume_pdf_file
+from app.services.resume import create_resume, delete_resume_by_id, update_personal_info
+
+
+@pytest.mark.asyncio
+async def test_resume_pdf_cached_until_revision_changes(
+    api_client, db_session, stored_resume, local_pdf_rendering
+):
+    """Test an unchanged resume is rendered once, and an edit makes the next download render again."""
+    url = f"/api/resumes/{stored_resume.id}/pdf"
+    first = await api_client.get(url)
+    second = await api_client.get(url)
+
+    assert first.status_code == 200
+    assert first.content.startswith(b"%PDF")
+    assert first.headers["content-disposition"] == "attachment;filename=resume_Stored Resume.pdf"
+    assert second.content == first.content
+    assert local_pdf_rendering.stats()["completed"] == 1
+
+    await update_personal_info(db_session, stored_resume.id, "name", "Renamed Person")
+    third = await api_client.get(url)
+    assert third.status_code == 200
+    assert local_pdf_rendering.stats()["completed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_resume_pdf_of_deleted_resume_is_not_served_again(
+    api_client, db_session, stored_resume, sample_resume_data, local_pdf_rendering
+):
+    """Test a resume created after the newest one is deleted gets its own PDF, not the deleted one's."""
+    data = {key: value for key, value in sample_resume_data.items() if key != "id"}
+    data["personal_info"] = {key: value for key, value in data["personal_info"].items() if key != "phone"}
+    deleted = await create_resume(db_session, "Resume", data)
+    assert (await api_client.get(f"/api/resumes/{deleted.id}/pdf")).status_code == 200
+    await delete_resume_by_id(db_session, deleted.id)
+
+    created = await create_resume(db_session, "Resume", data)
+    assert (await api_client.get(f"/api/resumes/{created.id}/pdf")).status_code == 200
+    assert local_pdf_rendering.stats()["completed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_resume_pdf_not_found(api_client, local_pdf_rendering):
+    """Test an unknown resume is a 404."""
+    response = await api_client.get("/api/resumes/999/pdf")
+    assert response.status_code == 404
+
+
+# --- Test GET /api/resumes/export.zip ---
+@pytest.mark.asyncio
+async def test_export_zip_of_all_resumes(
+    api_client, db_session, stored_resume, sample_resume_data, local_pdf_rendering
+):
+    """Test every resume is exported as a stored PDF entry named after its id and name."""
+    data = {key: value for key, value in sample_resume_data.items() if key != "id"}
+    data["personal_info"] = {key: value for key, value in data["personal_info"].items() if key != "phone"}
+    other = await create_resume(db_session, "Stored Resume", data)
+
+    response = await api_client.get("/api/resumes/export.zip")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.testzip() is None
+        assert sorted(archive.namelist()) == [
+            f"{stored_resume.id}_Stored_Resume.pdf",
+            f"{other.id}_Stored_Resume.pdf",
+        ]
+        assert all(archive.read(name).startswith(b"%PDF") for name in archive.namelist())
+        assert {info.compress_type for info in archive.infolist()} == {zipfile.ZIP_STORED}
+
+
+@pytest.mark.asyncio
+async def test_export_zip_local_headers_carry_crc_and_sizes(api_client, stored_resume, local_pdf_rendering):
+    """Test entries have no data descriptor: each local header holds the CRC and sizes, for streaming readers."""
+    response = await api_client.get("/api/resumes/export.zip", params={"ids": [stored_resume.id]})
+
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        for info in archive.infolist():
+            fields = struct.unpack_from("<4s5H3L2H", response.content, info.header_offset)
+            signature, _, flags, _, _, _, crc, compressed_size, size, _, _ = fields
+            assert signature == b"PK\x03\x04"
+            assert flags & 0x08 == 0
+            assert (crc, compressed_size, size) == (info.CRC, info.compress_size, info.file_size)
+            assert size > 0
+
+
+@pytest.mark.asyncio
+async def test_export_zip_records_failed_render(api_client, stored_resume, local_pdf_rendering, monkeypatch):
+    """Test a resume that fails to render becomes an error note instead of aborting the archive."""
+
+    async def failing_render(session, resume_id):
+        raise RuntimeError("no fonts")
+
+    monkeypatch.setattr(pdf_export, "render_resume_pdf_file", failing_render)
+    response = await api_client.get("/api/resumes/export.zip", params={"ids": [stored_resume.id]})
+
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.namelist() == [f"{stored_resume.id}_Stored_Resume.error.txt"]
+        assert b"no fonts" in archive.read(archive.namelist()[0])
+
+
+@pytest.mark.asyncio
+async def test_export_zip_unknown_ids(api_client, stored_resume, local_pdf_rendering):
+    """Test unknown ids are rejected before anything is streamed."""
+    response = await api_client.get("/api/resumes/export.zip", params={"ids": [stored_resume.id, 998, 999]})
+    assert response.status_code == 404
+    assert "998, 999" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_export_zip_closed_early_releases_every_pdf(
+    db_session, stored_resume, sample_resume_data, local_pdf_rendering, monkeypatch
+):
+    """Test an export closed after its first file leaves no PDF pinned in the cache, including renders that
+    finished together with that file and were never written."""
+    data = {key: value for key, value in sample_resume_data.items() if key != "id"}
+    data["personal_info"] = {key: value for key, value in data["personal_info"].items() if key != "phone"}
+    resumes = {stored_resume.id: "Stored Resume"}
+    for name in ("Second", "Third"):
+        resumes[(await create_resume(db_session, name, data)).id] = name
+    rendered = []
+    finish = asyncio.Event()
+
+    async def gated_render(session, resume_id):
+        pdf_path = await render_resume_pdf_file(session, resume_id)
+        rendered.append(pdf_path)
+        await finish.wait()
+        return pdf_path
+
+    monkeypatch.setattr(pdf_export, "render_resume_pdf_file", gated_render)
+    export = pdf_export.stream_resume_pdfs_zip(session_factory_for(db_session), resumes, concurrency=3)
+    first_chunk = asyncio.create_task(export.__anext__())
+    while len(rendered) < 3:
+        await asyncio.sleep(0.01)
+    finish.set()  # All three finish at once, so one wait() hands back every task
+    assert await first_chunk
+    await export.aclose()
+    assert pdf.pdf_cache.stats()["pinned"] == 0
@@ -3,6 +3,8 @@
 import pytest
 from fastapi.testclient import TestClient
 
+from app.services.resume import create_resume, delete_resume_by_id
+
 # Note: Fixtures like client, mock_get_or_create_resume, mock_update_personal_info etc.
 # would be defined in tests/conftest.py
 
@@ -33,6 +35,35 @@ async def test_get_projects_section(client: TestClient, mock_get_or_create_resum
     """Test GET /api/resume/section/projects returns 200 OK."""
 
 
+# --- Test conditional GETs (ETag / If-None-Match) ---
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", ["section/experience", "section/skills", "preview"])
+async def test_fragment_not_modified_until_resume_changes(api_client, stored_resume, path):
+    """Test fragments answer 304 for a current ETag and a fresh 200 once the resume is edited."""
+    url = f"/api/resumes/{stored_resume.id}/{path}"
+    first = await api_client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    cached = await api_client.get(url, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    patched = await api_client.patch(f"/api/resumes/{stored_resume.id}/skills/tools", data={"value": "Changed"})
+    assert patched.status_code == 200
+    refreshed = await api_client.get(url, headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_fragment_etags_differ_per_template(api_client, stored_resume):
+    """Test two fragments of the same revision never share an ETag."""
+    skills = await api_client.get(f"/api/resumes/{stored_resume.id}/section/skills")
+    projects = await api_client.get(f"/api/resumes/{stored_resume.id}/section/projects")
+    assert skills.headers["etag"] != projects.headers["etag"]
+
+
 # --- Test PATCH /api/resume/personal_info/{field} ---
 @pytest.mark.asyncio
 async def test_update_personal_info_field_success(client: TestClient, mock_update_personal_info):
@@ -257,3 +288,20 @@ async def test_delete_experience_endpoint_not_found(client: TestClient, mock_del
 @pytest.mark.asyncio
 async def test_delete_experience_endpoint_server_error(client: TestClient, mock_delete_experience_error):
     """Test DELETE experience returns 500 on service error."""
+
+
+@pytest.mark.asyncio
+async def test_fragment_etag_of_deleted_resume_never_matches(
+    api_client, db_session, stored_resume, sample_resume_data
+):
+    """Test an ETag a browser kept for a deleted resume is not answered with 304 for the next new resume."""
+    data = {key: value for key, value in sample_resume_data.items() if key != "id"}
+    data["personal_info"] = {key: value for key, value in data["personal_info"].items() if key != "phone"}
+    deleted = await create_resume(db_session, "Resume", data)
+    etag = (await api_client.get(f"/api/resumes/{deleted.id}/preview")).headers["etag"]
+    await delete_resume_by_id(db_session, deleted.id)
+
+    created = await create_resume(db_session, "Resume", data)
+    response = await api_client.get(f"/api/resumes/{created.id}/preview", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
@@ -1,6 +1,31 @@
 """Test suite for ATS service functions (app.services.ats)."""
 
+import contextlib
+import json
+
 import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import NoResultFound
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db import OptimizedResume, Resume
+from app.services import ats
+from app.services.ats import (
+    HtmlFenceStripper,
+    PromptBudgetExceeded,
+    _fit_user_message,
+    _parse_llm_response,
+    build_user_message,
+    get_optimized_resume_html,
+    optimize_resume,
+    optimize_resume_for_jobs,
+    save_optimized_resume,
+    stream_optimized_resume,
+)
+from app.services.config import save_ats_settings
+from app.services.llm import count_tokens
+from app.services.resume import add_experience, delete_resume_by_id, update_experience_field
+from app.utils.rate_limit import TokenRateLimiter
 
 # Note: Fixtures like mock_litellm_acompletion, sample_resume_data etc.
 # would be defined in tests/conftest.py
@@ -23,6 +48,62 @@ def test_create_ats_prompt_handles_missing_sections(
     """Test prompt generation handles missing resume sections."""
 
 
+@pytest.mark.asyncio
+async def test_build_user_message_is_compact(sample_resume_data):
+    """Test the prompt carries the resume as minified JSON without internal ids, in fewer tokens than
+    indented JSON."""
+    resume_data = {
+        **sample_resume_data,
+        "experience": [{**item, "id": 7, "resume_id": 1} for item in sample_resume_data["experience"]],
+    }
+    message = await build_user_message(resume_data, "Senior engineer")
+
+    assert '"id"' not in message and '"resume_id"' not in message
+    assert "\n  " not in message
+    assert message.rstrip().endswith("#job_description\nSenior engineer")
+    assert sample_resume_data["experience"][0]["title"] in message
+    assert count_tokens(message) < count_tokens(json.dumps(resume_data, indent=2))
+
+
+@pytest.mark.asyncio
+async def test_fit_user_message_truncates_to_token_budget(sample_resume_data, monkeypatch):
+    """Test an oversized prompt gives up the end of the job description, and never resume entries; a resume
+    leaving no room for any of the job description is an error."""
+    job_description = "Build reliable distributed systems. " * 400
+    full = await build_user_message(sample_resume_data, job_description)
+    resume_only = await build_user_message(sample_resume_data, "")
+
+    assert await _fit_user_message("system", sample_resume_data, job_description) == (full, False)
+
+    monkeypatch.setattr(ats, "ATS_PROMPT_TOKEN_BUDGET", count_tokens("system") + count_tokens(resume_only) + 50)
+    fitted, truncated = await _fit_user_message("system", sample_resume_data, job_description)
+    assert truncated
+    assert count_tokens("system") + count_tokens(fitted) <= ats.ATS_PROMPT_TOKEN_BUDGET
+    assert fitted.rstrip().endswith("[truncated]")
+    assert fitted.startswith(resume_only.rsplit("#job_description", 1)[0])
+    assert len(fitted) < len(full)
+
+    for no_room in (count_tokens(resume_only) - 5, count_tokens("system") + count_tokens(resume_only) + 2):
+        monkeypatch.setattr(ats, "ATS_PROMPT_TOKEN_BUDGET", no_room)
+        with pytest.raises(PromptBudgetExceeded, match="no room for the job description"):
+            await _fit_user_message("system", sample_resume_data, job_description)
+
+
+@pytest.mark.asyncio
+async def test_optimizations_report_truncated_job_description(db_session, stored_resume, fake_llm, monkeypatch):
+    """Test whole-document, section and batch optimizations tell whether their prompts cut the job description."""
+    session_factory = async_sessionmaker(db_session.bind, class_=AsyncSession, expire_on_commit=False)
+    await save_ats_settings(db_session, "Build reliable distributed systems. " * 400, "Optimize it.")
+    assert (await optimize_resume(db_session, stored_resume.id))[1] is False
+
+    monkeypatch.setattr(ats, "ATS_PROMPT_TOKEN_BUDGET", 1500)
+    assert (await optimize_resume(db_session, stored_resume.id))[1] is True
+    assert (await optimize_resume(db_session, stored_resume.id, by_section=True))[1] is True
+    jobs = ["Backend role", "Build reliable distributed systems. " * 400]
+    results = [item async for item in optimize_resume_for_jobs(session_factory, stored_resume.id, jobs)]
+    assert sorted((index, truncated) for index, _, truncated in results) == [(0, False), (1, True)]
+
+
 # --- Test _parse_llm_response ---
 def test_parse_llm_response_success(sample_llm_response_content, sample_resume_data):
     """Test parsing a well-formed LLM response."""
@@ -38,6 +119,17 @@ def test_parse_llm_response_handles_missing_sections_in_response(
     """Test parsing handles responses where the LLM omitted sections."""
 
 
+def test_html_fence_stripper_matches_whole_text_parsing():
+    """Test fences split across pieces anywhere are stripped exactly as when parsing the whole text."""
+    content = "```html\n<h1>Jane</h1>\n<code>`x`</code>\n```\n``````html<p>ht</p>```"
+    expected = _parse_llm_response(content)
+    for size in range(1, len(content) + 1):
+        stripper = HtmlFenceStripper()
+        starts = range(0, len(content), size)
+        pieces = [stripper.feed(content[start:end]) for start, end in zip(starts, [*starts[1:], None])]
+        assert "".join(pieces) + stripper.flush() == expected
+
+
 # --- Test optimize_resume ---
 @pytest.mark.asyncio
 async def test_optimize_resume_success(mock_litellm_acompletion, sample_resume_data, sample_llm_response_content):
@@ -59,3 +151,176 @@ async def test_optimize_resume_parsing_error(
 @pytest.mark.asyncio
 async def test_optimize_resume_error_getting_resume(mock_get_or_create_resume_error):
     """Test handling when the initial resume retrieval fails."""
+
+
+@pytest.mark.asyncio
+async def test_optimize_resume_answers_repeats_from_cache(db_session, stored_resume, fake_llm):
+    """Test an unchanged resume and job reuse the cached completion, and refresh or a new job asks again."""
+    first = await optimize_resume(db_session, stored_resume.id)
+    assert await optimize_resume(db_session, stored_resume.id) == first
+    assert fake_llm.calls == 1
+
+    refreshed = await optimize_resume(db_session, stored_resume.id, refresh=True)
+    assert fake_llm.calls == 2
+    assert refreshed != first
+    assert await optimize_resume(db_session, stored_resume.id) == refreshed
+
+    await save_ats_settings(db_session, "Senior platform engineer", "Optimize it.")
+    await optimize_resume(db_session, stored_resume.id)
+    assert fake_llm.calls == 3
+
+
+def _section_of(messages) -> str:
+    return messages[-1].content.splitlines()[1].split()[0].lstrip("#")
+
+
+def _echo_section(messages, call: int) -> str:
+    return f"```html\n<div>{_section_of(messages)} v{call}</div>\n```"
+
+
+@pytest.mark.parametrize("fake_llm", [{"reply": _echo_section}], indirect=True)
+@pytest.mark.asyncio
+async def test_optimize_resume_by_section_reuses_unchanged_sections(db_session, stored_resume, fake_llm):
+    """Test each section is its own call stitched in document order, and an edit re-asks only its entry."""
+    await add_experience(db_session, stored_resume.id)
+    await update_experience_field(db_session, stored_resume.id, 2, "title", "Staff Engineer")
+
+    prompts_before = ats.ats_prompt_stats()["prompts"]
+    html, _ = await optimize_resume(db_session, stored_resume.id, by_section=True)
+    assert sorted(map(_section_of, fake_llm.messages)) == sorted(
+        ["personal_info", "experience", "experience", "projects", "skills", "education"]
+    )
+    headings = ["<h2>Experience</h2>", "<h2>Projects</h2>", "<h2>Skills</h2>", "<h2>Education</h2>"]
+    positions = [html.index(heading) for heading in headings]
+    assert positions == sorted(positions)
+    assert html.index("personal_info v") < positions[0]
+    assert "```" not in html
+
+    await update_experience_field(db_session, stored_resume.id, 2, "title", "Principal Engineer")
+    edited, _ = await optimize_resume(db_session, stored_resume.id, by_section=True)
+    assert [_section_of(messages) for messages in fake_llm.messages[6:]] == ["experience"]
+    assert ats.ats_prompt_stats()["prompts"] - prompts_before == 7  # Sections from the cache are not counted
+    assert edited.count(" v7</div>") == 1
+    assert edited.replace(" v7</div>", "").count("</div>") == html.count("</div>") - 1
+
+
+@pytest.mark.asyncio
+async def test_stream_by_section_holds_no_session_while_generating(db_session, stored_resume, fake_llm):
+    """Test streaming by section reads in a short session that is closed before the LLM is called."""
+    base_factory = async_sessionmaker(db_session.bind, class_=AsyncSession, expire_on_commit=False)
+    events = []
+
+    @contextlib.asynccontextmanager
+    async def session_factory():
+        number = sum(1 for event in events if event[0] == "open")
+        events.append(("open", number))
+        try:
+            async with base_factory() as session:
+                yield session
+        finally:
+            events.append(("close", number))
+
+    def reply(messages, call):
+        events.append(("call", None))
+        return _echo_section(messages, call)
+
+    fake_llm.reply = reply
+
+    pieces = [
+        html async for html, _ in stream_optimized_resume(session_factory, stored_resume.id, by_section=True)
+    ]
+    assert "<h2>Experience</h2>" in "".join(pieces)
+    # The first session reads the resume and the cache; later ones are the calls' short cache writes
+    assert events.index(("close", 0)) < events.index(("call", None))
+
+
+def _echo_job(messages, call: int) -> str:
+    job = messages[-1].content.split("#job_description")[1].split()[0]
+    if job == "broken":
+        raise RuntimeError("model overloaded")
+    return f"```html<p>{job}</p>```"
+
+
+@pytest.mark.parametrize("fake_llm", [{"reply": _echo_job, "delay": 0.1}], indirect=True)
+@pytest.mark.asyncio
+async def test_optimize_resume_for_jobs_runs_bounded_concurrently(db_session, stored_resume, fake_llm):
+    """Test jobs overlap up to the concurrency limit, each yields its own result, and a failure is reported
+    for its job without ending the batch."""
+    session_factory = async_sessionmaker(db_session.bind, class_=AsyncSession, expire_on_commit=False)
+    jobs = ["alpha", "beta", "broken", "gamma", "delta", "epsilon"]
+
+    batch = optimize_resume_for_jobs(session_factory, stored_resume.id, jobs, concurrency=3)
+    results = {index: result async for index, result, _ in batch}
+
+    assert fake_llm.max_in_flight == 3
+    assert isinstance(results.pop(2), RuntimeError)
+    assert results == {index: f"<p>{job}</p>" for index, job in enumerate(jobs) if job != "broken"}
+
+
+@pytest.mark.asyncio
+async def test_token_rate_limiter_waits_for_refill():
+    """Test calls within the bucket pass at once and a call beyond it waits for the refill."""
+    now = [0.0]
+    sleeps = []
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    limiter = TokenRateLimiter(tokens_per_minute=6000, clock=lambda: now[0], sleep=sleep)  # 100 tokens a second
+    await limiter.acquire(5990)
+    assert sleeps == []
+    now[0] += 0.05  # 5 tokens refilled, 15 available
+    await limiter.acquire(20)
+    assert sleeps == [pytest.approx(0.05)]
+    assert limiter.stats()["waits"] == 1
+    await limiter.acquire(10**9)  # More than the whole bucket: waits for a full one
+    assert sleeps[-1] == pytest.approx(60)
+
+    unlimited = TokenRateLimiter(tokens_per_minute=0)
+    await unlimited.acquire(10**9)
+    assert unlimited.stats()["waits"] == 0
+
+
+# --- Test optimization result storage ---
+@pytest.mark.asyncio
+async def test_save_optimized_resume_round_trip_and_dedupe(db_session, stored_resume):
+    """Test results are stored compressed under their hash, and identical HTML takes one row."""
+    html = "<h1>Jane Doe</h1>" + "<p>Shipped things.</p>" * 200
+    first_id = await save_optimized_resume(db_session, stored_resume.id, html)
+    second_id = await save_optimized_resume(db_session, stored_resume.id, html)
+
+    assert first_id == second_id
+    assert len(first_id) == 64
+    assert await get_optimized_resume_html(db_session, stored_resume.id, first_id) == html
+    stored = (await db_session.execute(select(OptimizedResume.html))).scalars().all()
+    assert len(stored) == 1
+    assert len(stored[0]) < len(html) / 10
+
+
+@pytest.mark.asyncio
+async def test_optimized_results_belong_to_their_resume(db_session, stored_resume):
+    """Test identical HTML of two resumes is stored for each, looked up per resume, and deleted with its own."""
+    other = Resume(name="Other Resume")
+    db_session.add(other)
+    await db_session.commit()
+    result_id = await save_optimized_resume(db_session, stored_resume.id, "<p>same</p>")
+    assert await save_optimized_resume(db_session, other.id, "<p>same</p>") == result_id
+
+    await delete_resume_by_id(db_session, other.id)
+    assert await get_optimized_resume_html(db_session, stored_resume.id, result_id) == "<p>same</p>"
+    with pytest.raises(NoResultFound):
+        await get_optimized_resume_html(db_session, other.id, result_id)
+
+
+@pytest.mark.asyncio
+async def test_save_optimized_resume_prunes_old_results(db_session, stored_resume, monkeypatch):
+    """Test only the newest results of a resume are kept."""
+    monkeypatch.setattr(ats, "OPTIMIZED_RESULTS_PER_RESUME", 2)
+    result_ids = [await save_optimized_resume(db_session, stored_resume.id, f"<p>{n}</p>") for n in range(4)]
+
+    count = await db_session.scalar(select(func.count()).select_from(OptimizedResume))
+    assert count == 2
+    assert await get_optimized_resume_html(db_session, stored_resume.id, result_ids[-1]) == "<p>3</p>"
+    with pytest.raises(NoResultFound):
+        await get_optimized_resume_html(db_session, stored_resume.id, result_ids[0])
@@ -0,0 +1,51 @@
+"""Test suite for config service functions (app.services.config)."""
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.services import config as config_service
+from app.services.config import get_config_value, get_pdf_page_margin, save_pdf_page_margin, set_config_value
+from app.utils.query_count import count_queries
+
+
+# --- Test the config cache ---
+@pytest.mark.asyncio
+async def test_get_config_value_served_from_cache(db_session):
+    """Test repeated reads hit the database once and fall back to defaults for missing keys."""
+    await set_config_value(db_session, "answer", "42")
+    config_service.clear_config_cache()
+
+    with count_queries(db_session.bind) as counter:
+        assert await get_config_value(db_session, "answer", None) == "42"
+        assert await get_config_value(db_session, "answer", None) == "42"
+        assert await get_config_value(db_session, "missing", "fallback") == "fallback"
+    assert counter.count == 1
+
+
+@pytest.mark.asyncio
+async def test_set_config_value_writes_through(db_session):
+    """Test a local write updates the cache without forcing a reload."""
+    assert await get_pdf_page_margin(db_session) == config_service.DEFAULT_PDF_PAGE_MARGIN
+    await save_pdf_page_margin(db_session, "15mm")
+
+    with count_queries(db_session.bind) as counter:
+        assert await get_pdf_page_margin(db_session) == "15mm"
+    assert counter.count == 0
+
+
+@pytest.mark.asyncio
+async def test_config_cache_sees_other_writers(db_session, monkeypatch):
+    """Test a write from another session (standing in for another worker) is picked up via the generation."""
+    await set_config_value(db_session, "shared", "old")
+    assert await get_config_value(db_session, "shared", None) == "old"
+
+    other_sessions = async_sessionmaker(db_session.bind, expire_on_commit=False)
+    async with other_sessions() as other_session:
+        # Simulate another process: its write must not touch this process' cache
+        monkeypatch.setattr(config_service, "_config_cache", None)
+        await set_config_value(other_session, "shared", "new")
+    monkeypatch.undo()
+
+    assert await get_config_value(db_session, "shared", None) == "old"
+    monkeypatch.setattr(config_service, "CONFIG_CACHE_CHECK_INTERVAL", 0)
+    assert await get_config_value(db_session, "shared", None) == "new"
@@ -0,0 +1,76 @@
+"""Test suite for the shared LLM client registry (app.services.llm)."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services import llm
+from app.services.config import save_llm_settings
+from app.services.llm import LLMClientRegistry
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_clients_reused_per_settings():
+    """Test one client per (api_key, model, base_url, temperature), all sharing a single HTTP pool."""
+    registry = LLMClientRegistry(maxsize=4)
+    first = registry.get("sk-one", "gpt-4o-mini")
+    assert registry.get("sk-one", "gpt-4o-mini") is first
+
+    other_model = registry.get("sk-one", "gpt-4o")
+    other_key = registry.get("sk-two", "gpt-4o-mini")
+    assert len({id(first), id(other_model), id(other_key)}) == 3
+    assert registry.stats()["clients"]["hits"] == 1
+    assert registry.stats()["clients"]["size"] == 3
+
+
+@pytest.mark.asyncio
+async def test_shared_http_client_counts_connection_reuse(local_server):
+    """Test consecutive requests ride one kept-alive connection and the stats say so."""
+    registry = LLMClientRegistry(maxsize=4)
+    http_client = registry._get_http_client()
+    try:
+        for _ in range(3):
+            assert (await http_client.get(local_server)).status_code == 200
+    finally:
+        await registry.aclose()
+
+    stats = registry.stats()["http"]
+    assert stats["requests"] == 3
+    assert stats["connections_opened"] == 1
+    assert stats["connection_reuse_rate"] == round(2 / 3, 3)
+
+
+@pytest.mark.asyncio
+async def test_saving_llm_settings_invalidates_clients(db_session, monkeypatch):
+    """Test clients built for the old credentials are dropped when the settings are saved."""
+    registry = LLMClientRegistry(maxsize=4)
+    monkeypatch.setattr(llm, "llm_clients", registry)
+    old = llm.get_llm("sk-old", "gpt-4o-mini")
+
+    await save_llm_settings(db_session, "sk-new", "gpt-4o-mini")
+    assert registry.stats()["invalidations"] == 1
+    assert registry.stats()["clients"]["size"] == 0
+    assert llm.get_llm("sk-old", "gpt-4o-mini") is not old
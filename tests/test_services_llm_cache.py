@@ -0,0 +1,99 @@
+"""Test suite for the LLM response cache (app.services.llm_cache)."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, func, select, update
+
+from app.db import LLMLease, LLMResponseCache
+from app.services import llm_cache
+from app.services.llm_cache import get_cached_response, llm_cache_key, store_response
+
+
+def test_llm_cache_key_covers_every_input():
+    """Test the key changes with the endpoint, model, temperature, system prompt and user message."""
+    base = llm_cache_key(None, "gpt-4o-mini", 0.1, "system", "user")
+    assert base == llm_cache_key(None, "gpt-4o-mini", 0.1, "system", "user")
+    assert base != llm_cache_key("http://localhost:8000/v1", "gpt-4o-mini", 0.1, "system", "user")
+    assert base != llm_cache_key(None, "gpt-4o", 0.1, "system", "user")
+    assert base != llm_cache_key(None, "gpt-4o-mini", 0.2, "system", "user")
+    assert base != llm_cache_key(None, "gpt-4o-mini", 0.1, "system!", "user")
+    assert base != llm_cache_key(None, "gpt-4o-mini", 0.1, "system", "user!")
+
+
+@pytest.mark.asyncio
+async def test_cached_response_round_trip_and_expiry(db_session):
+    """Test a stored response is returned until it is older than the TTL."""
+    await store_response(db_session, "k", "gpt-4o-mini", "<p>cached</p>")
+    assert await get_cached_response(db_session, "k") == "<p>cached</p>"
+    assert await get_cached_response(db_session, "missing") is None
+
+    stale = datetime.now() - timedelta(seconds=llm_cache.LLM_CACHE_TTL_SECONDS + 1)
+    await db_session.execute(update(LLMResponseCache).values(created_at=stale))
+    assert await get_cached_response(db_session, "k") is None
+
+
+@pytest.mark.asyncio
+async def test_store_response_evicts_least_recently_used(db_session, monkeypatch):
+    """Test entries beyond the limit are evicted by last use, not by age."""
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_MAX_ENTRIES", 2)
+    await store_response(db_session, "a", "m", "A")
+    await store_response(db_session, "b", "m", "B")
+    await db_session.execute(
+        update(LLMResponseCache)
+        .where(LLMResponseCache.key == "b")
+        .values(last_used_at=datetime.now() - timedelta(minutes=1))
+    )
+    await store_response(db_session, "c", "m", "C")
+
+    assert await db_session.scalar(select(func.count()).select_from(LLMResponseCache)) == 2
+    assert await get_cached_response(db_session, "a") == "A"
+    assert await get_cached_response(db_session, "b") is None
+
+
+@pytest.mark.asyncio
+async def test_lookups_do_not_write_until_hits_are_due(db_session):
+    """Test misses and recent hits leave the table alone, and counted hits are written with the next store."""
+    await store_response(db_session, "k", "m", "K")
+    writes = []
+    event.listen(db_session.bind.sync_engine, "before_cursor_execute", lambda *args: writes.append(args[2]))
+
+    assert await get_cached_response(db_session, "missing") is None
+    assert await get_cached_response(db_session, "k") == "K"
+    assert await get_cached_response(db_session, "k") == "K"
+    assert not [statement for statement in writes if not statement.startswith("SELECT")]
+    assert await db_session.scalar(select(LLMResponseCache.hits)) == 0
+
+    await store_response(db_session, "other", "m", "O")
+    assert await db_session.scalar(select(LLMResponseCache.hits).where(LLMResponseCache.key == "k")) == 2
+
+
+@pytest.mark.asyncio
+async def test_hit_on_stale_entry_records_use(db_session):
+    """Test a hit on an entry last used longer ago than the touch interval writes its use right away."""
+    await store_response(db_session, "k", "m", "K")
+    last_used = datetime.now() - timedelta(seconds=llm_cache.LLM_CACHE_TOUCH_SECONDS + 1)
+    await db_session.execute(update(LLMResponseCache).values(last_used_at=last_used))
+    await db_session.commit()
+
+    assert await get_cached_response(db_session, "k") == "K"
+    row = (await db_session.execute(select(LLMResponseCache))).scalar_one()
+    await db_session.refresh(row)
+    assert row.hits == 1
+    assert row.last_used_at > last_used
+
+
+@pytest.mark.asyncio
+async def test_lookups_do_not_commit_the_callers_changes(db_session, monkeypatch):
+    """Test neither a lookup nor the hit it writes out commits what the caller left in its session."""
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_TOUCH_SECONDS", 0)
+    await store_response(db_session, "k", "m", "K")
+
+    db_session.add(LLMLease(key="k", owner="caller", expires_at=datetime.now()))
+    assert await get_cached_response(db_session, "k") == "K"
+    db_session.add(LLMLease(key="k", owner="caller", expires_at=datetime.now()))
+    assert await llm_cache.peek_cached_response(db_session, "k", datetime.now() - timedelta(minutes=1)) == "K"
+    await db_session.rollback()
+
+    assert (await db_session.execute(select(LLMLease))).scalars().all() == []
+    assert await db_session.scalar(select(LLMResponseCache.hits)) == 1
@@ -0,0 +1,117 @@
+"""Test suite for single-flight LLM calls (app.services.llm_flight)."""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db import LLMLease
+from app.services import llm_flight
+from app.services.ats import optimize_resume, stream_optimized_resume
+from app.services.llm_cache import get_cached_response, store_response
+from app.services.llm_flight import complete_once
+
+
+@pytest.fixture
+def session_factory(db_session):
+    return async_sessionmaker(db_session.bind, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fake_llm", [{"delay": 0.1}], indirect=True)
+async def test_concurrent_identical_optimizations_share_one_call(session_factory, stored_resume, fake_llm):
+    """Test a double click's two optimizations make one LLM call and get the same result."""
+
+    async def optimize():
+        async with session_factory() as session:
+            html, _ = await optimize_resume(session, stored_resume.id)
+            return html
+
+    first, second = await asyncio.gather(optimize(), optimize())
+    assert first == second == "<p>call 1</p>"
+    assert fake_llm.calls == 1
+    assert llm_flight.llm_flight_stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fake_llm", [{"reply": "```html\n<p>streamed</p>\n```", "delay": 0.1}], indirect=True)
+async def test_concurrent_identical_streams_share_one_call(session_factory, stored_resume, fake_llm):
+    """Test a second tab streaming the same optimization follows the first one's call."""
+
+    async def stream():
+        return "".join([html async for html, _ in stream_optimized_resume(session_factory, stored_resume.id)])
+
+    first = asyncio.create_task(stream())
+    await asyncio.sleep(0.05)  # Join mid-stream, after some pieces have arrived
+    second = await stream()
+    assert await first == second == "\n<p>streamed</p>\n"
+    assert fake_llm.calls == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fake_llm", [{"delay": 0.2}], indirect=True)
+async def test_call_survives_one_waiter_and_stops_with_the_last(session_factory, fake_llm):
+    """Test a cancelled waiter leaves the call running for the others, and the last one cancels it."""
+
+    async def call(emit):
+        emit((await fake_llm.achat([])).message.content)
+
+    leaving = asyncio.create_task(complete_once(session_factory, "k1", "m", call))
+    staying = asyncio.create_task(complete_once(session_factory, "k1", "m", call))
+    await asyncio.sleep(0.05)
+    leaving.cancel()
+    assert await staying == "<p>call 1</p>"
+    assert fake_llm.calls == 1 and fake_llm.cancelled == 0
+
+    abandoned = asyncio.create_task(complete_once(session_factory, "k2", "m", call))
+    await asyncio.sleep(0.05)
+    abandoned.cancel()
+    await asyncio.gather(abandoned, return_exceptions=True)
+    await asyncio.sleep(0.01)
+    assert fake_llm.cancelled == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fake_llm", [{"delay": 0.01}], indirect=True)
+async def test_waits_for_another_worker_holding_the_lease(db_session, session_factory, fake_llm, monkeypatch):
+    """Test a call leased by another worker is awaited through the cache, and a lapsed lease is taken over."""
+    monkeypatch.setattr(llm_flight, "LLM_LEASE_POLL_SECONDS", 0.02)
+
+    async def call(emit):
+        emit((await fake_llm.achat([])).message.content)
+
+    db_session.add(LLMLease(key="k", owner="other-worker", expires_at=datetime.now() + timedelta(minutes=1)))
+    await db_session.commit()
+    waiting = asyncio.create_task(complete_once(session_factory, "k", "m", call))
+    await asyncio.sleep(0.1)
+    assert not waiting.done()
+    await store_response(db_session, "k", "m", "<p>from the other worker</p>")
+    assert await waiting == "<p>from the other worker</p>"
+    assert fake_llm.calls == 0
+
+    await db_session.execute(LLMLease.__table__.update().values(expires_at=datetime.now() - timedelta(seconds=1)))
+    await db_session.commit()
+    assert await complete_once(session_factory, "k", "m", call) == "<p>call 1</p>"
+    assert await get_cached_response(db_session, "k") == "<p>call 1</p>"
+    assert (await db_session.execute(select(LLMLease))).scalars().all() == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fake_llm", [{"delay": 0.05}], indirect=True)
+async def test_cache_write_failure_still_returns_completion(db_session, session_factory, fake_llm, monkeypatch):
+    """Test every waiter gets the completion when caching it fails, and the lease is released."""
+
+    async def failing_store(*args):
+        raise OperationalError("INSERT", {}, Exception("database is locked"))
+
+    async def call(emit):
+        emit((await fake_llm.achat([])).message.content)
+
+    monkeypatch.setattr(llm_flight, "store_response", failing_store)
+    results = await asyncio.gather(*(complete_once(session_factory, "k", "m", call) for _ in range(2)))
+    assert results == ["<p>call 1</p>"] * 2
+    assert fake_llm.calls == 1
+    assert (await db_session.execute(select(LLMLease))).scalars().all() == []
@@ -0,0 +1,247 @@
+"""Test suite for the PDF render pool (app.services.pdf)."""
+
+import asyncio
+import os
+import threading
+
+import pytest
+
+from app.services import pdf
+from app.services.pdf import (
+    PdfRenderJobs,
+    PdfRenderPool,
+    PinnedPdfResponse,
+    build_pdf_document,
+    prerender_pdf,
+    render_pdf_file,
+)
+from app.utils.disk_cache import DiskLRUCache
+
+
+@pytest.fixture
+def document():
+    return build_pdf_document("<h1>Jane Doe</h1><p>Engineer</p>", "1cm")
+
+
+@pytest.mark.asyncio
+async def test_render_in_thread_mode(document):
+    """Test a pool without workers renders in a thread and still records its timings."""
+    pool = PdfRenderPool(workers=0, max_jobs_per_worker=0, max_rss_mb=0)
+    pdf_bytes = await pool.render(document)
+    assert pdf_bytes.startswith(b"%PDF")
+    stats = pool.stats()
+    assert stats["mode"] == "thread"
+    assert stats["completed"] == 1
+    assert stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_render_in_worker_processes(document):
+    """Test documents render in spawned workers that are replaced after their job quota."""
+    pool = PdfRenderPool(workers=1, max_jobs_per_worker=2, max_rss_mb=0)
+    try:
+        for _ in range(3):
+            assert (await pool.render(document)).startswith(b"%PDF")
+        stats = pool.stats()
+        assert stats["mode"] == "process"
+        assert stats["completed"] == 3
+        assert stats["failed"] == 0
+        assert stats["recycles"] == 0
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_memory_ceiling_swaps_pool(document):
+    """Test a worker over the memory ceiling causes the pool to be replaced by fresh workers."""
+    pool = PdfRenderPool(workers=1, max_jobs_per_worker=0, max_rss_mb=1)
+    try:
+        await pool.render(document)
+        assert pool.stats()["recycles"] == 1
+        assert pool.stats()["generation"] == 1
+        assert (await pool.render(document)).startswith(b"%PDF")
+    finally:
+        pool.shutdown()
+
+
+# --- Test the PDF disk cache ---
+@pytest.mark.asyncio
+async def test_render_pdf_file_renders_each_document_once(tmp_path, monkeypatch, document):
+    """Test identical documents are served from the cache and a different margin is a different entry."""
+    pool = PdfRenderPool(workers=0, max_jobs_per_worker=0, max_rss_mb=0)
+    cache = DiskLRUCache(tmp_path, 10 * 1024 * 1024, suffix=".pdf")
+    monkeypatch.setattr(pdf, "pdf_render_pool", pool)
+    monkeypatch.setattr(pdf, "pdf_cache", cache)
+
+    first = await render_pdf_file(document)
+    second = await render_pdf_file(document)
+    assert first == second
+    assert first.read_bytes().startswith(b"%PDF")
+    await render_pdf_file(build_pdf_document("<h1>Jane Doe</h1><p>Engineer</p>", "2cm"))
+
+    assert pool.stats()["completed"] == 2
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["hit_rate"] == round(1 / 3, 3)
+
+
+@pytest.mark.asyncio
+async def test_pinned_pdf_response_releases_when_sending_fails(tmp_path, monkeypatch, document):
+    """Test the PDF is released for eviction even when the client goes away while it is being sent."""
+    cache = DiskLRUCache(tmp_path, 10 * 1024 * 1024, suffix=".pdf")
+    monkeypatch.setattr(pdf, "pdf_render_pool", PdfRenderPool(workers=0, max_jobs_per_worker=0, max_rss_mb=0))
+    monkeypatch.setattr(pdf, "pdf_cache", cache)
+    pdf_path = await render_pdf_file(document)
+    assert cache.stats()["pinned"] == 1
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            raise OSError("client disconnected")
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": []}
+    with pytest.raises(OSError):
+        await PinnedPdfResponse(pdf_path, "resume.pdf")(scope, receive, send)
+    assert cache.stats()["pinned"] == 0
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    """Test the size bound evicts the least recently read entry and leaves no temporary files behind."""
+    cache = DiskLRUCache(tmp_path, max_bytes=25, suffix=".pdf")
+    cache.put("a", b"x" * 10)
+    cache.put("b", b"x" * 10)
+    assert cache.get("a") is not None
+    cache.put("c", b"x" * 10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert sorted(os.listdir(tmp_path)) == ["a.pdf", "c.pdf"]
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == 20
+
+
+def test_disk_cache_index_survives_restart(tmp_path):
+    """Test a new cache instance picks up existing files, oldest first, and keeps an oversized newest entry."""
+    cache = DiskLRUCache(tmp_path, max_bytes=25, suffix=".pdf")
+    cache.put("a", b"x" * 10)
+    os.utime(tmp_path / "a.pdf", (1, 1))
+    cache.put("b", b"x" * 10)
+
+    reopened = DiskLRUCache(tmp_path, max_bytes=25, suffix=".pdf")
+    assert reopened.get("b") is not None
+    reopened.put("c", b"x" * 40)
+    assert sorted(os.listdir(tmp_path)) == ["c.pdf"]
+
+
+def test_disk_cache_keeps_pinned_entries(tmp_path):
+    """Test a pinned entry survives eviction until it is released, and is evicted afterwards."""
+    cache = DiskLRUCache(tmp_path, max_bytes=25, suffix=".pdf")
+    cache.put("a", b"x" * 10)
+    path = cache.get("a", pin=True)
+    cache.put("b", b"x" * 10)
+    cache.put("c", b"x" * 10)
+
+    assert path.exists()
+    assert cache.get("b") is None
+    assert cache.stats()["pinned"] == 1
+
+    cache.release(path)
+    assert cache.stats()["pinned"] == 0
+    cache.put("d", b"x" * 10)
+    assert not path.exists()
+    assert sorted(os.listdir(tmp_path)) == ["c.pdf", "d.pdf"]
+
+
+def test_disk_cache_concurrent_puts_keep_accounting(tmp_path):
+    """Test puts from many threads alongside lookups leave the index and byte count consistent."""
+    cache = DiskLRUCache(tmp_path, max_bytes=500, suffix=".pdf")
+
+    def writer(thread: int) -> None:
+        for i in range(50):
+            cache.put(f"{thread}-{i}", b"x" * 10)
+            cache.get(f"{thread}-{i // 2}")
+
+    threads = [threading.Thread(target=writer, args=(thread,)) for thread in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    files = [name for name in os.listdir(tmp_path) if not name.startswith(".")]
+    assert cache.stats()["entries"] == len(files) == 50
+    assert cache.stats()["bytes"] == 500
+
+
+# --- Test speculative pre-rendering ---
+@pytest.fixture
+def gated_renders(tmp_path, monkeypatch):
+    """Replaces rendering with one that waits for the returned event, and records rendered documents."""
+    gate = asyncio.Event()
+    rendered = []
+
+    async def fake_render_pdf(full_html, stylesheets=()):
+        await gate.wait()
+        rendered.append(full_html)
+        return b"%PDF-" + full_html.encode()
+
+    monkeypatch.setattr(pdf, "render_pdf", fake_render_pdf)
+    monkeypatch.setattr(pdf, "pdf_cache", DiskLRUCache(tmp_path, 1024 * 1024, suffix=".pdf"))
+    return gate, rendered
+
+
+@pytest.mark.asyncio
+async def test_download_joins_prerender(gated_renders):
+    """Test a download for a document being pre-rendered waits for that job instead of rendering again."""
+    gate, rendered = gated_renders
+    jobs = PdfRenderJobs(max_pending=4)
+    assert jobs.prerender(1, "<p>a</p>")
+
+    download = asyncio.create_task(jobs.get("<p>a</p>"))
+    await asyncio.sleep(0)
+    gate.set()
+    path = await download
+
+    assert path.read_bytes() == b"%PDF-<p>a</p>"
+    assert rendered == ["<p>a</p>"]
+    assert jobs.stats()["joined"] == 1
+    assert (await jobs.get("<p>a</p>")) == path
+    assert rendered == ["<p>a</p>"]
+
+
+@pytest.mark.asyncio
+async def test_newer_prerender_cancels_abandoned_one(gated_renders):
+    """Test re-optimizing a resume cancels its unclaimed pre-render, but never one a download joined."""
+    gate, rendered = gated_renders
+    jobs = PdfRenderJobs(max_pending=4)
+    jobs.prerender(1, "<p>old</p>")
+    jobs.prerender(2, "<p>kept</p>")
+    download = asyncio.create_task(jobs.get("<p>kept</p>"))
+    await asyncio.sleep(0)
+
+    jobs.prerender(1, "<p>new</p>")
+    jobs.prerender(2, "<p>newer</p>")
+    gate.set()
+    await download
+    await asyncio.sleep(0.01)
+
+    assert sorted(rendered) == ["<p>kept</p>", "<p>new</p>", "<p>newer</p>"]
+    assert jobs.stats()["cancelled"] == 1
+    assert jobs.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_prerender_queue_is_bounded(gated_renders, monkeypatch):
+    """Test no pre-render starts while max_pending are running, and none run when the feature is off."""
+    gate, rendered = gated_renders
+    jobs = PdfRenderJobs(max_pending=2)
+    assert jobs.prerender(1, "<p>1</p>")
+    assert jobs.prerender(2, "<p>2</p>")
+    assert not jobs.prerender(3, "<p>3</p>")
+    assert jobs.stats()["skipped"] == 1
+    gate.set()
+    await asyncio.sleep(0.01)
+    assert sorted(rendered) == ["<p>1</p>", "<p>2</p>"]
+
+    monkeypatch.setattr(pdf, "PDF_PRERENDER_ENABLED", False)
+    assert not prerender_pdf(4, "<p>4</p>")
@@ -1,6 +1,34 @@
 """Test suite for Resume service functions (app.services.resume)."""
 
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
 import pytest
+import pytest_asyncio
+from sqlalchemy.exc import NoResultFound
+
+from app.db import Resume
+from app.models import FieldEdit
+from app.services.resume import (
+    add_experience,
+    add_project,
+    apply_field_edits,
+    create_resume,
+    delete_project_by_id,
+    delete_resume_by_id,
+    get_first_resume_id,
+    get_resume_dict,
+    get_resume_revision,
+    get_resume_section,
+    list_resumes,
+    resume_cache_stats,
+    update_education_field,
+    update_experience_field,
+    update_personal_info,
+    update_project_field,
+    update_skills,
+)
+from app.utils.query_count import assert_max_queries, count_queries
 
 # Note: Fixtures like mock_session, default_resume, sample_education, etc.
 # would be defined in tests/conftest.py
@@ -17,6 +45,283 @@ async def test_get_resume_by_id_not_found(mock_session):
     """Test retrieving a non-existent resume by ID returns None."""
 
 
+# --- Test get_resume_dict ---
+@pytest.mark.asyncio
+async def test_get_resume_dict_round_trip(db_session, stored_resume, sample_resume_data):
+    """Test a stored resume comes back as a dict with every section populated."""
+    resume_dict = await get_resume_dict(db_session, stored_resume.id)
+    assert resume_dict["id"] == stored_resume.id
+    assert resume_dict["personal_info"]["name"] == sample_resume_data["personal_info"]["name"]
+    assert resume_dict["skills"]["tools"] == sample_resume_data["skills"]["tools"]
+    assert [exp["title"] for exp in resume_dict["experience"]] == ["Software Engineer"]
+    assert len(resume_dict["projects"]) == 1
+    assert len(resume_dict["education"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_resume_dict_query_budget(db_session, stored_resume):
+    """Test the full resume graph loads in a fixed number of queries regardless of section sizes."""
+    for _ in range(10):
+        await add_experience(db_session, stored_resume.id)
+    db_session.expunge_all()
+
+    # Revision lookup plus the four graph queries
+    with assert_max_queries(db_session.bind, 5):
+        resume_dict = await get_resume_dict(db_session, stored_resume.id)
+    assert len(resume_dict["experience"]) == 11
+
+
+@pytest.mark.asyncio
+async def test_get_resume_dict_cached_until_revision_changes(db_session, stored_resume):
+    """Test unchanged resumes are served from the cache and any section write invalidates them."""
+    hits_before = resume_cache_stats()["hits"]
+    first = await get_resume_dict(db_session, stored_resume.id)
+    revision = await get_resume_revision(db_session, stored_resume.id)
+
+    with count_queries(db_session.bind) as counter:
+        assert await get_resume_dict(db_session, stored_resume.id) is first
+    assert counter.count == 1
+
+    await update_experience_field(db_session, stored_resume.id, 1, "title", "Revised")
+    assert await get_resume_revision(db_session, stored_resume.id) == revision + 1
+    updated = await get_resume_dict(db_session, stored_resume.id)
+    assert updated["experience"][0]["title"] == "Revised"
+    assert resume_cache_stats()["hits"] - hits_before == 1
+
+
+@pytest.mark.asyncio
+async def test_resume_revision_bumped_by_every_section_write(db_session, stored_resume):
+    """Test inserts, updates and deletes on any section bump the revision."""
+    revisions = [await get_resume_revision(db_session, stored_resume.id)]
+    new_project = await add_project(db_session, stored_resume.id)
+    revisions.append(await get_resume_revision(db_session, stored_resume.id))
+    await update_skills(db_session, stored_resume.id, "tools", "Emacs")
+    revisions.append(await get_resume_revision(db_session, stored_resume.id))
+    await delete_project_by_id(db_session, stored_resume.id, new_project.id)
+    revisions.append(await get_resume_revision(db_session, stored_resume.id))
+    assert revisions == sorted(set(revisions))
+
+
+@pytest.mark.asyncio
+async def test_get_resume_dict_never_serves_a_deleted_resume(db_session, stored_resume, sample_resume_data):
+    """Test a resume created after the newest one is deleted neither reuses its id nor gets its cached dict."""
+    data = {key: value for key, value in sample_resume_data.items() if key != "id"}
+    personal_info = {key: value for key, value in data["personal_info"].items() if key != "phone"}
+
+    def person(name):
+        return {**data, "personal_info": {**personal_info, "name": name}}
+
+    await get_resume_dict(db_session, stored_resume.id)
+    alice = await create_resume(db_session, "Alice", person("Alice"))
+    assert (await get_resume_dict(db_session, alice.id))["personal_info"]["name"] == "Alice"
+    await delete_resume_by_id(db_session, alice.id)
+    assert resume_cache_stats()["size"] == 1
+
+    # Created the same way, so it reaches the same revision Alice had
+    bob = await create_resume(db_session, "Bob", person("Bob"))
+    assert bob.id != alice.id
+    assert (await get_resume_dict(db_session, bob.id))["personal_info"]["name"] == "Bob"
+
+
+@pytest.mark.asyncio
+async def test_get_resume_dict_not_found(db_session):
+    """Test get_resume_dict raises NoResultFound for an unknown ID."""
+    with pytest.raises(NoResultFound):
+        await get_resume_dict(db_session, 999)
+
+
+# --- Test get_resume_section ---
+@pytest.mark.asyncio
+async def test_get_resume_section_single_query(db_session, stored_resume):
+    """Test a list section loads with one query and only carries that section."""
+    for _ in range(5):
+        await add_experience(db_session, stored_resume.id)
+
+    with assert_max_queries(db_session.bind, 1):
+        section = await get_resume_section(db_session, stored_resume.id, "experience")
+    assert set(section) == {"id", "revision", "experience"}
+    assert section["id"] == stored_resume.id
+    assert [item["title"] for item in section["experience"]][:2] == ["Software Engineer", "New Job Title"]
+    assert len(section["experience"]) == 6
+
+
+@pytest.mark.asyncio
+async def test_get_resume_section_uses_resume_id_index(db_session, stored_resume):
+    """Test the section query is resolved through the resume_id index rather than a table scan."""
+    with count_queries(db_session.bind) as counter:
+        await get_resume_section(db_session, stored_resume.id, "projects")
+    connection = await db_session.connection()
+    plan = await connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {counter.statements[0]}", (stored_resume.id,))
+    assert "ix_project_resume_id" in " ".join(str(row) for row in plan)
+
+
+@pytest.mark.asyncio
+async def test_get_resume_section_single_row(db_session, stored_resume, valid_skill_set):
+    """Test one-to-one sections come back as a single dict."""
+    section = await get_resume_section(db_session, stored_resume.id, "skills")
+    assert section["skills"]["technical_skills"] == valid_skill_set["technical_skills"]
+
+
+@pytest.mark.asyncio
+async def test_get_resume_section_not_found(db_session):
+    """Test an unknown resume raises NoResultFound instead of returning an empty section."""
+    with pytest.raises(NoResultFound):
+        await get_resume_section(db_session, 999, "education")
+
+
+# --- Test list_resumes ---
+@pytest_asyncio.fixture
+async def listed_resumes(db_session):
+    """Stores seven bare resumes, with two pairs sharing an updated_at to exercise the id tie-breaker."""
+    base = datetime(2024, 1, 1)
+    offsets = [0, 1, 1, 2, 3, 3, 4]
+    resumes = [
+        Resume(name=f"Resume {index}", created_at=base, updated_at=base + timedelta(days=offset))
+        for index, offset in enumerate(offsets)
+    ]
+    db_session.add_all(resumes)
+    await db_session.commit()
+    return resumes
+
+
+@pytest.mark.asyncio
+async def test_list_resumes_pages_in_keyset_order(db_session, listed_resumes):
+    """Test paging with the cursor visits every resume once, newest first, one query per page."""
+    seen, cursor = [], None
+    while True:
+        with assert_max_queries(db_session.bind, 1):
+            page = await list_resumes(db_session, limit=3, cursor=cursor)
+        seen.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    expected = sorted(listed_resumes, key=lambda resume: (resume.updated_at, resume.id), reverse=True)
+    assert [item["id"] for item in seen] == [resume.id for resume in expected]
+    assert set(seen[0]) == {"id", "name", "created_at", "updated_at"}
+
+
+@pytest.mark.asyncio
+async def test_list_resumes_ascending_by_name_with_filter(db_session, listed_resumes):
+    """Test the name filter and ascending sort, including a filter value with LIKE wildcards."""
+    page = await list_resumes(db_session, sort="name", descending=False, name_filter="resume 1")
+    assert [item["name"] for item in page["items"]] == ["Resume 1"]
+    assert page["next_cursor"] is None
+
+    page = await list_resumes(db_session, name_filter="%")
+    assert page["items"] == []
+
+
+@pytest.mark.asyncio
+async def test_list_resumes_rejects_foreign_cursor(db_session, listed_resumes):
+    """Test a cursor from another sort order, or a garbled one, is rejected rather than misapplied."""
+    page = await list_resumes(db_session, limit=2)
+    with pytest.raises(ValueError):
+        await list_resumes(db_session, limit=2, cursor=page["next_cursor"], sort="name")
+    with pytest.raises(ValueError):
+        await list_resumes(db_session, cursor="not-a-cursor")
+    with pytest.raises(ValueError):
+        await list_resumes(db_session, sort="revision")
+
+
+@pytest.mark.asyncio
+async def test_get_first_resume_id_single_limited_query(db_session, listed_resumes):
+    """Test the root redirect lookup is one LIMIT 1 query on the id."""
+    with count_queries(db_session.bind) as counter:
+        resume_id = await get_first_resume_id(db_session)
+    assert resume_id == min(resume.id for resume in listed_resumes)
+    assert len(counter.statements) == 1
+    assert "LIMIT" in counter.statements[0]
+
+
+@pytest.mark.asyncio
+async def test_get_first_resume_id_empty(db_session):
+    """Test None is returned when there are no resumes."""
+    assert await get_first_resume_id(db_session) is None
+
+
+# --- Test apply_field_edits ---
+@pytest.mark.asyncio
+async def test_apply_field_edits_single_commit(db_session, stored_resume):
+    """Test a mixed batch is applied with one commit and reports a status per edit."""
+    experience_id = (await get_resume_section(db_session, stored_resume.id, "experience"))["experience"][0]["id"]
+    edits = [
+        FieldEdit(entity="personal_info", field="name", value="Batch Name"),
+        FieldEdit(entity="experience", id=experience_id, field="title", value="Batch Title"),
+        FieldEdit(entity="skills", field="tools", value="Batch Tools"),
+        FieldEdit(entity="experience", id=999, field="title", value="Nope"),
+        FieldEdit(entity="experience", id=experience_id, field="resume_id", value="2"),
+        FieldEdit(entity="projects", field="name", value="Missing id"),
+        FieldEdit(entity="unknown", field="name", value="Nope"),
+    ]
+
+    with patch.object(db_session, "commit", AsyncMock(wraps=db_session.commit)) as commit:
+        results = await apply_field_edits(db_session, stored_resume.id, edits)
+    commit.assert_awaited_once()
+
+    assert [result["status"] for result in results] == [
+        "updated",
+        "updated",
+        "updated",
+        "not_found",
+        "invalid",
+        "invalid",
+        "invalid",
+    ]
+    db_session.expunge_all()
+    resume_dict = await get_resume_dict(db_session, stored_resume.id)
+    assert resume_dict["personal_info"]["name"] == "Batch Name"
+    assert resume_dict["experience"][0]["title"] == "Batch Title"
+    assert resume_dict["skills"]["tools"] == "Batch Tools"
+
+
+@pytest.mark.asyncio
+async def test_apply_field_edits_scoped_to_resume(db_session, stored_resume):
+    """Test edits cannot reach rows that belong to another resume."""
+    experience_id = (await get_resume_section(db_session, stored_resume.id, "experience"))["experience"][0]["id"]
+    results = await apply_field_edits(
+        db_session,
+        stored_resume.id + 1,
+        [FieldEdit(entity="experience", id=experience_id, field="title", value="x")],
+    )
+    assert results[0]["status"] == "not_found"
+
+
+@pytest.mark.asyncio
+async def test_update_personal_info_rejects_key_fields(db_session, stored_resume):
+    """Test single-field updates refuse to touch id or resume_id."""
+    with pytest.raises(ValueError):
+        await update_personal_info(db_session, stored_resume.id, "resume_id", "2")
+
+
+# --- Test single-statement field updates ---
+@pytest.mark.asyncio
+async def test_field_updates_issue_one_statement(db_session, stored_resume):
+    """Test every field update, ownership check included, is a single UPDATE statement."""
+    resume_id = stored_resume.id
+    updates = [
+        lambda: update_personal_info(db_session, resume_id, "name", "One"),
+        lambda: update_skills(db_session, resume_id, "tools", "One"),
+        lambda: update_experience_field(db_session, resume_id, 1, "title", "One"),
+        lambda: update_project_field(db_session, resume_id, 1, "name", "One"),
+        lambda: update_education_field(db_session, resume_id, 1, "degree", "One"),
+    ]
+    for run_update in updates:
+        with count_queries(db_session.bind) as counter:
+            assert await run_update()
+        assert counter.count == 1
+        assert counter.statements[0].startswith("UPDATE")
+
+
+@pytest.mark.asyncio
+async def test_field_update_wrong_resume_one_statement(db_session, stored_resume):
+    """Test a child row owned by another resume is reported missing after one statement."""
+    with count_queries(db_session.bind) as counter:
+        with pytest.raises(NoResultFound):
+            await update_experience_field(db_session, stored_resume.id + 1, 1, "title", "Nope")
+    assert counter.count == 1
+
+
 # --- Test get_or_create_default_resume ---
 @pytest.mark.asyncio
 async def test_get_or_create_default_resume_creates_new(mock_session):